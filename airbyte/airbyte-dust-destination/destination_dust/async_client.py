@@ -0,0 +1,231 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, List, Mapping, Optional
+
+import httpx
+
+from destination_dust.client import (
+    RETRY_BACKOFF_FACTOR,
+    RETRY_STATUS_FORCELIST,
+    RETRY_TOTAL,
+    DustClientBase,
+)
+from destination_dust.rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger("airbyte")
+
+# Default number of pooled keep-alive connections for the async client
+DEFAULT_ASYNC_POOL_SIZE = 100
+
+# Request timeouts; waiting for a pooled connection never counts as a failure
+READ_TIMEOUT = httpx.Timeout(30, pool=None)
+WRITE_TIMEOUT = httpx.Timeout(60, pool=None)
+
+# HTTP/2 support in httpx requires the optional `h2` package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AsyncDustClient(DustClientBase):
+    """
+    Asyncio HTTP client for the Dust document and table upsert APIs.
+
+    Mirrors DustClient, but every API call is a coroutine and all calls share one
+    pooled httpx connection pool, so hundreds of requests can be in flight from a
+    single thread. Use it as an async context manager, or call `aclose()` when done.
+    """
+
+    def __init__(
+        self,
+        config: Mapping[str, Any],
+        log_callback=None,
+        pool_size: int = DEFAULT_ASYNC_POOL_SIZE,
+        http2: bool = True,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        """
+        Initialize async Dust client.
+
+        Args:
+            config: Configuration dictionary
+            log_callback: Optional callback function(message: str, level: str) for logging
+            pool_size: Maximum number of concurrent (and keep-alive) connections
+            http2: Negotiate HTTP/2 when the `h2` package is installed
+            rate_limiter: Limiter shared with other clients of the same sync
+        """
+        super().__init__(config, log_callback=log_callback, rate_limiter=rate_limiter)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+        self._client = httpx.AsyncClient(
+            headers=self._headers,
+            # Retry connection failures; status-based retries are handled in _request
+            transport=httpx.AsyncHTTPTransport(
+                retries=RETRY_TOTAL, http2=self.http2, limits=limits
+            ),
+            timeout=WRITE_TIMEOUT,
+        )
+
+    async def __aenter__(self) -> "AsyncDustClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        operation: str = "request",
+        attributes: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a request through the rate limiter, retrying it while it is rate limited
+        and retrying server errors with exponential backoff like DustClient.
+
+        `operation` and `attributes` are recorded like in DustClient._send.
+        """
+        start = time.monotonic()
+        attempt = 0
+        rate_limited_attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            response = await self._client.request(method, url, **kwargs)
+            self._record_response(response)
+            delay = self._rate_limit_retry_delay(rate_limited_attempt, response)
+            if delay is not None:
+                await asyncio.sleep(delay)
+                rate_limited_attempt += 1
+                continue
+            if response.status_code not in RETRY_STATUS_FORCELIST or attempt >= RETRY_TOTAL:
+                self._record_call(start, response, operation, attributes)
+                return response
+            delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            logger.debug(
+                f"{method} {url} returned {response.status_code}, retrying in {delay}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def check_connection(self, data_format: str = "documents") -> None:
+        """
+        Verify credentials and data source existence.
+
+        For documents: GETs /documents?limit=1
+        For tables: GETs /tables (list tables)
+        """
+        url = self._check_connection_url(data_format)
+        response = await self._request("GET", url, timeout=READ_TIMEOUT)
+        self._handle_check_connection(response)
+
+    async def list_tables(self) -> List[dict[str, Any]]:
+        """
+        List all tables in the configured Dust data source, following pagination.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        tables: List[dict[str, Any]] = []
+        seen_ids: set[str] = set()
+        while True:
+            url = self._prepare_list_tables(offset=len(tables))
+            response = await self._request("GET", url, timeout=READ_TIMEOUT)
+            page = self._handle_list_tables(response)
+            if not self._collect_tables_page(tables, seen_ids, page):
+                return tables
+
+    async def build_table_index(self) -> dict[str, str]:
+        """List every table once and map table titles to table IDs."""
+        return self._index_tables(await self.list_tables())
+
+    async def find_table_by_title(self, title: str) -> Optional[str]:
+        """Find a table ID by its title, or None if no table matches."""
+        return self._match_table_title(await self.list_tables(), title)
+
+    async def upsert_document(
+        self,
+        document_id: str,
+        title: str,
+        text: str,
+        source_url: str = "",
+        tags: Optional[List[str]] = None,
+        timestamp: Optional[int] = None,
+    ) -> dict:
+        """
+        Upsert a document into the configured Dust data source.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, payload = self._prepare_upsert_document(
+            document_id, title, text, source_url, tags, timestamp
+        )
+        response = await self._request(
+            "POST",
+            url,
+            operation="upsert_document",
+            attributes={"dust.document_id": document_id},
+            json=payload,
+            timeout=WRITE_TIMEOUT,
+        )
+        return self._handle_upsert_document(document_id, response)
+
+    async def upsert_table(
+        self,
+        name: str,
+        title: str = "",
+        description: str = "",
+        table_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Create or update a table definition in the configured Dust data source.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, payload = self._prepare_upsert_table(name, title, description, table_id)
+        response = await self._request(
+            "POST",
+            url,
+            operation="upsert_table",
+            attributes={"dust.table_name": name, "dust.table_id": table_id},
+            json=payload,
+            timeout=WRITE_TIMEOUT,
+        )
+        return self._handle_upsert_table(name, table_id, response)
+
+    async def upsert_rows(
+        self,
+        table_id: str,
+        rows: List[dict[str, Any]],
+        row_ids: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Upsert rows into an existing table; see DustClient.upsert_rows.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        return await self.upsert_encoded_rows(table_id, self._encode_rows(rows, row_ids))
+
+    async def upsert_encoded_rows(self, table_id: str, encoded_rows: List[bytes]) -> dict:
+        """
+        Upsert rows already encoded by encode_row; see DustClient.upsert_encoded_rows.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, body = self._prepare_upsert_rows(table_id, encoded_rows)
+        response = await self._request(
+            "POST",
+            url,
+            operation="upsert_rows",
+            attributes={"dust.table_id": table_id, "dust.row_count": len(encoded_rows)},
+            content=body,
+            timeout=WRITE_TIMEOUT,
+        )
+        return self._handle_upsert_rows(table_id, len(encoded_rows), response)
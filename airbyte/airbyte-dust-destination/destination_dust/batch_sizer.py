@@ -0,0 +1,103 @@
+import threading
+from dataclasses import dataclass
+from typing import List
+
+# Request size every stream starts from, in payload bytes
+DEFAULT_INITIAL_BATCH_BYTES = 256 * 1024
+
+# Default response time aimed at for each request, in seconds
+DEFAULT_TARGET_BATCH_SECONDS = 2.0
+
+# Smallest request size batches shrink to, in payload bytes
+MIN_BATCH_BYTES = 16 * 1024
+
+# Growth factor applied when requests complete well under the target latency
+BATCH_GROWTH_FACTOR = 1.25
+
+
+@dataclass
+class _StreamBatchStats:
+    batch_bytes: int
+    ceiling: int
+    requests: int = 0
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    failures: int = 0
+
+
+class AdaptiveBatchSizer:
+    """
+    Per-stream request size for table row upserts, adapted to observed responses.
+
+    Every stream starts at `initial_bytes` of payload per request. A request that
+    takes longer than `target_seconds` shrinks the stream's batches in proportion;
+    one that completes in under half of it grows them by BATCH_GROWTH_FACTOR, up
+    to `max_bytes`. A 413 or a timeout halves the batch size and lowers the
+    stream's ceiling below the failed size, so it does not grow back into it.
+    Thread-safe, since upserts complete on worker threads.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        initial_bytes: int = DEFAULT_INITIAL_BATCH_BYTES,
+        target_seconds: float = DEFAULT_TARGET_BATCH_SECONDS,
+    ):
+        self.max_bytes = max_bytes
+        self.initial_bytes = min(initial_bytes, max_bytes)
+        self.target_seconds = target_seconds
+        self._streams: dict[str, _StreamBatchStats] = {}
+        self._lock = threading.Lock()
+
+    def batch_bytes(self, stream_name: str) -> int:
+        """Payload bytes to put in the next request for this stream."""
+        with self._lock:
+            return self._stats(stream_name).batch_bytes
+
+    def observe(self, stream_name: str, payload_bytes: int, rows: int, seconds: float) -> None:
+        """Record a successful request and adjust the stream's batch size."""
+        with self._lock:
+            stats = self._stats(stream_name)
+            stats.requests += 1
+            stats.rows += rows
+            stats.bytes += payload_bytes
+            stats.seconds += seconds
+            if seconds > self.target_seconds:
+                scaled = int(payload_bytes * self.target_seconds / seconds)
+                stats.batch_bytes = max(min(stats.batch_bytes, scaled), MIN_BATCH_BYTES)
+            elif seconds < self.target_seconds / 2 and payload_bytes >= stats.batch_bytes // 2:
+                # Only grow from requests that were reasonably full
+                grown = int(stats.batch_bytes * BATCH_GROWTH_FACTOR)
+                stats.batch_bytes = min(grown, stats.ceiling)
+
+    def shrink(self, stream_name: str, failed_bytes: int) -> None:
+        """Halve the stream's batch size after a request of `failed_bytes` was too large or timed out."""
+        with self._lock:
+            stats = self._stats(stream_name)
+            stats.failures += 1
+            stats.ceiling = max(min(stats.ceiling, failed_bytes - 1), MIN_BATCH_BYTES)
+            stats.batch_bytes = max(min(stats.batch_bytes, failed_bytes) // 2, MIN_BATCH_BYTES)
+
+    def summary(self) -> List[str]:
+        """One line per stream describing the batch size it converged on."""
+        with self._lock:
+            lines = []
+            for stream_name, stats in sorted(self._streams.items()):
+                if not stats.requests:
+                    continue
+                rows_per_batch = stats.batch_bytes * stats.rows / stats.bytes if stats.bytes else 0
+                lines.append(
+                    f"Adaptive batching for {stream_name}: {stats.batch_bytes} bytes per request "
+                    f"(~{rows_per_batch:.0f} rows) after {stats.requests} request(s), "
+                    f"{stats.seconds / stats.requests:.2f}s average, "
+                    f"{stats.failures} too large or timed out"
+                )
+            return lines
+
+    def _stats(self, stream_name: str) -> _StreamBatchStats:
+        stats = self._streams.get(stream_name)
+        if stats is None:
+            stats = _StreamBatchStats(batch_bytes=self.initial_bytes, ceiling=self.max_bytes)
+            self._streams[stream_name] = stats
+        return stats
@@ -0,0 +1,159 @@
+import hashlib
+import sqlite3
+from typing import Any, Iterable, Mapping, Union
+
+# Fingerprints staged in memory before they are moved to the connection's temporary table
+STAGE_CHUNK_SIZE = 10_000
+
+
+class LocalCache:
+    """
+    Local SQLite store of what previous syncs sent to Dust.
+
+    It holds 64-bit content fingerprints of records, keyed by document id or table
+    row id, and the table id resolved for each stream title. Everything is scoped to
+    the configured data source.
+
+    Fingerprints of records sent since the last checkpoint are staged and only
+    persisted by `commit()`, which callers invoke once every staged record has
+    been acknowledged by Dust, so a failed sync never marks unsent records as sent.
+    Up to STAGE_CHUNK_SIZE of them are staged in memory; beyond that, they are
+    moved to a temporary table (which SQLite spills to disk), so a source that
+    checkpoints rarely does not grow memory with every record.
+    """
+
+    def __init__(self, path: str, scope: str):
+        self.path = path
+        self.scope = scope
+        self.skipped = 0
+        self.sent = 0
+        self._staged: dict[str, int] = {}
+        # Number of fingerprints moved to the temporary staged table since the last commit
+        self._spilled = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TEMP TABLE staged (key TEXT PRIMARY KEY, fingerprint INTEGER NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " scope TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " fingerprint INTEGER NOT NULL,"
+            " PRIMARY KEY (scope, key)"
+            ")"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS table_ids ("
+            " scope TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " table_id TEXT NOT NULL,"
+            " PRIMARY KEY (scope, title)"
+            ")"
+        )
+        self._connection.commit()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "LocalCache":
+        scope = f"{config['workspace_id']}/{config['space_id']}/{config['data_source_id']}"
+        return cls(config["local_cache_path"], scope)
+
+    @staticmethod
+    def fingerprint(*parts: Union[str, bytes]) -> int:
+        """Return a stable 64-bit fingerprint of the given strings or bytes."""
+        digest = hashlib.blake2b(digest_size=8)
+        for part in parts:
+            digest.update(part.encode("utf-8") if isinstance(part, str) else part)
+            digest.update(b"\0")
+        # SQLite integers are signed 64-bit
+        return int.from_bytes(digest.digest(), "big", signed=True)
+
+    def unchanged(self, key: str, fingerprint: int) -> bool:
+        """
+        Return True if `key` was last sent with this fingerprint.
+
+        Otherwise the fingerprint is staged for the next `commit()` and the
+        record counts as sent.
+        """
+        previous = self._staged.get(key)
+        if previous is None and self._spilled:
+            row = self._connection.execute(
+                "SELECT fingerprint FROM temp.staged WHERE key = ?", (key,)
+            ).fetchone()
+            previous = row[0] if row else None
+        if previous is None:
+            row = self._connection.execute(
+                "SELECT fingerprint FROM fingerprints WHERE scope = ? AND key = ?",
+                (self.scope, key),
+            ).fetchone()
+            previous = row[0] if row else None
+        if previous == fingerprint:
+            self.skipped += 1
+            return True
+        self._staged[key] = fingerprint
+        self.sent += 1
+        if len(self._staged) >= STAGE_CHUNK_SIZE:
+            self._spill()
+        return False
+
+    def commit(self) -> None:
+        """Persist staged fingerprints; call only once their records are acknowledged."""
+        if not self._staged and not self._spilled:
+            return
+        self._spill()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO fingerprints (scope, key, fingerprint)"
+            " SELECT ?, key, fingerprint FROM temp.staged",
+            (self.scope,),
+        )
+        self._connection.execute("DELETE FROM temp.staged")
+        self._connection.commit()
+        self._spilled = 0
+
+    def _spill(self) -> None:
+        """Move the fingerprints staged in memory to the temporary staged table."""
+        if not self._staged:
+            return
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO temp.staged (key, fingerprint) VALUES (?, ?)",
+            self._staged.items(),
+        )
+        self._spilled += len(self._staged)
+        self._staged.clear()
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Drop the fingerprints of records deleted from Dust, so they are sent again if they reappear."""
+        self._connection.executemany(
+            "DELETE FROM fingerprints WHERE scope = ? AND key = ?",
+            ((self.scope, key) for key in keys),
+        )
+        self._connection.commit()
+
+    def load_table_ids(self) -> dict[str, str]:
+        """Return the table title -> table id mapping saved by previous syncs."""
+        rows = self._connection.execute(
+            "SELECT title, table_id FROM table_ids WHERE scope = ?", (self.scope,)
+        )
+        return dict(rows.fetchall())
+
+    def save_table_ids(self, table_ids: Mapping[str, str]) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO table_ids (scope, title, table_id) VALUES (?, ?, ?)",
+            ((self.scope, title, table_id) for title, table_id in table_ids.items()),
+        )
+        self._connection.commit()
+
+    def clear_table_ids(self) -> None:
+        """Forget saved table ids, e.g. after a saved table turned out to be deleted."""
+        self._connection.execute("DELETE FROM table_ids WHERE scope = ?", (self.scope,))
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def summary(self) -> str:
+        total = self.skipped + self.sent
+        hit_rate = (self.skipped / total * 100) if total else 0.0
+        return (
+            f"Fingerprint cache: skipped {self.skipped} unchanged record(s), "
+            f"sent {self.sent} (hit rate {hit_rate:.1f}%)"
+        )
@@ -1,28 +1,114 @@
+import hashlib
 import json
 import logging
-from typing import Any, Callable, List, Mapping, Optional
+import time
+from typing import Any, Callable, Iterator, List, Mapping, Optional
+from urllib.parse import quote
 
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
 from urllib3.util.retry import Retry
 
+from destination_dust.metrics import current_request
+from destination_dust.rate_limiter import RATE_LIMIT_RETRIES, AdaptiveRateLimiter
+
 logger = logging.getLogger("airbyte")
 
 RETRY_TOTAL = 3
 RETRY_BACKOFF_FACTOR = 1.0  # 1s, 2s, 4s
-RETRY_STATUS_FORCELIST = [429, 500, 502, 503, 504]
+# 429 responses are retried through the client's AdaptiveRateLimiter instead
+RETRY_STATUS_FORCELIST = [500, 502, 503, 504]
 
+# Seconds to wait for the response of a row upsert
+UPSERT_ROWS_TIMEOUT = 60
 
-class DustClient:
-    """HTTP client for the Dust document and table upsert APIs."""
+# Default number of pooled keep-alive connections per client
+DEFAULT_POOL_SIZE = 10
+
+# Page size used when listing tables
+LIST_TABLES_PAGE_SIZE = 100
+
+# Envelope and separator of the encoded rows of an upsert_rows body
+ROWS_PAYLOAD_PREFIX = b'{"rows":['
+ROWS_PAYLOAD_SUFFIX = b"]}"
+ROWS_PAYLOAD_SEPARATOR = b","
+
+# Page sizes used when listing documents and table rows (overwrite syncs)
+LIST_DOCUMENTS_PAGE_SIZE = 100
+LIST_ROWS_PAGE_SIZE = 1000
+
+
+class _TimeoutRaisingRetry(Retry):
+    """Retry that raises read timeouts at once instead of resending the request."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, ReadTimeoutError):
+            raise error.with_traceback(_stacktrace)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def content_row_id(row: Mapping[str, Any]) -> str:
+    """
+    Return a row_id derived from the content of a row: a 64-bit blake2b hash (16 hex
+    characters) of its JSON with sorted keys, stable across processes and syncs.
+    """
+    try:
+        encoded = orjson.dumps(row, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which orjson rejects
+        encoded = json.dumps(
+            row, default=str, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def encode_row(row_id: str, row: Mapping[str, Any]) -> bytes:
+    """Encode a row as it appears in an upsert_rows body: `{"row_id":...,"value":{...}}`."""
+    formatted = {"row_id": row_id, "value": row}
+    try:
+        return orjson.dumps(formatted, default=str)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which orjson rejects
+        return json.dumps(formatted, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def rows_payload(encoded_rows: List[bytes]) -> bytes:
+    """Join rows encoded by encode_row into an upsert_rows body: `{"rows":[...]}`."""
+    return ROWS_PAYLOAD_PREFIX + ROWS_PAYLOAD_SEPARATOR.join(encoded_rows) + ROWS_PAYLOAD_SUFFIX
+
+
+class TableNotFoundError(RuntimeError):
+    """Raised when Dust answers 404 for a table id, e.g. because the table was deleted."""
+
+
+class PayloadTooLargeError(RuntimeError):
+    """Raised when Dust answers 413 to a row upsert; the rows can be sent in smaller batches."""
+
+
+class DustClientBase:
+    """
+    Request building and response handling shared by DustClient and AsyncDustClient.
 
-    def __init__(self, config: Mapping[str, Any], log_callback=None):
+    Subclasses only perform the HTTP I/O: each API call builds its request with a
+    `_prepare_*` helper and checks the response with the matching `_handle_*` helper.
+    """
+
+    def __init__(
+        self,
+        config: Mapping[str, Any],
+        log_callback=None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
         """
         Initialize Dust client.
-        
+
         Args:
             config: Configuration dictionary
             log_callback: Optional callback function(message: str, level: str) for logging
+            rate_limiter: Limiter shared with other clients of the same sync; by default
+                a new one capped at config["max_requests_per_second"], if set
         """
         self.api_key = config["api_key"]
         self.workspace_id = config["workspace_id"]
@@ -30,6 +116,9 @@ class DustClient:
         self.data_source_id = config["data_source_id"]
         self.base_url = config.get("base_url", "https://dust.tt").rstrip("/")
         self.log_callback = log_callback
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            config.get("max_requests_per_second")
+        )
 
         self._documents_base = (
             f"{self.base_url}/api/v1/w/{self.workspace_id}"
@@ -46,37 +135,29 @@ class DustClient:
             f"/tables"
         )
 
-        self._session = requests.Session()
-        retry = Retry(
-            total=RETRY_TOTAL,
-            backoff_factor=RETRY_BACKOFF_FACTOR,
-            status_forcelist=RETRY_STATUS_FORCELIST,
-            allowed_methods=["GET", "POST"],
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        self._session.mount("https://", adapter)
-        self._session.mount("http://", adapter)
-        self._session.headers.update(
-            {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            }
-        )
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
-    def check_connection(self, data_format: str = "documents") -> None:
+    def _log_enabled(self, level: str) -> bool:
         """
-        Verify credentials and data source existence.
+        Return True if log_callback accepts messages of this level.
 
-        For documents: GETs /documents?limit=1
-        For tables: GETs /tables (list tables)
+        Checked before a message is formatted. Callbacks may expose an
+        `is_enabled(level)` method (see LogBuffer); plain callables accept every level.
         """
+        if self.log_callback is None:
+            return False
+        is_enabled = getattr(self.log_callback, "is_enabled", None)
+        return is_enabled is None or is_enabled(level)
+
+    def _check_connection_url(self, data_format: str) -> str:
         if data_format == "tables":
-            url = self._tables_base
-            response = self._session.get(url, timeout=30)
-        else:
-            url = f"{self._documents_base}?limit=1"
-            response = self._session.get(url, timeout=30)
+            return self._tables_base
+        return f"{self._documents_base}?limit=1"
 
+    def _handle_check_connection(self, response: Any) -> None:
         if response.status_code == 401:
             raise ConnectionError("Authentication failed. Check your API key.")
         if response.status_code == 404:
@@ -84,7 +165,7 @@ class DustClient:
                 f"Data source not found. Verify workspace_id='{self.workspace_id}', "
                 f"space_id='{self.space_id}', data_source_id='{self.data_source_id}'."
             )
-        if not response.ok:
+        if response.status_code >= 400:
             raise ConnectionError(
                 f"Dust API returned status {response.status_code}: "
                 f"{response.text[:500]}"
@@ -92,41 +173,30 @@ class DustClient:
 
         logger.info("Dust connection check succeeded.")
 
-    def list_tables(self) -> List[dict[str, Any]]:
-        """
-        List all tables in the configured Dust data source.
-
-        Returns:
-            List of table dictionaries containing table metadata (id, name, title, etc.)
-
-        Raises RuntimeError on API errors after retries are exhausted.
-        """
-        url = self._tables_base
+    def _prepare_list_tables(self, offset: int = 0) -> str:
+        url = f"{self._tables_base}?limit={LIST_TABLES_PAGE_SIZE}&offset={offset}"
 
         # Log request
         request_log = "Listing tables"
         logger.debug(request_log)
-        if self.log_callback:
+        if self._log_enabled("DEBUG"):
             self.log_callback(f"Request: GET {url}", "DEBUG")
 
-        response = self._session.get(url, timeout=30)
+        return url
 
+    def _handle_list_tables(self, response: Any) -> List[dict[str, Any]]:
         # Log response
         response_log = f"Listed tables successfully (status: {response.status_code})"
         logger.debug(response_log)
-        if self.log_callback:
+        if self._log_enabled("DEBUG"):
             self.log_callback(
                 f"Response: {response.status_code}\nBody: {response.text[:500]}",
                 "DEBUG"
             )
 
-        if response.status_code == 429:
-            raise RuntimeError(
-                f"Rate limited by Dust API after {RETRY_TOTAL} retries. "
-                "Consider reducing sync frequency."
-            )
+        self._raise_if_rate_limited(response)
 
-        if not response.ok:
+        if response.status_code >= 400:
             raise RuntimeError(
                 f"Failed to list tables: "
                 f"status={response.status_code}, body={response.text[:500]}"
@@ -142,17 +212,39 @@ class DustClient:
             logger.warning(f"Unexpected list_tables response format: {result}")
             return []
 
-    def find_table_by_title(self, title: str) -> Optional[str]:
+    @staticmethod
+    def _collect_tables_page(
+        tables: List[dict[str, Any]], seen_ids: set[str], page: List[dict[str, Any]]
+    ) -> bool:
         """
-        Find a table ID by its title.
+        Append the tables of `page` not seen yet; return True if another page should be fetched.
 
-        Args:
-            title: The table title to search for
-
-        Returns:
-            The table ID if found, None otherwise
+        Paging stops on a short page, or on a page with no new tables in case the API
+        ignores `offset` and returns the full list every time.
         """
-        tables = self.list_tables()
+        new_tables = 0
+        for table in page:
+            table_id = table.get("id") or table.get("table_id") or json.dumps(table, sort_keys=True)
+            if table_id in seen_ids:
+                continue
+            seen_ids.add(table_id)
+            tables.append(table)
+            new_tables += 1
+        return len(page) >= LIST_TABLES_PAGE_SIZE and new_tables > 0
+
+    @staticmethod
+    def _index_tables(tables: List[dict[str, Any]]) -> dict[str, str]:
+        """Map each table title to its table ID (first match wins, like find_table_by_title)."""
+        index: dict[str, str] = {}
+        for table in tables:
+            # Check both 'title' and 'name' fields (API might use either)
+            table_title = table.get("title") or table.get("name", "")
+            table_id = table.get("id") or table.get("table_id")
+            if table_id and table_title not in index:
+                index[table_title] = table_id
+        return index
+
+    def _match_table_title(self, tables: List[dict[str, Any]], title: str) -> Optional[str]:
         for table in tables:
             # Check both 'title' and 'name' fields (API might use either)
             table_title = table.get("title") or table.get("name", "")
@@ -160,7 +252,7 @@ class DustClient:
                 table_id = table.get("id") or table.get("table_id")
                 if table_id:
                     logger.info(f"Found table '{title}' with ID: {table_id}")
-                    if self.log_callback:
+                    if self._log_enabled("INFO"):
                         self.log_callback(
                             f"Found table '{title}' with ID: {table_id}",
                             "INFO"
@@ -169,20 +261,15 @@ class DustClient:
         logger.debug(f"Table with title '{title}' not found")
         return None
 
-    def upsert_document(
+    def _prepare_upsert_document(
         self,
         document_id: str,
         title: str,
         text: str,
-        source_url: str = "",
-        tags: Optional[List[str]] = None,
-        timestamp: Optional[int] = None,
-    ) -> dict:
-        """
-        Upsert a document into the configured Dust data source.
-
-        Raises RuntimeError on API errors after retries are exhausted.
-        """
+        source_url: str,
+        tags: Optional[List[str]],
+        timestamp: Optional[int],
+    ) -> tuple[str, dict[str, Any]]:
         url = f"{self._documents_base}/{document_id}"
         payload: dict[str, Any] = {
             "title": title,
@@ -199,24 +286,21 @@ class DustClient:
         # Log request
         request_log = f"Upserting document '{document_id}' (title: {title})"
         logger.debug(request_log)
-        if self.log_callback:
+        if self._log_enabled("DEBUG"):
             self.log_callback(f"Request: POST {url}\nDocument ID: {document_id}\nTitle: {title}", "DEBUG")
 
-        response = self._session.post(url, json=payload, timeout=60)
+        return url, payload
 
+    def _handle_upsert_document(self, document_id: str, response: Any) -> dict:
         # Log response
         response_log = f"Document '{document_id}' upserted successfully (status: {response.status_code})"
         logger.debug(response_log)
-        if self.log_callback:
+        if self._log_enabled("DEBUG"):
             self.log_callback(f"Response: {response.status_code}\nBody: {response.text[:200]}", "DEBUG")
 
-        if response.status_code == 429:
-            raise RuntimeError(
-                f"Rate limited by Dust API after {RETRY_TOTAL} retries. "
-                "Consider reducing sync frequency."
-            )
+        self._raise_if_rate_limited(response)
 
-        if not response.ok:
+        if response.status_code >= 400:
             raise RuntimeError(
                 f"Failed to upsert document '{document_id}': "
                 f"status={response.status_code}, body={response.text[:500]}"
@@ -224,27 +308,13 @@ class DustClient:
 
         return response.json()
 
-    def upsert_table(
+    def _prepare_upsert_table(
         self,
         name: str,
-        title: str = "",
-        description: str = "",
-        table_id: Optional[str] = None,
-    ) -> dict:
-        """
-        Create or update a table definition in the configured Dust data source.
-
-        Args:
-            name: Human-readable table name
-            title: Table title (optional)
-            description: Optional table description
-            table_id: Optional unique identifier for the table. If not provided, Dust will generate one.
-
-        Returns:
-            API response containing table metadata including table ID
-
-        Raises RuntimeError on API errors after retries are exhausted.
-        """
+        title: str,
+        description: str,
+        table_id: Optional[str],
+    ) -> tuple[str, dict[str, Any]]:
         url = self._tables_base
         # Only include fields specified in API docs: id, name, title, description
         payload: dict[str, Any] = {
@@ -262,38 +332,39 @@ class DustClient:
         # Log request
         request_log = f"Creating/updating table '{name}' (id: {table_id or 'auto-generated'})"
         logger.info(request_log)
-        if self.log_callback:
+        if self._log_enabled("INFO"):
             self.log_callback(request_log, "INFO")
-        
+
         logger.debug(f"upsert_table: POST {url}")
-        logger.debug(f"upsert_table: payload={payload}")
-        if self.log_callback:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"upsert_table: payload={payload}")
+        if self._log_enabled("DEBUG"):
             self.log_callback(f"Request: POST {url}\nPayload: {json.dumps(payload, indent=2)}", "DEBUG")
 
-        response = self._session.post(url, json=payload, timeout=60)
+        return url, payload
 
+    def _handle_upsert_table(
+        self, name: str, table_id: Optional[str], response: Any
+    ) -> dict:
         # Log response
         response_log = f"Table '{name}' created/updated successfully (status: {response.status_code})"
         logger.info(response_log)
-        if self.log_callback:
+        if self._log_enabled("INFO"):
             self.log_callback(response_log, "INFO")
-        
-        logger.debug(f"upsert_table: status_code={response.status_code}")
-        logger.debug(f"upsert_table: response_headers={dict(response.headers)}")
-        logger.debug(f"upsert_table: response_body={response.text}")
-        if self.log_callback:
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"upsert_table: status_code={response.status_code}")
+            logger.debug(f"upsert_table: response_headers={dict(response.headers)}")
+            logger.debug(f"upsert_table: response_body={response.text}")
+        if self._log_enabled("DEBUG"):
             self.log_callback(
-                f"Response: {response.status_code}\nBody: {response.text[:500]}", 
+                f"Response: {response.status_code}\nBody: {response.text[:500]}",
                 "DEBUG"
             )
 
-        if response.status_code == 429:
-            raise RuntimeError(
-                f"Rate limited by Dust API after {RETRY_TOTAL} retries. "
-                "Consider reducing sync frequency."
-            )
+        self._raise_if_rate_limited(response)
 
-        if not response.ok:
+        if response.status_code >= 400:
             error_msg = f"Failed to upsert table"
             if table_id:
                 error_msg += f" '{table_id}'"
@@ -302,90 +373,514 @@ class DustClient:
 
         return response.json()
 
-    def upsert_rows(
-        self,
-        table_id: str,
-        rows: List[dict[str, Any]],
-    ) -> dict:
-        """
-        Upsert rows into an existing table.
-
-        Args:
-            table_id: The table ID to upsert rows into
-            rows: List of row objects (dicts with column names as keys)
-
-        Returns:
-            API response
-
-        Raises RuntimeError on API errors after retries are exhausted.
-        """
+    @staticmethod
+    def _default_row_id(row: Mapping[str, Any]) -> str:
+        """Row_id of a row upserted without one: its 'id' field if set, else a hash of its content."""
+        row_id = row.get("id")
+        if row_id is None or row_id == "":
+            return content_row_id(row)
+        return str(row_id)
+
+    @staticmethod
+    def _encode_rows(rows: List[dict[str, Any]], row_ids: Optional[List[str]] = None) -> List[bytes]:
+        # Dust API rows need row_id and value fields
+        if row_ids is None:
+            row_ids = [DustClientBase._default_row_id(row) for row in rows]
+        return [encode_row(row_id, row) for row_id, row in zip(row_ids, rows)]
+
+    def _prepare_upsert_rows(self, table_id: str, encoded_rows: List[bytes]) -> tuple[str, bytes]:
         url = f"{self._tables_base}/{table_id}/rows"
-        
-        # Format rows for Dust API: each row needs row_id and value fields
-        formatted_rows = []
-        for row in rows:
-            # Use 'id' field as row_id if present, otherwise generate one
-            row_id = str(row.get("id", ""))
-            if not row_id:
-                # Generate row_id from first non-empty field value
-                for key, value in row.items():
-                    if value is not None and str(value).strip():
-                        row_id = str(value)
-                        break
-                if not row_id:
-                    row_id = str(hash(str(row)))[:16]  # Fallback to hash
-            
-            formatted_rows.append({
-                "row_id": row_id,
-                "value": row
-            })
-        
-        payload = {"rows": formatted_rows}
+        body = rows_payload(encoded_rows)
 
         # Log request
-        request_log = f"Upserting {len(formatted_rows)} rows into table '{table_id}'"
+        request_log = f"Upserting {len(encoded_rows)} rows into table '{table_id}'"
         logger.info(request_log)
-        if self.log_callback:
+        if self._log_enabled("INFO"):
             self.log_callback(request_log, "INFO")
-        
-        logger.debug(f"upsert_rows: POST {url}")
-        logger.debug(f"upsert_rows: table_id={table_id}, row_count={len(formatted_rows)}")
-        logger.debug(f"upsert_rows: payload={payload}")
-        if self.log_callback:
+
+        # Decoding the payload is expensive, so only do it when DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"upsert_rows: POST {url}")
+            logger.debug(f"upsert_rows: table_id={table_id}, row_count={len(encoded_rows)}")
+            logger.debug(f"upsert_rows: payload={body.decode('utf-8', errors='replace')}")
+        if self._log_enabled("DEBUG"):
             # Show sample of first row for debugging
-            sample_payload = {"rows": formatted_rows[:1]} if formatted_rows else {"rows": []}
+            sample = encoded_rows[0].decode("utf-8", errors="replace") if encoded_rows else ""
             self.log_callback(
-                f"Request: POST {url}\nRow count: {len(formatted_rows)}\nPayload sample: {json.dumps(sample_payload, indent=2)[:500]}",
+                f"Request: POST {url}\nRow count: {len(encoded_rows)}\nPayload sample: {sample[:500]}",
                 "DEBUG"
             )
 
-        response = self._session.post(url, json=payload, timeout=60)
+        return url, body
 
+    def _handle_upsert_rows(self, table_id: str, row_count: int, response: Any) -> dict:
         # Log response
-        response_log = f"Successfully upserted {len(formatted_rows)} rows into table '{table_id}' (status: {response.status_code})"
+        response_log = f"Successfully upserted {row_count} rows into table '{table_id}' (status: {response.status_code})"
         logger.info(response_log)
-        if self.log_callback:
+        if self._log_enabled("INFO"):
             self.log_callback(response_log, "INFO")
-        
-        logger.debug(f"upsert_rows: status_code={response.status_code}")
-        logger.debug(f"upsert_rows: response_headers={dict(response.headers)}")
-        logger.debug(f"upsert_rows: response_body={response.text}")
-        if self.log_callback:
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"upsert_rows: status_code={response.status_code}")
+            logger.debug(f"upsert_rows: response_headers={dict(response.headers)}")
+            logger.debug(f"upsert_rows: response_body={response.text}")
+        if self._log_enabled("DEBUG"):
             self.log_callback(
                 f"Response: {response.status_code}\nBody: {response.text[:500]}",
                 "DEBUG"
             )
 
-        if response.status_code == 429:
-            raise RuntimeError(
-                f"Rate limited by Dust API after {RETRY_TOTAL} retries. "
-                "Consider reducing sync frequency."
+        self._raise_if_rate_limited(response)
+
+        if response.status_code == 404:
+            raise TableNotFoundError(
+                f"Failed to upsert rows into table '{table_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+        if response.status_code == 413:
+            raise PayloadTooLargeError(
+                f"Failed to upsert {row_count} rows into table '{table_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
             )
 
-        if not response.ok:
+        if response.status_code >= 400:
             raise RuntimeError(
                 f"Failed to upsert rows into table '{table_id}': "
                 f"status={response.status_code}, body={response.text[:500]}"
             )
 
         return response.json()
+
+    def _prepare_list_documents(self, offset: int = 0) -> str:
+        url = f"{self._documents_base}?limit={LIST_DOCUMENTS_PAGE_SIZE}&offset={offset}"
+        logger.debug(f"Listing documents (offset: {offset})")
+        if self._log_enabled("DEBUG"):
+            self.log_callback(f"Request: GET {url}", "DEBUG")
+        return url
+
+    def _handle_list_documents(self, response: Any) -> List[dict[str, Any]]:
+        self._raise_if_rate_limited(response)
+
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Failed to list documents: "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+        result = response.json()
+        if isinstance(result, dict):
+            return result.get("documents") or []
+        return result if isinstance(result, list) else []
+
+    def _prepare_list_rows(self, table_id: str, offset: int = 0) -> str:
+        url = f"{self._tables_base}/{table_id}/rows?limit={LIST_ROWS_PAGE_SIZE}&offset={offset}"
+        logger.debug(f"Listing rows of table '{table_id}' (offset: {offset})")
+        if self._log_enabled("DEBUG"):
+            self.log_callback(f"Request: GET {url}", "DEBUG")
+        return url
+
+    def _handle_list_rows(self, table_id: str, response: Any) -> List[dict[str, Any]]:
+        self._raise_if_rate_limited(response)
+
+        if response.status_code == 404:
+            raise TableNotFoundError(
+                f"Failed to list rows of table '{table_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Failed to list rows of table '{table_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+        result = response.json()
+        if isinstance(result, dict):
+            return result.get("rows") or []
+        return result if isinstance(result, list) else []
+
+    def _prepare_delete_document(self, document_id: str) -> str:
+        url = f"{self._documents_base}/{document_id}"
+        logger.debug(f"Deleting document '{document_id}'")
+        if self._log_enabled("DEBUG"):
+            self.log_callback(f"Request: DELETE {url}", "DEBUG")
+        return url
+
+    def _handle_delete_document(self, document_id: str, response: Any) -> None:
+        self._raise_if_rate_limited(response)
+
+        # 404: already deleted
+        if response.status_code >= 400 and response.status_code != 404:
+            raise RuntimeError(
+                f"Failed to delete document '{document_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+    def _prepare_delete_row(self, table_id: str, row_id: str) -> str:
+        url = f"{self._tables_base}/{table_id}/rows/{quote(row_id, safe='')}"
+        logger.debug(f"Deleting row '{row_id}' of table '{table_id}'")
+        if self._log_enabled("DEBUG"):
+            self.log_callback(f"Request: DELETE {url}", "DEBUG")
+        return url
+
+    def _handle_delete_row(self, table_id: str, row_id: str, response: Any) -> None:
+        self._raise_if_rate_limited(response)
+
+        # 404: already deleted
+        if response.status_code >= 400 and response.status_code != 404:
+            raise RuntimeError(
+                f"Failed to delete row '{row_id}' of table '{table_id}': "
+                f"status={response.status_code}, body={response.text[:500]}"
+            )
+
+    @staticmethod
+    def _record_response(response: Any) -> None:
+        """Count a response in the metrics of the instrumented upsert making it, if any."""
+        stats = current_request()
+        if stats is not None:
+            stats.on_response(response)
+
+    @staticmethod
+    def _record_call(
+        start: float, response: Any, operation: str, attributes: Optional[dict[str, Any]]
+    ) -> None:
+        """Count a completed API call started at `start` (time.monotonic()), traced as `operation`."""
+        stats = current_request()
+        if stats is not None:
+            stats.on_call(time.monotonic() - start, operation, attributes, response.status_code)
+
+    def _rate_limit_retry_delay(self, attempt: int, response: Any) -> Optional[float]:
+        """
+        Record a response with the rate limiter. Return how long to wait before
+        retrying it if it was rate limited and attempts remain, None otherwise.
+        """
+        self.rate_limiter.on_response(response.status_code, response.headers)
+        if response.status_code != 429 or attempt + 1 >= RATE_LIMIT_RETRIES:
+            return None
+        delay = self.rate_limiter.backoff_delay(attempt, response.headers)
+        warning = (
+            f"Rate limited by Dust API; retrying in {delay:.1f}s "
+            f"(request rate lowered to {self.rate_limiter.rate:.1f}/s)"
+        )
+        logger.warning(warning)
+        if self._log_enabled("WARN"):
+            self.log_callback(warning, "WARN")
+        return delay
+
+    @staticmethod
+    def _raise_if_rate_limited(response: Any) -> None:
+        if response.status_code == 429:
+            raise RuntimeError(
+                f"Rate limited by Dust API after {RATE_LIMIT_RETRIES} attempts. "
+                "Consider lowering max_concurrency or max_requests_per_second."
+            )
+
+
+class DustClient(DustClientBase):
+    """HTTP client for the Dust document and table upsert APIs."""
+
+    def __init__(
+        self,
+        config: Mapping[str, Any],
+        log_callback=None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        """
+        Initialize Dust client.
+
+        Args:
+            config: Configuration dictionary
+            log_callback: Optional callback function(message: str, level: str) for logging
+            pool_size: Number of keep-alive connections kept per host (set it to at
+                least the number of threads sharing this client)
+            rate_limiter: Limiter shared with other clients of the same sync
+        """
+        super().__init__(config, log_callback=log_callback, rate_limiter=rate_limiter)
+
+        self._session = self._create_session(Retry, pool_size)
+        # For requests whose caller handles read timeouts itself (e.g. by sending a
+        # smaller batch), rather than have urllib3 resend them and raise ConnectionError
+        self._timeout_raising_session = self._create_session(_TimeoutRaisingRetry, pool_size)
+
+    def _create_session(self, retry_class: type[Retry], pool_size: int) -> requests.Session:
+        session = requests.Session()
+        retry = retry_class(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_FORCELIST,
+            allowed_methods=["GET", "POST", "DELETE"],
+            # 429s (and their Retry-After) are retried by _send, through the rate limiter;
+            # urllib3 would otherwise retry any 429, 413 or 503 carrying Retry-After itself
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self._headers)
+        return session
+
+    def _send(
+        self,
+        send: Callable[..., requests.Response],
+        url: str,
+        operation: str = "request",
+        attributes: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Send a request through the rate limiter, retrying it while it is rate limited.
+
+        `operation` and `attributes` name and describe the call in the metrics and
+        trace of the instrumented upsert making it, if any.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = send(url, **kwargs)
+            self._record_response(response)
+            delay = self._rate_limit_retry_delay(attempt, response)
+            if delay is None:
+                self._record_call(start, response, operation, attributes)
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    def check_connection(self, data_format: str = "documents") -> None:
+        """
+        Verify credentials and data source existence.
+
+        For documents: GETs /documents?limit=1
+        For tables: GETs /tables (list tables)
+        """
+        url = self._check_connection_url(data_format)
+        response = self._send(self._session.get, url, timeout=30)
+        self._handle_check_connection(response)
+
+    def list_tables(self) -> List[dict[str, Any]]:
+        """
+        List all tables in the configured Dust data source, following pagination.
+
+        Returns:
+            List of table dictionaries containing table metadata (id, name, title, etc.)
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        tables: List[dict[str, Any]] = []
+        seen_ids: set[str] = set()
+        while True:
+            url = self._prepare_list_tables(offset=len(tables))
+            response = self._send(self._session.get, url, timeout=30)
+            page = self._handle_list_tables(response)
+            if not self._collect_tables_page(tables, seen_ids, page):
+                return tables
+
+    def build_table_index(self) -> dict[str, str]:
+        """
+        List every table once and map table titles to table IDs.
+
+        Use this instead of repeated find_table_by_title calls when resolving many tables.
+        """
+        return self._index_tables(self.list_tables())
+
+    def find_table_by_title(self, title: str) -> Optional[str]:
+        """
+        Find a table ID by its title.
+
+        Args:
+            title: The table title to search for
+
+        Returns:
+            The table ID if found, None otherwise
+        """
+        return self._match_table_title(self.list_tables(), title)
+
+    def upsert_document(
+        self,
+        document_id: str,
+        title: str,
+        text: str,
+        source_url: str = "",
+        tags: Optional[List[str]] = None,
+        timestamp: Optional[int] = None,
+    ) -> dict:
+        """
+        Upsert a document into the configured Dust data source.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, payload = self._prepare_upsert_document(
+            document_id, title, text, source_url, tags, timestamp
+        )
+        response = self._send(
+            self._session.post,
+            url,
+            operation="upsert_document",
+            attributes={"dust.document_id": document_id},
+            json=payload,
+            timeout=60,
+        )
+        return self._handle_upsert_document(document_id, response)
+
+    def upsert_table(
+        self,
+        name: str,
+        title: str = "",
+        description: str = "",
+        table_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Create or update a table definition in the configured Dust data source.
+
+        Args:
+            name: Human-readable table name
+            title: Table title (optional)
+            description: Optional table description
+            table_id: Optional unique identifier for the table. If not provided, Dust will generate one.
+
+        Returns:
+            API response containing table metadata including table ID
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, payload = self._prepare_upsert_table(name, title, description, table_id)
+        response = self._send(
+            self._session.post,
+            url,
+            operation="upsert_table",
+            attributes={"dust.table_name": name, "dust.table_id": table_id},
+            json=payload,
+            timeout=60,
+        )
+        return self._handle_upsert_table(name, table_id, response)
+
+    def upsert_rows(
+        self,
+        table_id: str,
+        rows: List[dict[str, Any]],
+        row_ids: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Upsert rows into an existing table.
+
+        Args:
+            table_id: The table ID to upsert rows into
+            rows: List of row objects (dicts with column names as keys)
+            row_ids: Optional row_id of each row, e.g. built from the stream's primary key;
+                by default a row's 'id' field, or a stable hash of its content
+
+        Returns:
+            API response
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        return self.upsert_encoded_rows(table_id, self._encode_rows(rows, row_ids))
+
+    def upsert_encoded_rows(
+        self, table_id: str, encoded_rows: List[bytes], retry_timeouts: bool = True
+    ) -> dict:
+        """
+        Upsert rows already encoded by encode_row, sent as one body without re-encoding.
+
+        With `retry_timeouts=False`, a request timing out raises requests.Timeout
+        at once instead of being resent like other failed requests.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url, body = self._prepare_upsert_rows(table_id, encoded_rows)
+        session = self._session if retry_timeouts else self._timeout_raising_session
+        response = self._send(
+            session.post,
+            url,
+            operation="upsert_rows",
+            attributes={"dust.table_id": table_id, "dust.row_count": len(encoded_rows)},
+            data=body,
+            timeout=UPSERT_ROWS_TIMEOUT,
+        )
+        return self._handle_upsert_rows(table_id, len(encoded_rows), response)
+
+    def iter_documents(self) -> Iterator[dict[str, Any]]:
+        """
+        Yield every document of the configured data source, following pagination.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        offset = 0
+        previous_page = None
+        while True:
+            url = self._prepare_list_documents(offset)
+            response = self._send(self._session.get, url, operation="list_documents", timeout=30)
+            page = self._handle_list_documents(response)
+            # Like list_tables, stop if the API ignores `offset` and repeats the page
+            if page == previous_page:
+                return
+            yield from page
+            if len(page) < LIST_DOCUMENTS_PAGE_SIZE:
+                return
+            offset += len(page)
+            previous_page = page
+
+    def iter_row_ids(self, table_id: str) -> Iterator[str]:
+        """
+        Yield the row_id of every row of a table, following pagination.
+
+        Raises TableNotFoundError if the table does not exist, RuntimeError on
+        other API errors after retries are exhausted.
+        """
+        offset = 0
+        previous_page = None
+        while True:
+            url = self._prepare_list_rows(table_id, offset)
+            response = self._send(
+                self._session.get,
+                url,
+                operation="list_rows",
+                attributes={"dust.table_id": table_id},
+                timeout=30,
+            )
+            page = self._handle_list_rows(table_id, response)
+            if page == previous_page:
+                return
+            for row in page:
+                if row.get("row_id") is not None:
+                    yield str(row["row_id"])
+            if len(page) < LIST_ROWS_PAGE_SIZE:
+                return
+            offset += len(page)
+            previous_page = page
+
+    def delete_document(self, document_id: str) -> None:
+        """
+        Delete a document from the configured data source; missing documents are ignored.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url = self._prepare_delete_document(document_id)
+        response = self._send(
+            self._session.delete,
+            url,
+            operation="delete_document",
+            attributes={"dust.document_id": document_id},
+            timeout=60,
+        )
+        self._handle_delete_document(document_id, response)
+
+    def delete_row(self, table_id: str, row_id: str) -> None:
+        """
+        Delete a row from a table; missing rows are ignored.
+
+        Raises RuntimeError on API errors after retries are exhausted.
+        """
+        url = self._prepare_delete_row(table_id, row_id)
+        response = self._send(
+            self._session.delete,
+            url,
+            operation="delete_row",
+            attributes={"dust.table_id": table_id, "dust.row_id": row_id},
+            timeout=60,
+        )
+        self._handle_delete_row(table_id, row_id, response)
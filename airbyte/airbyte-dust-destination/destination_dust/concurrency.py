@@ -0,0 +1,112 @@
+import threading
+from typing import Callable, Optional
+
+from destination_dust.rate_limiter import AdaptiveRateLimiter
+
+# Concurrency the controller starts from (capped by max_concurrency)
+DEFAULT_INITIAL_CONCURRENCY = 4
+
+# Requests per adjustment window, at least; a window is never shorter than the limit
+MIN_WINDOW_SAMPLES = 10
+
+# Average latency above baseline * LATENCY_TOLERANCE counts as rising latency
+LATENCY_TOLERANCE = 1.5
+
+# Factor applied to the limit when a window saw failures, 429s or 5xx responses
+ERROR_BACKOFF_FACTOR = 0.5
+
+# Weight of a window's average latency when the baseline rises towards it
+BASELINE_RISE_WEIGHT = 0.05
+
+
+class ConcurrencyController:
+    """
+    Adaptive limit on the number of in-flight upload requests (AIMD with a latency gradient).
+
+    Latencies are collected over windows of at least `limit` requests. At the end
+    of each window the limit is:
+
+    - cut by ERROR_BACKOFF_FACTOR if a request failed or the shared rate limiter saw
+      a 429 or 5xx response during the window;
+    - scaled by baseline * LATENCY_TOLERANCE / average when the average latency rose
+      beyond the tolerance, the baseline being a slowly rising minimum of past windows;
+    - otherwise raised by one, up to `max_limit`.
+
+    Every change is reported through `log_callback(message, level)`. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        initial_limit: int = DEFAULT_INITIAL_CONCURRENCY,
+        min_limit: int = 1,
+        log_callback: Optional[Callable[[str, str], None]] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = max(min(initial_limit, max_limit), self.min_limit)
+        self.peak_limit = self.limit
+        self.changes = 0
+        self.log_callback = log_callback
+        self.rate_limiter = rate_limiter
+        self._baseline: Optional[float] = None
+        self._window_samples = 0
+        self._window_seconds = 0.0
+        self._window_failed = False
+        self._window_errors_seen = self._errors_seen()
+        self._lock = threading.Lock()
+
+    def on_sample(self, seconds: float, failed: bool = False) -> None:
+        """Record the latency of a completed request, adjusting the limit at the end of a window."""
+        with self._lock:
+            self._window_samples += 1
+            self._window_seconds += seconds
+            self._window_failed = self._window_failed or failed
+            if self._window_samples < max(self.limit, MIN_WINDOW_SAMPLES):
+                return
+            average = self._window_seconds / self._window_samples
+            errors_seen = self._errors_seen()
+            congested = self._window_failed or errors_seen > self._window_errors_seen
+            self._window_samples = 0
+            self._window_seconds = 0.0
+            self._window_failed = False
+            self._window_errors_seen = errors_seen
+
+            if self._baseline is None or average < self._baseline:
+                self._baseline = average
+            else:
+                self._baseline += (average - self._baseline) * BASELINE_RISE_WEIGHT
+
+            if congested:
+                new_limit = int(self.limit * ERROR_BACKOFF_FACTOR)
+                reason = "errors or rate limiting"
+            elif average > self._baseline * LATENCY_TOLERANCE:
+                new_limit = int(self.limit * self._baseline * LATENCY_TOLERANCE / average)
+                reason = "rising latency"
+            else:
+                new_limit = self.limit + 1
+                reason = "flat latency"
+            new_limit = max(self.min_limit, min(new_limit, self.max_limit))
+            if new_limit == self.limit:
+                return
+            message = (
+                f"Upload concurrency {self.limit} -> {new_limit} ({reason}: "
+                f"average {average:.3f}s, baseline {self._baseline:.3f}s)"
+            )
+            self.limit = new_limit
+            self.peak_limit = max(self.peak_limit, new_limit)
+            self.changes += 1
+        if self.log_callback is not None:
+            self.log_callback(message, "INFO")
+
+    def summary(self) -> str:
+        return (
+            f"Upload concurrency settled at {self.limit} "
+            f"(peak {self.peak_limit}, max {self.max_limit}, {self.changes} change(s))"
+        )
+
+    def _errors_seen(self) -> int:
+        if self.rate_limiter is None:
+            return 0
+        return self.rate_limiter.rate_limited + self.rate_limiter.server_errors
@@ -3,12 +3,18 @@ import io
 import json
 import logging
 import re
+import sys
+import time
 import uuid
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Mapping, Optional, cast
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, cast
 
 import orjson
+import requests
 from serpyco_rs import Serializer
 
 from airbyte_cdk.destinations import Destination
@@ -19,15 +25,46 @@ from airbyte_cdk.models import (
     AirbyteMessage,
     AirbyteMessageSerializer,
     AirbyteStateMessage,
+    AirbyteStateStats,
+    AirbyteStateType,
     ConfiguredAirbyteCatalog,
+    ConfiguredAirbyteCatalogSerializer,
     ConnectorSpecification,
+    DestinationSyncMode,
     Level,
     Status,
     Type,
 )
 from airbyte_cdk.models.airbyte_protocol_serializers import custom_type_resolver
 
-from destination_dust.client import DustClient
+from destination_dust.async_client import AsyncDustClient
+from destination_dust.batch_sizer import DEFAULT_TARGET_BATCH_SECONDS, AdaptiveBatchSizer
+from destination_dust.cache import LocalCache
+from destination_dust.client import (
+    ROWS_PAYLOAD_PREFIX,
+    ROWS_PAYLOAD_SEPARATOR,
+    ROWS_PAYLOAD_SUFFIX,
+    DustClient,
+    DustClientBase,
+    PayloadTooLargeError,
+    TableNotFoundError,
+    encode_row,
+    rows_payload,
+)
+from destination_dust.concurrency import ConcurrencyController
+from destination_dust.document_text import get_document_text_renderer
+from destination_dust.input_decoder import decode_record, iter_lines
+from destination_dust.log_buffer import LogBuffer
+from destination_dust.metrics import SyncMetrics
+from destination_dust.output_writer import MessageWriter
+from destination_dust.overwrite import WrittenIds
+from destination_dust.pipeline import read_ahead
+from destination_dust.profiling import SyncProfiler
+from destination_dust.rate_limiter import AdaptiveRateLimiter
+from destination_dust.flattener import RecordFlattener
+from destination_dust.row_buffer import TableRowBuffer
+from destination_dust.tracing import SyncTracer
+from destination_dust.uploader import AsyncOrderedUploader, OrderedUploader
 
 logger = logging.getLogger("airbyte")
 
@@ -37,11 +74,39 @@ DEFAULT_TABLE_BATCH_SIZE = 500
 # Max payload size for table row upserts (Dust API); cap at < 1MB before flushing
 MAX_TABLE_PAYLOAD_BYTES = 1024 * 1024 - 1
 
+# Default memory budget for rows buffered across all streams in tables mode
+# (configurable via buffer_max_bytes)
+DEFAULT_BUFFER_MAX_BYTES = 64 * 1024 * 1024
+
+# Default number of concurrent requests to Dust (configurable via max_concurrency)
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Flattener of the records of streams without a known schema
+_SCHEMALESS_FLATTENER = RecordFlattener()
+
+# Tag of the documents written for a stream, followed by the stream name
+STREAM_TAG_PREFIX = "airbyte:stream:"
+
+# Byte size of the `{"rows":[]}` envelope and of the separator between encoded rows
+_EMPTY_TABLE_PAYLOAD_BYTES = len(ROWS_PAYLOAD_PREFIX + ROWS_PAYLOAD_SUFFIX)
+_TABLE_ROW_SEPARATOR_BYTES = len(ROWS_PAYLOAD_SEPARATOR)
+
+
+@dataclass
+class PatchedAirbyteStateStats(AirbyteStateStats):
+    """Add per-stream sync metrics to the destinationStats of STATE messages."""
+
+    streams: Dict[str, Dict[str, Any]] | None = None
+    """Stream name -> totals since the start of the sync (see StreamMetrics.summary)."""
+
 
 @dataclass
 class PatchedAirbyteStateMessage(AirbyteStateMessage):
     """Declare the `id` attribute that platform sends (32-bit integer)."""
 
+    destinationStats: PatchedAirbyteStateStats | None = None
+    """Override class for destinationStats, to carry the per-stream metrics."""
+
     id: int | None = None
     """Injected by the platform as a 32-bit integer."""
 
@@ -108,6 +173,25 @@ def _to_patched_message(message: AirbyteMessage) -> PatchedAirbyteMessage:
     )
 
 
+def _serialize_message(message: AirbyteMessage) -> bytes:
+    """
+    Serialize an output message to JSON bytes, preserving state.id.
+
+    LOG messages are dumped directly with orjson. A message is only copied into a
+    PatchedAirbyteMessage when it carries a state.id the standard serializer would drop.
+    """
+    if message.type == Type.LOG and message.log is not None:
+        log: dict[str, Any] = {"level": message.log.level.value, "message": message.log.message}
+        if message.log.stack_trace is not None:
+            log["stack_trace"] = message.log.stack_trace
+        return orjson.dumps({"type": Type.LOG.value, "log": log})
+    if isinstance(message, PatchedAirbyteMessage):
+        return orjson.dumps(PatchedAirbyteMessageSerializer.dump(message))
+    if isinstance(message.state, PatchedAirbyteStateMessage) and message.state.id is not None:
+        return orjson.dumps(PatchedAirbyteMessageSerializer.dump(_to_patched_message(message)))
+    return orjson.dumps(AirbyteMessageSerializer.dump(message))
+
+
 def _create_log_message(level: Level, message: str) -> AirbyteMessage:
     """Create an AirbyteLogMessage wrapped in AirbyteMessage."""
     return AirbyteMessage(
@@ -121,31 +205,73 @@ class DestinationDust(Destination):
         return super().spec(*args, **kwargs)
 
     def run(self, args: List[str]) -> None:
-        """Override to use PatchedAirbyteMessageSerializer which preserves state.id."""
+        """
+        Override to preserve state.id (see _serialize_message) and to write output
+        through a buffered MessageWriter on sys.stdout.buffer.
+        """
         init_uncaught_exception_handler(logger)
         parsed_args = self.parse_args(args)
         output_messages = self.run_cmd(parsed_args)
-        for message in output_messages:
-            # Convert to PatchedAirbyteMessage for serialization
-            patched = _to_patched_message(message)
-            print(
-                orjson.dumps(
-                    PatchedAirbyteMessageSerializer.dump(patched)
-                ).decode()
-            )
+        with MessageWriter(
+            sys.stdout.buffer, _serialize_message, text_stream=sys.stdout
+        ) as writer:
+            for message in output_messages:
+                writer.write(message)
+
+    def _run_write(
+        self,
+        config: Mapping[str, Any],
+        configured_catalog_path: str,
+        input_stream: io.TextIOWrapper,
+    ) -> Iterable[AirbyteMessage]:
+        """Override to share the sync's metrics between input parsing and write()."""
+        catalog = ConfiguredAirbyteCatalogSerializer.load(
+            orjson.loads(open(configured_catalog_path).read())
+        )
+        metrics = self._create_metrics(config)
+        input_messages = self._parse_input_stream(input_stream, metrics)
+        logger.info("Begin writing to the destination...")
+        yield from self.write(
+            config=config, configured_catalog=catalog, input_messages=input_messages, metrics=metrics
+        )
+        logger.info("Writing complete.")
 
-    def _parse_input_stream(self, input_stream: io.TextIOWrapper) -> Iterable[AirbyteMessage]:
+    def _parse_input_stream(
+        self, input_stream: io.TextIOWrapper, metrics: Optional[SyncMetrics] = None
+    ) -> Iterable[AirbyteMessage]:
         """Reads from stdin, converting to Airbyte messages.
         
-        Uses PatchedAirbyteMessageSerializer to preserve the platform-injected state.id.
+        The underlying binary stream is read in large blocks and split into lines
+        without decoding them to str. RECORD messages become lightweight
+        RecordMessage objects; other messages go through
+        PatchedAirbyteMessageSerializer to preserve the platform-injected state.id.
+        With `metrics`, the time spent parsing records is counted per stream.
         """
-        for line in input_stream:
+        binary_stream = getattr(input_stream, "buffer", None)
+        lines = iter_lines(binary_stream) if binary_stream is not None else input_stream
+        for line in lines:
+            start = time.perf_counter()
             try:
-                yield PatchedAirbyteMessageSerializer.load(orjson.loads(line))
+                message = orjson.loads(line)
+                message = decode_record(message) or PatchedAirbyteMessageSerializer.load(message)
             except orjson.JSONDecodeError:
                 logger.info(
                     f"ignoring input which can't be deserialized as Airbyte Message: {line}"
                 )
+                continue
+            if metrics is not None and message.type == Type.RECORD:
+                metrics.stream(message.record.stream).parse_seconds += time.perf_counter() - start
+            yield message
+
+    @staticmethod
+    def _create_metrics(config: Mapping[str, Any]) -> SyncMetrics:
+        """
+        Per-stream counters of a sync, reported in the destinationStats of STATE
+        messages, with the optional trace of every upsert call grouped by STATE
+        checkpoint.
+        """
+        tracer = SyncTracer(config["trace_file_path"]) if config.get("trace_file_path") else None
+        return SyncMetrics(config.get("metrics_textfile_path"), tracer)
 
     def check(
         self, logger: logging.Logger, config: Mapping[str, Any]
@@ -166,78 +292,250 @@ class DestinationDust(Destination):
         config: Mapping[str, Any],
         configured_catalog: ConfiguredAirbyteCatalog,
         input_messages: Iterable[AirbyteMessage],
+        metrics: Optional[SyncMetrics] = None,
     ) -> Iterable[AirbyteMessage]:
         data_format = config.get("data_format", "documents")
         
-        # Create log callback to yield log messages
-        log_messages = []
-        def log_callback(message: str, level: str) -> None:
-            log_level = Level.INFO if level == "INFO" else Level.DEBUG if level == "DEBUG" else Level.ERROR
-            log_messages.append(_create_log_message(log_level, message))
-        
-        client = DustClient(config, log_callback=log_callback)
+        # Bounded buffer of client log messages, yielded as input is processed
+        log_buffer = LogBuffer(min_level=config.get("log_level", "INFO"))
+
+        max_concurrency = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        # Shared by every request of the sync, including those of the async client
+        rate_limiter = AdaptiveRateLimiter(config.get("max_requests_per_second"))
+        client = DustClient(
+            config,
+            log_callback=log_buffer,
+            pool_size=max_concurrency,
+            rate_limiter=rate_limiter,
+        )
+        # Optional adaptive limit on in-flight uploads, below max_concurrency
+        controller = (
+            ConcurrencyController(
+                max_concurrency, log_callback=log_buffer, rate_limiter=rate_limiter
+            )
+            if config.get("auto_concurrency", False)
+            else None
+        )
         
+        if metrics is None:
+            metrics = self._create_metrics(config)
+        tracer = metrics.tracer
+
+        # Optional local store of fingerprints used to skip unchanged records
+        cache = (
+            LocalCache.from_config(config)
+            if config.get("local_cache_path")
+            else None
+        )
+
         yield _create_log_message(Level.INFO, f"Starting sync to Dust (format: {data_format})")
-        
-        if data_format == "tables":
-            yield from self._write_tables(client, config, configured_catalog, input_messages, log_messages)
-        else:
-            yield from self._write_documents(client, configured_catalog, input_messages, log_messages)
-        
+
+        # Optional profile of the sync, started before the reader and upload threads
+        profiler = SyncProfiler.from_config(config)
+        profile_summary: List[str] = []
+        if profiler is not None:
+            profiler.start()
+
+        # Parse input on a reader thread, ahead of the transform and send stages
+        input_messages = read_ahead(input_messages)
+        if profiler is not None:
+            input_messages = profiler.count_records(input_messages)
+
+        completed = False
+        try:
+            if data_format == "tables":
+                yield from self._write_tables(client, config, configured_catalog, input_messages, log_buffer, cache, controller, metrics)
+            else:
+                yield from self._write_documents(client, config, configured_catalog, input_messages, log_buffer, cache, controller, metrics)
+            completed = True
+        except TableNotFoundError:
+            # A saved table id may point to a deleted table; resolve tables again next sync
+            if cache is not None:
+                cache.clear_table_ids()
+            raise
+        finally:
+            if cache is not None:
+                cache.close()
+            if tracer is not None:
+                tracer.close(error=not completed)
+            if profiler is not None:
+                profile_summary = profiler.stop()
+                # A failed sync yields nothing more: log the summary here instead
+                if not completed:
+                    for line in profile_summary:
+                        logger.info(line)
+
+        for line in profile_summary:
+            yield _create_log_message(Level.INFO, line)
+
+        metrics.write_textfile()
+        for line in metrics.summary():
+            yield _create_log_message(Level.INFO, line)
+        if cache is not None:
+            yield _create_log_message(Level.INFO, cache.summary())
+        if controller is not None:
+            yield _create_log_message(Level.INFO, controller.summary())
+        if rate_limiter.rate_limited:
+            yield _create_log_message(
+                Level.WARN,
+                f"Rate limited {rate_limiter.rate_limited} time(s) by Dust API; "
+                f"final request rate {rate_limiter.rate:.1f}/s",
+            )
+        if log_buffer.dropped:
+            yield _create_log_message(
+                Level.WARN, f"Dropped {log_buffer.dropped} log message(s) in total during the sync"
+            )
         yield _create_log_message(Level.INFO, "Sync to Dust completed successfully")
 
     def _write_documents(
         self,
         client: DustClient,
+        config: Mapping[str, Any],
         configured_catalog: ConfiguredAirbyteCatalog,
         input_messages: Iterable[AirbyteMessage],
-        log_messages: List[AirbyteMessage],
+        log_buffer: LogBuffer,
+        cache: Optional[LocalCache] = None,
+        controller: Optional[ConcurrencyController] = None,
+        metrics: Optional[SyncMetrics] = None,
     ) -> Iterable[AirbyteMessage]:
-        """Write records as documents (original behavior)."""
+        """
+        Write records as documents.
+
+        Upserts run concurrently (up to max_concurrency); updates to the same
+        document_id keep their order, and every upsert is acknowledged before the
+        following STATE message is yielded. With a fingerprint cache, documents
+        whose title, text and tags are unchanged since they were last sent are skipped.
+
+        A record whose document still has an upsert waiting for an earlier one
+        replaces that upsert instead of adding another (last writer wins).
+
+        For overwrite streams, documents tagged with the stream that were not
+        written during the sync are deleted once it completes.
+        """
         streams = {
             stream.stream.name: stream for stream in configured_catalog.streams
         }
-        
+        # overwrite stream name -> ids of the documents written during the sync
+        written_ids = self._overwrite_written_ids(streams)
+
+        render_text = get_document_text_renderer(config)
+        if metrics is None:
+            metrics = SyncMetrics()
         record_count = 0
+        collapsed_count = 0
         stream_counts: dict[str, int] = {}
 
-        for message in input_messages:
-            if message.type == Type.STATE:
-                # Yield any pending log messages before state
-                yield from log_messages
-                log_messages.clear()
-                # Pass through state messages unchanged
-                yield message
-
-            elif message.type == Type.RECORD:
-                record = message.record
-                stream_name = record.stream
-                data = record.data
-                
-                record_count += 1
-                stream_counts[stream_name] = stream_counts.get(stream_name, 0) + 1
-
-                configured_stream = streams.get(stream_name)
-                document_id = self._build_document_id(
-                    stream_name, data, configured_stream
-                )
-                title = self._build_title(stream_name, data)
-                text = json.dumps(data, indent=2, default=str)
-                tags = [f"airbyte:stream:{stream_name}"]
-                timestamp = record.emitted_at
-
-                client.upsert_document(
-                    document_id=document_id,
-                    title=title,
-                    text=text,
-                    tags=tags,
-                    timestamp=timestamp,
-                )
-        
+        with self._document_uploader(client, config, controller) as (uploader, upsert_document):
+            # stream_name -> upsert_document counting its requests for the stream
+            instrumented_upserts: dict[str, Callable[..., Any]] = {}
+            for message in input_messages:
+                if message.type == Type.STATE:
+                    state_received_at = time.monotonic()
+                    # Wait until every record before this state is acknowledged
+                    uploader.drain()
+                    if cache is not None:
+                        cache.commit()
+                    # Yield any pending log messages before state
+                    yield from log_buffer.drain()
+                    # Pass through state messages, with the sync metrics in destinationStats
+                    yield self._checkpoint_state(message, metrics, state_received_at)
+
+                elif message.type == Type.RECORD:
+                    # Stream client logs as they arrive rather than holding them until STATE
+                    if log_buffer:
+                        yield from log_buffer.drain()
+                    record = message.record
+                    stream_name = record.stream
+                    data = record.data
+
+                    record_count += 1
+                    stream_counts[stream_name] = stream_counts.get(stream_name, 0) + 1
+                    stream_metrics = metrics.add_record(stream_name)
+
+                    start = time.perf_counter()
+                    configured_stream = streams.get(stream_name)
+                    document_id = self._build_document_id(
+                        stream_name, data, configured_stream
+                    )
+                    title = self._build_title(stream_name, data)
+                    text = render_text(data)
+                    tags = [f"{STREAM_TAG_PREFIX}{stream_name}"]
+                    timestamp = record.emitted_at
+                    stream_metrics.encode_seconds += time.perf_counter() - start
+
+                    # Skipped unchanged documents are still in Dust, so they count as written
+                    stream_written_ids = written_ids.get(stream_name)
+                    if stream_written_ids is not None:
+                        stream_written_ids.add(document_id)
+
+                    if cache is not None and cache.unchanged(
+                        f"document:{document_id}", cache.fingerprint(title, text, *tags)
+                    ):
+                        continue
+
+                    instrumented_upsert = instrumented_upserts.get(stream_name)
+                    if instrumented_upsert is None:
+                        instrumented_upsert = metrics.instrument(stream_name, upsert_document, documents=1)
+                        instrumented_upserts[stream_name] = instrumented_upsert
+                    # A version still waiting for an earlier upsert of the document is replaced
+                    if uploader.submit_latest(
+                        document_id,
+                        instrumented_upsert,
+                        document_id=document_id,
+                        title=title,
+                        text=text,
+                        tags=tags,
+                        timestamp=timestamp,
+                    ):
+                        stream_metrics.records_collapsed += 1
+                        collapsed_count += 1
+
+            uploader.drain()
+            if cache is not None:
+                cache.commit()
+
+        if written_ids:
+            yield from self._delete_stale_documents(client, config, controller, metrics, cache, written_ids)
+
         # Yield final log messages
-        yield from log_messages
-        log_messages.clear()
+        yield from log_buffer.drain()
         yield _create_log_message(Level.INFO, f"Processed {record_count} documents across {len(stream_counts)} stream(s)")
+        if collapsed_count:
+            yield _create_log_message(
+                Level.INFO,
+                f"Collapsed {collapsed_count} document version(s) superseded before they were sent",
+            )
+
+    @contextmanager
+    def _document_uploader(
+        self,
+        client: DustClient,
+        config: Mapping[str, Any],
+        controller: Optional[ConcurrencyController] = None,
+    ) -> Iterator[Tuple[OrderedUploader, Callable[..., Any]]]:
+        """
+        Yield the uploader and upsert function used in documents mode.
+
+        With async_http enabled, upserts go through an AsyncDustClient on a single
+        event loop instead of one thread per in-flight request.
+        """
+        max_concurrency = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        if not config.get("async_http", False):
+            with OrderedUploader(max_concurrency, controller) as uploader:
+                yield uploader, client.upsert_document
+            return
+
+        with AsyncOrderedUploader(max_concurrency, controller) as async_uploader:
+            async_client = AsyncDustClient(
+                config,
+                log_callback=client.log_callback,
+                pool_size=max_concurrency,
+                rate_limiter=client.rate_limiter,
+            )
+            try:
+                yield async_uploader, async_client.upsert_document
+            finally:
+                async_uploader.run(async_client.aclose())
 
     def _write_tables(
         self,
@@ -245,102 +543,465 @@ class DestinationDust(Destination):
         config: Mapping[str, Any],
         configured_catalog: ConfiguredAirbyteCatalog,
         input_messages: Iterable[AirbyteMessage],
-        log_messages: List[AirbyteMessage],
+        log_buffer: LogBuffer,
+        cache: Optional[LocalCache] = None,
+        controller: Optional[ConcurrencyController] = None,
+        metrics: Optional[SyncMetrics] = None,
     ) -> Iterable[AirbyteMessage]:
-        """Write records as table rows with batching."""
+        """
+        Write records as table rows with batching.
+
+        Batches are sent by an OrderedUploader (up to max_concurrency requests, in
+        order per table) while the next records are flattened; every batch is
+        acknowledged before the following STATE message is yielded. With a
+        fingerprint cache, rows unchanged since they were last sent are skipped
+        before they are buffered. Buffered rows are keyed by row_id, so only the
+        last version of a row pending since the previous flush is sent.
+
+        Batches hold `table_batch_size` rows, or, with `adaptive_batching`, a
+        per-stream byte size adapted to response times (see AdaptiveBatchSizer).
+
+        Records are flattened by a RecordFlattener compiled from their stream's
+        JSON schema, which expands nested objects into dotted columns up to
+        `table_flatten_depth` levels.
+
+        Tables for every catalog stream are resolved (or created) up front; see
+        _resolve_table_ids.
+
+        For overwrite streams, rows of the stream's table that were not written
+        during the sync are deleted once it completes.
+        """
         streams = {
             stream.stream.name: stream for stream in configured_catalog.streams
         }
+        # overwrite stream name -> ids of the rows written during the sync
+        written_ids = self._overwrite_written_ids(streams)
+        flatten_depth = config.get("table_flatten_depth", 0)
+        flatteners = {
+            name: RecordFlattener(stream.stream.json_schema, flatten_depth)
+            for name, stream in streams.items()
+        }
         batch_size = config.get("table_batch_size", DEFAULT_TABLE_BATCH_SIZE)
+        max_concurrency = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        batch_sizer = (
+            AdaptiveBatchSizer(
+                MAX_TABLE_PAYLOAD_BYTES,
+                target_seconds=config.get(
+                    "adaptive_batch_target_seconds", DEFAULT_TARGET_BATCH_SECONDS
+                ),
+            )
+            if config.get("adaptive_batching", False)
+            else None
+        )
+        if metrics is None:
+            metrics = SyncMetrics()
 
         yield _create_log_message(Level.INFO, f"Processing {len(streams)} stream(s) in tables mode")
 
-        # Collect records by stream
-        stream_rows: dict[str, List[dict[str, Any]]] = defaultdict(list)
-        table_ids: dict[str, str] = {}  # stream_name -> table_id (looked up by table title)
-        record_count = 0
+        # stream_name -> table_id (looked up by table title)
+        table_ids, table_index = self._resolve_table_ids(
+            client, streams, max_concurrency, cache, metrics
+        )
 
-        for message in input_messages:
-            if message.type == Type.STATE:
-                # Flush any pending rows before yielding state
-                yield from log_messages
-                log_messages.clear()
-                self._flush_table_batches(
-                    client, stream_rows, table_ids, streams, batch_size
+        def resolve_table_id(stream_name: str) -> str:
+            # Streams missing from the catalog are resolved on first use
+            if stream_name not in table_ids:
+                table_ids[stream_name] = metrics.instrument(stream_name, self._ensure_table_exists)(
+                    client, stream_name, streams.get(stream_name), table_index
                 )
-                stream_rows.clear()
-                # Pass through state messages unchanged
-                yield message
-
-            elif message.type == Type.RECORD:
-                record = message.record
-                stream_name = record.stream
-                data = record.data
-                
-                record_count += 1
-
-                if stream_name not in stream_rows:
-                    yield _create_log_message(Level.INFO, f"Discovered stream: {stream_name}")
-
-                # Flatten nested objects to JSON strings for now
-                flattened_data = self._flatten_record(data)
-                stream_rows[stream_name].append(flattened_data)
-
-                # Batch and flush when batch size reached
-                if len(stream_rows[stream_name]) >= batch_size:
-                    if stream_name not in table_ids:
-                        # Lookup table by title (stream_name), create if not found
-                        table_ids[stream_name] = self._ensure_table_exists(
-                            client, stream_name, streams.get(stream_name)
-                        )
+                if cache is not None:
+                    cache.save_table_ids({stream_name: table_ids[stream_name]})
+            return table_ids[stream_name]
+
+        # Collect records by stream, under a global memory budget
+        buffer = TableRowBuffer(config.get("buffer_max_bytes", DEFAULT_BUFFER_MAX_BYTES))
+        discovered_streams: set[str] = set()
+        record_count = 0
 
-                    rows_batch = stream_rows[stream_name][:batch_size]
-                    for chunk in self._chunk_rows_by_payload_size(
-                        rows_batch, MAX_TABLE_PAYLOAD_BYTES
+        with OrderedUploader(max_concurrency, controller) as uploader:
+
+            def send_rows(stream_name: str, rows: List[bytes], row_sizes: List[int]) -> None:
+                table_id = resolve_table_id(stream_name)
+                # Keyed by table so batches of the same table are upserted in order
+                if batch_sizer is None:
+                    uploader.submit(
+                        table_id,
+                        metrics.instrument(stream_name, self._upsert_table_rows, rows=len(rows)),
+                        client,
+                        table_id,
+                        rows,
+                        row_sizes,
+                    )
+                else:
+                    uploader.submit(
+                        table_id,
+                        metrics.instrument(
+                            stream_name, self._upsert_table_rows_adaptively, rows=len(rows)
+                        ),
+                        client,
+                        table_id,
+                        stream_name,
+                        rows,
+                        row_sizes,
+                        batch_sizer,
+                    )
+
+            flush_batch_size = batch_size if batch_sizer is None else None
+            for message in input_messages:
+                if message.type == Type.STATE:
+                    state_received_at = time.monotonic()
+                    # Flush any pending rows and wait until they are acknowledged
+                    self._flush_table_batches(buffer, send_rows, flush_batch_size)
+                    uploader.drain()
+                    if cache is not None:
+                        cache.commit()
+                    yield from log_buffer.drain()
+                    # Pass through state messages, with the sync metrics in destinationStats
+                    yield self._checkpoint_state(message, metrics, state_received_at)
+
+                elif message.type == Type.RECORD:
+                    # Stream client logs as they arrive rather than holding them until STATE
+                    if log_buffer:
+                        yield from log_buffer.drain()
+                    record = message.record
+                    stream_name = record.stream
+                    data = record.data
+
+                    record_count += 1
+                    stream_metrics = metrics.add_record(stream_name)
+
+                    if stream_name not in discovered_streams:
+                        discovered_streams.add(stream_name)
+                        yield _create_log_message(Level.INFO, f"Discovered stream: {stream_name}")
+
+                    start = time.perf_counter()
+                    flattened_data = flatteners.get(stream_name, _SCHEMALESS_FLATTENER)(data)
+                    flattened_at = time.perf_counter()
+                    row_id = self._table_row_id(data, streams.get(stream_name))
+                    # Encoded once: these bytes are fingerprinted, buffered and sent as is
+                    encoded_row = encode_row(row_id, flattened_data)
+                    stream_metrics.flatten_seconds += flattened_at - start
+                    stream_metrics.encode_seconds += time.perf_counter() - flattened_at
+
+                    # Skipped unchanged rows are still in Dust, so they count as written
+                    stream_written_ids = written_ids.get(stream_name)
+                    if stream_written_ids is not None:
+                        stream_written_ids.add(row_id)
+                    if cache is not None and cache.unchanged(
+                        self._row_cache_key(resolve_table_id(stream_name), row_id),
+                        cache.fingerprint(encoded_row),
                     ):
-                        client.upsert_rows(table_ids[stream_name], chunk)
-                    stream_rows[stream_name] = stream_rows[stream_name][batch_size:]
-
-        # Flush remaining rows
-        yield from log_messages
-        log_messages.clear()
-        self._flush_table_batches(
-            client, stream_rows, table_ids, streams, batch_size
+                        continue
+
+                    # Batch and flush when batch size reached; a pending row with the
+                    # same row_id is replaced (last writer wins)
+                    if buffer.add(stream_name, row_id, encoded_row):
+                        stream_metrics.records_collapsed += 1
+                    if batch_sizer is None:
+                        if buffer.pending_rows(stream_name) >= batch_size:
+                            send_rows(stream_name, *buffer.pop(stream_name, batch_size))
+                    elif buffer.stream_bytes(stream_name) >= batch_sizer.batch_bytes(stream_name):
+                        send_rows(stream_name, *buffer.pop(stream_name))
+
+                    # Flush the largest streams when the memory budget is reached
+                    if buffer.over_budget():
+                        self._flush_table_batches(
+                            buffer, send_rows, flush_batch_size, buffer.max_bytes
+                        )
+
+            # Flush remaining rows
+            self._flush_table_batches(buffer, send_rows, flush_batch_size)
+            uploader.drain()
+            if cache is not None:
+                cache.commit()
+
+        if written_ids:
+            yield from self._delete_stale_rows(
+                client, config, controller, metrics, cache, written_ids, resolve_table_id
+            )
+
+        yield from log_buffer.drain()
+        yield _create_log_message(Level.INFO, f"Processed {record_count} records across {len(discovered_streams)} stream(s)")
+        yield _create_log_message(
+            Level.INFO,
+            f"Peak buffered rows: {buffer.peak_bytes} bytes (budget: {buffer.max_bytes} bytes)",
         )
-        yield _create_log_message(Level.INFO, f"Processed {record_count} records across {len(stream_rows)} stream(s)")
+        if buffer.collapsed:
+            yield _create_log_message(
+                Level.INFO,
+                f"Collapsed {buffer.collapsed} row version(s) superseded before they were sent",
+            )
+        for stream_name, flattener in flatteners.items():
+            if flattener.total_collisions:
+                yield _create_log_message(
+                    Level.WARN,
+                    f"Stored {flattener.total_collisions} nested object(s) of stream '{stream_name}' "
+                    "as JSON strings: their dotted columns collide with other fields of the record",
+                )
+        if batch_sizer is not None:
+            for line in batch_sizer.summary():
+                yield _create_log_message(Level.INFO, line)
+
+    @staticmethod
+    def _overwrite_written_ids(streams: Mapping[str, Any]) -> dict[str, WrittenIds]:
+        """Return an empty WrittenIds for each overwrite stream of the catalog."""
+        return {
+            name: WrittenIds()
+            for name, stream in streams.items()
+            if stream.destination_sync_mode == DestinationSyncMode.overwrite
+        }
+
+    def _delete_stale_documents(
+        self,
+        client: DustClient,
+        config: Mapping[str, Any],
+        controller: Optional[ConcurrencyController],
+        metrics: SyncMetrics,
+        cache: Optional[LocalCache],
+        written_ids: Mapping[str, WrittenIds],
+    ) -> Iterable[AirbyteMessage]:
+        """Delete the documents of overwrite streams that the sync did not write."""
+        stale_ids: dict[str, List[str]] = {stream_name: [] for stream_name in written_ids}
+        # Listed in full before deleting anything, since deletes shift the listing offsets
+        for document in client.iter_documents():
+            document_id = document.get("document_id") or document.get("id")
+            for tag in document.get("tags") or []:
+                stream_name = tag[len(STREAM_TAG_PREFIX):] if tag.startswith(STREAM_TAG_PREFIX) else None
+                if stream_name in stale_ids:
+                    if document_id and document_id not in written_ids[stream_name]:
+                        stale_ids[stream_name].append(document_id)
+                    break
+
+        self._delete_stale_ids(
+            config,
+            controller,
+            metrics,
+            {stream_name: (client.delete_document, ids) for stream_name, ids in stale_ids.items()},
+        )
+        if cache is not None:
+            cache.forget(
+                f"document:{document_id}" for ids in stale_ids.values() for document_id in ids
+            )
+        for stream_name, ids in stale_ids.items():
+            yield _create_log_message(
+                Level.INFO,
+                f"Overwrite: deleted {len(ids)} stale document(s) of stream '{stream_name}', "
+                f"kept {len(written_ids[stream_name])} written during the sync",
+            )
+
+    def _delete_stale_rows(
+        self,
+        client: DustClient,
+        config: Mapping[str, Any],
+        controller: Optional[ConcurrencyController],
+        metrics: SyncMetrics,
+        cache: Optional[LocalCache],
+        written_ids: Mapping[str, WrittenIds],
+        resolve_table_id: Callable[[str], str],
+    ) -> Iterable[AirbyteMessage]:
+        """Delete the rows of overwrite streams' tables that the sync did not write."""
+        deletions: dict[str, Tuple[Callable[[str], None], List[str]]] = {}
+        for stream_name, stream_written_ids in written_ids.items():
+            table_id = resolve_table_id(stream_name)
+            # Listed in full before deleting anything, since deletes shift the listing offsets
+            stale_ids = list(stream_written_ids.stale(client.iter_row_ids(table_id)))
+            deletions[stream_name] = (partial(client.delete_row, table_id), stale_ids)
+
+        self._delete_stale_ids(config, controller, metrics, deletions)
+        if cache is not None:
+            cache.forget(
+                self._row_cache_key(resolve_table_id(stream_name), row_id)
+                for stream_name, (_, stale_ids) in deletions.items()
+                for row_id in stale_ids
+            )
+        for stream_name, (_, stale_ids) in deletions.items():
+            yield _create_log_message(
+                Level.INFO,
+                f"Overwrite: deleted {len(stale_ids)} stale row(s) of table '{resolve_table_id(stream_name)}' "
+                f"(stream '{stream_name}'), kept {len(written_ids[stream_name])} written during the sync",
+            )
+
+    @staticmethod
+    def _delete_stale_ids(
+        config: Mapping[str, Any],
+        controller: Optional[ConcurrencyController],
+        metrics: SyncMetrics,
+        deletions: Mapping[str, Tuple[Callable[[str], None], List[str]]],
+    ) -> None:
+        """
+        Call `delete(id)` for each stream's stale ids, concurrently (up to
+        max_concurrency). Dust has no bulk delete endpoint: each id is deleted
+        by its own request.
+        """
+        max_concurrency = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        with OrderedUploader(max_concurrency, controller) as uploader:
+            for stream_name, (delete, ids) in deletions.items():
+                instrumented_delete = metrics.instrument(stream_name, delete)
+                for stale_id in ids:
+                    # Distinct keys, so the deletes run concurrently
+                    uploader.submit(f"{stream_name}:{stale_id}", instrumented_delete, stale_id)
+            uploader.drain()
+
+    @staticmethod
+    def _checkpoint_state(
+        message: AirbyteMessage, metrics: SyncMetrics, received_at: Optional[float] = None
+    ) -> AirbyteMessage:
+        """
+        Return a STATE message with the sync metrics checkpoint in its destinationStats,
+        and close the trace checkpoint of the requests it waited on, if tracing.
+
+        recordCount is the number of records received since the previous STATE (of
+        the same stream, for per-stream states); `streams` holds the totals of the
+        stream, or of every stream for global and legacy states. `received_at`
+        (time.monotonic()) is when the STATE was read, before pending uploads were awaited.
+        """
+        state = message.state
+        stream_name = None
+        if state.type == AirbyteStateType.STREAM and state.stream is not None:
+            stream_name = state.stream.stream_descriptor.name
+        record_count, summaries = metrics.checkpoint(stream_name)
+        patched = _to_patched_message(message)
+        patched.state.destinationStats = PatchedAirbyteStateStats(
+            recordCount=float(record_count), streams=summaries
+        )
+        if metrics.tracer is not None:
+            metrics.tracer.checkpoint(
+                patched.state.id,
+                {
+                    "airbyte.stream": stream_name,
+                    "airbyte.record_count": record_count,
+                    "airbyte.checkpoint.wait_seconds": (
+                        time.monotonic() - received_at if received_at is not None else None
+                    ),
+                },
+            )
+        return patched
 
     def _flush_table_batches(
+        self,
+        buffer: TableRowBuffer,
+        send_rows: Callable[[str, List[bytes], List[int]], None],
+        batch_size: Optional[int],
+        max_remaining_bytes: int = 0,
+    ) -> None:
+        """
+        Send pending rows, largest streams first, until at most
+        `max_remaining_bytes` remain buffered (by default, flush everything).
+
+        Rows are sent in batches of `batch_size` rows, or all at once when None.
+        """
+        for stream_name in buffer.streams_by_size():
+            if buffer.total_bytes <= max_remaining_bytes:
+                break
+            rows, row_sizes = buffer.pop(stream_name)
+            step = batch_size or len(rows)
+            for i in range(0, len(rows), step):
+                send_rows(stream_name, rows[i:i + step], row_sizes[i:i + step])
+
+    def _upsert_table_rows(
         self,
         client: DustClient,
-        stream_rows: dict[str, List[dict[str, Any]]],
-        table_ids: dict[str, str],
-        streams: dict[str, Any],
-        batch_size: int,
+        table_id: str,
+        rows: List[bytes],
+        row_sizes: List[int],
     ) -> None:
-        """Flush all pending rows for all streams."""
-        for stream_name, rows in stream_rows.items():
-            if not rows:
-                continue
+        """
+        Upsert a batch of rows encoded by encode_row, split into requests under
+        MAX_TABLE_PAYLOAD_BYTES.
+        """
+        for chunk in self._chunk_rows_by_payload_size(
+            rows, MAX_TABLE_PAYLOAD_BYTES, row_sizes
+        ):
+            client.upsert_encoded_rows(table_id, chunk)
 
-            if stream_name not in table_ids:
-                # Lookup table by title (stream_name), create if not found
-                table_ids[stream_name] = self._ensure_table_exists(
-                    client, stream_name, streams.get(stream_name)
+    def _upsert_table_rows_adaptively(
+        self,
+        client: DustClient,
+        table_id: str,
+        stream_name: str,
+        rows: List[bytes],
+        row_sizes: List[int],
+        batch_sizer: AdaptiveBatchSizer,
+    ) -> None:
+        """
+        Upsert encoded rows in requests of the stream's current adaptive batch size.
+
+        Each response time is reported to `batch_sizer`. A request answered 413 or
+        timing out shrinks the batch size and is retried split in two (row upserts
+        are idempotent); a single row that still fails is re-raised.
+        """
+        pending = deque(
+            self._chunk_rows_with_sizes(rows, row_sizes, batch_sizer.batch_bytes(stream_name))
+        )
+        while pending:
+            chunk, chunk_sizes, payload_bytes = pending.popleft()
+            start = time.monotonic()
+            try:
+                client.upsert_encoded_rows(table_id, chunk, retry_timeouts=False)
+            except (PayloadTooLargeError, requests.Timeout):
+                if len(chunk) == 1:
+                    raise
+                batch_sizer.shrink(stream_name, payload_bytes)
+                half = len(chunk) // 2
+                pending.extendleft(
+                    reversed(
+                        self._chunk_rows_with_sizes(chunk[:half], chunk_sizes[:half], MAX_TABLE_PAYLOAD_BYTES)
+                        + self._chunk_rows_with_sizes(chunk[half:], chunk_sizes[half:], MAX_TABLE_PAYLOAD_BYTES)
+                    )
                 )
+                continue
+            batch_sizer.observe(stream_name, payload_bytes, len(chunk), time.monotonic() - start)
+
+    def _resolve_table_ids(
+        self,
+        client: DustClient,
+        streams: dict[str, Any],
+        max_concurrency: int,
+        cache: Optional[LocalCache],
+        metrics: Optional[SyncMetrics] = None,
+    ) -> Tuple[dict[str, str], Optional[dict[str, str]]]:
+        """
+        Resolve the table of every catalog stream once, at the start of the sync.
 
-            # Flush in batches (by row count), then by payload size so each request is < 1MB
-            for i in range(0, len(rows), batch_size):
-                batch = rows[i:i + batch_size]
-                for chunk in self._chunk_rows_by_payload_size(
-                    batch, MAX_TABLE_PAYLOAD_BYTES
-                ):
-                    client.upsert_rows(table_ids[stream_name], chunk)
+        Table ids saved in the local cache by previous syncs are reused without any
+        API call. Other streams are looked up in a title index built from a single
+        paginated listing, and missing tables are created concurrently.
+
+        Returns:
+            The stream_name -> table_id mapping, and the title index (None when
+            every stream was resolved from the cache)
+        """
+        table_ids = cache.load_table_ids() if cache is not None else {}
+        missing = [stream_name for stream_name in streams if stream_name not in table_ids]
+        if not missing:
+            return table_ids, None
+
+        table_index = client.build_table_index()
+
+        def ensure_table_exists(stream_name: str) -> str:
+            ensure = self._ensure_table_exists
+            if metrics is not None:
+                # Count table creations as requests of the stream
+                ensure = metrics.instrument(stream_name, ensure)
+            return ensure(client, stream_name, streams[stream_name], table_index)
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(missing)),
+            thread_name_prefix="dust-tables",
+        ) as executor:
+            resolved = list(executor.map(ensure_table_exists, missing))
+        new_table_ids = dict(zip(missing, resolved))
+        table_ids.update(new_table_ids)
+        if cache is not None:
+            cache.save_table_ids(new_table_ids)
+        return table_ids, table_index
 
     def _ensure_table_exists(
         self,
         client: DustClient,
         stream_name: str,
         configured_stream: Any,
+        table_index: Optional[Mapping[str, str]] = None,
     ) -> str:
         """
         Ensure table exists, using table title as identifier.
@@ -353,6 +1014,8 @@ class DestinationDust(Destination):
             client: Dust client instance
             stream_name: Name of the stream/table (used as table title)
             configured_stream: Configured stream (unused, kept for compatibility)
+            table_index: Optional title -> table_id index from client.build_table_index();
+                when omitted, the tables are listed to find the title
 
         Returns:
             The table_id (looked up by title or generated by Dust if creating new table)
@@ -360,7 +1023,10 @@ class DestinationDust(Destination):
         table_title = stream_name
         
         # First, try to find existing table by title
-        existing_table_id = client.find_table_by_title(table_title)
+        if table_index is not None:
+            existing_table_id = table_index.get(table_title)
+        else:
+            existing_table_id = client.find_table_by_title(table_title)
         if existing_table_id:
             return existing_table_id
         
@@ -399,6 +1065,26 @@ class DestinationDust(Destination):
         Falls back to a SHA-256 hash prefix of the record data when no
         primary key is defined.
         """
+        pk_parts = DestinationDust._primary_key_values(data, configured_stream)
+
+        if pk_parts:
+            raw_id = f"{stream_name}-{'-'.join(pk_parts)}"
+        else:
+            data_str = json.dumps(data, sort_keys=True, default=str)
+            data_hash = hashlib.sha256(data_str.encode()).hexdigest()[:16]
+            raw_id = f"{stream_name}-{data_hash}"
+
+        return re.sub(r"[^a-zA-Z0-9_\-]", "_", raw_id)
+
+    @staticmethod
+    def _primary_key_values(
+        data: Mapping[str, Any], configured_stream: Any, null_as_missing: bool = False
+    ) -> list[str]:
+        """
+        Return the values of the stream's primary key fields in a record, as strings
+        ("" for a missing field, and for a null one with `null_as_missing`); empty
+        when the stream has no primary key.
+        """
         pk_parts: list[str] = []
         if (
             configured_stream
@@ -413,16 +1099,10 @@ class DestinationDust(Destination):
                     else:
                         value = ""
                         break
+                if value is None and null_as_missing:
+                    value = ""
                 pk_parts.append(str(value))
-
-        if pk_parts:
-            raw_id = f"{stream_name}-{'-'.join(pk_parts)}"
-        else:
-            data_str = json.dumps(data, sort_keys=True, default=str)
-            data_hash = hashlib.sha256(data_str.encode()).hexdigest()[:16]
-            raw_id = f"{stream_name}-{data_hash}"
-
-        return re.sub(r"[^a-zA-Z0-9_\-]", "_", raw_id)
+        return pk_parts
 
     @staticmethod
     def _build_title(stream_name: str, data: Mapping[str, Any]) -> str:
@@ -439,66 +1119,100 @@ class DestinationDust(Destination):
     @staticmethod
     def _flatten_record(data: Mapping[str, Any]) -> dict[str, Any]:
         """
-        Flatten a record for table storage.
+        Flatten a record for table storage, without a schema (see RecordFlattener).
 
         Nested objects and arrays are serialized to JSON strings.
         """
-        flattened = {}
-        for key, value in data.items():
-            if isinstance(value, (dict, list)):
-                flattened[key] = json.dumps(value, default=str)
-            else:
-                flattened[key] = value
-        return flattened
+        return _SCHEMALESS_FLATTENER(data)
 
     @staticmethod
-    def _format_row_for_payload_size(row: dict[str, Any]) -> dict[str, Any]:
+    def _table_row_id(data: Mapping[str, Any], configured_stream: Any = None) -> str:
         """
-        Format a row like the client does for upsert_rows payload sizing.
-        Mirrors client row_id logic so payload byte size matches the actual request.
+        Build a deterministic row_id for a record, so re-syncing it upserts the same row.
+
+        Uses the stream's primary key values, joined like in _build_document_id;
+        when they are all missing or null, the record's 'id' field, or a stable
+        hash of its content (see DustClientBase._default_row_id).
         """
-        row_id = str(row.get("id", ""))
-        if not row_id:
-            for key, value in row.items():
-                if value is not None and str(value).strip():
-                    row_id = str(value)
-                    break
-            if not row_id:
-                row_id = str(hash(str(row)))[:16]
-        return {"row_id": row_id, "value": row}
+        pk_parts = DestinationDust._primary_key_values(data, configured_stream, null_as_missing=True)
+        if any(pk_parts):
+            return "-".join(pk_parts)
+        return DustClientBase._default_row_id(data)
+
+    @staticmethod
+    def _row_cache_key(table_id: str, row_id: str) -> str:
+        """
+        Fingerprint cache key of a table row: its table and the row_id sent to Dust.
+        Keyed by table rather than stream, so a table recreated after a deletion
+        gets every row again.
+        """
+        return f"row:{table_id}:{row_id}"
+
+    @staticmethod
+    def _encode_table_row(row: dict[str, Any], row_id: Optional[str] = None) -> bytes:
+        """
+        Return a single row encoded as it appears in the payload. Without `row_id`,
+        uses the client's default row_id, like upsert_rows does.
+        """
+        if row_id is None:
+            row_id = DustClientBase._default_row_id(row)
+        return encode_row(row_id, row)
+
+    @staticmethod
+    def _table_row_bytes(row: dict[str, Any]) -> int:
+        """Return the byte size of a single row as it appears in the payload."""
+        return len(DestinationDust._encode_table_row(row))
 
     @staticmethod
     def _table_payload_bytes(rows: List[dict[str, Any]]) -> int:
-        """Return the byte size of the JSON payload as sent by the client for these rows."""
-        if not rows:
-            return len(json.dumps({"rows": []}, default=str).encode("utf-8"))
-        payload = {
-            "rows": [
-                DestinationDust._format_row_for_payload_size(r) for r in rows
-            ]
-        }
-        return len(json.dumps(payload, default=str).encode("utf-8"))
+        """Return the byte size of the payload sent by the client for these rows."""
+        return len(rows_payload([DestinationDust._encode_table_row(row) for row in rows]))
 
     @staticmethod
     def _chunk_rows_by_payload_size(
-        rows: List[dict[str, Any]], max_bytes: int
-    ) -> List[List[dict[str, Any]]]:
+        rows: List[Any],
+        max_bytes: int,
+        row_sizes: Optional[List[int]] = None,
+    ) -> List[List[Any]]:
         """
         Split rows into chunks such that each chunk's payload size is <= max_bytes.
         If a single row exceeds max_bytes, it is still emitted as its own chunk.
+
+        Each row is encoded once (or not at all when `row_sizes`, the byte sizes of
+        the encoded rows, is given); see _chunk_rows_with_sizes.
+        """
+        if row_sizes is None:
+            row_sizes = [DestinationDust._table_row_bytes(row) for row in rows]
+        return [
+            chunk
+            for chunk, _, _ in DestinationDust._chunk_rows_with_sizes(rows, row_sizes, max_bytes)
+        ]
+
+    @staticmethod
+    def _chunk_rows_with_sizes(
+        rows: List[Any],
+        row_sizes: List[int],
+        max_bytes: int,
+    ) -> List[Tuple[List[Any], List[int], int]]:
+        """
+        Split rows into (rows, row sizes, payload bytes) chunks of at most max_bytes.
+
+        The payload size is tracked incrementally as the `{"rows":[...]}`
+        envelope plus the encoded rows and their separators, which is exactly the
+        body rows_payload builds from encoded rows.
         """
-        if not rows:
-            return []
-        chunks: List[List[dict[str, Any]]] = []
-        current: List[dict[str, Any]] = []
-        for row in rows:
-            candidate = current + [row]
-            size = DestinationDust._table_payload_bytes(candidate)
-            if current and size > max_bytes:
-                chunks.append(current)
-                current = [row]
+        chunks: List[Tuple[List[Any], List[int], int]] = []
+        start = 0
+        current_bytes = 0
+        for index, row_bytes in enumerate(row_sizes):
+            if index == start:
+                current_bytes = _EMPTY_TABLE_PAYLOAD_BYTES + row_bytes
+            elif current_bytes + _TABLE_ROW_SEPARATOR_BYTES + row_bytes > max_bytes:
+                chunks.append((rows[start:index], row_sizes[start:index], current_bytes))
+                start = index
+                current_bytes = _EMPTY_TABLE_PAYLOAD_BYTES + row_bytes
             else:
-                current = candidate
-        if current:
-            chunks.append(current)
+                current_bytes += _TABLE_ROW_SEPARATOR_BYTES + row_bytes
+        if start < len(rows):
+            chunks.append((rows[start:], row_sizes[start:], current_bytes))
         return chunks
@@ -0,0 +1,75 @@
+import json
+import re
+from typing import Any, Callable, Mapping
+
+import orjson
+
+# Default document_text_format; matches the text produced by earlier versions
+DEFAULT_DOCUMENT_TEXT_FORMAT = "json_indented"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# orjson output where json.dumps may format a float differently: orjson writes
+# floats below 1e-4 as 0.0000x or 1e-7 where json.dumps writes 1e-05 or 1e-07.
+# Matches in strings are false positives, which only cost a fallback.
+_FLOAT_MISMATCH = re.compile(r"\de-|0\.0000")
+
+
+def _dumps(value: Any, option: int = 0) -> str:
+    try:
+        return orjson.dumps(value, default=str, option=_ORJSON_OPTIONS | option).decode()
+    except orjson.JSONEncodeError:
+        # e.g. integers wider than 64 bits, which orjson refuses but json encodes
+        if option & orjson.OPT_INDENT_2:
+            return json.dumps(value, indent=2, ensure_ascii=False, default=str)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def render_json_compact(data: Mapping[str, Any]) -> str:
+    """Render a record as compact JSON."""
+    return _dumps(data)
+
+
+def render_json_indented(data: Mapping[str, Any]) -> str:
+    """
+    Render a record as JSON indented by two spaces, with the exact text of
+    json.dumps(data, indent=2, default=str) so that the cache fingerprints of
+    documents rendered by earlier versions still match.
+
+    orjson renders the record unless its output could differ from json.dumps:
+    non-ASCII text, which json.dumps escapes, or small floats.
+    """
+    text = _dumps(data, orjson.OPT_INDENT_2)
+    if text.isascii() and not _FLOAT_MISMATCH.search(text):
+        return text
+    return json.dumps(data, indent=2, default=str)
+
+
+def render_markdown(data: Mapping[str, Any]) -> str:
+    """Render a record as a markdown list of `**key**: value` lines; nested values as compact JSON."""
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, (dict, list)):
+            value = _dumps(value)
+        elif value is None:
+            value = ""
+        lines.append(f"- **{key}**: {value}")
+    return "\n".join(lines)
+
+
+DOCUMENT_TEXT_RENDERERS: dict[str, Callable[[Mapping[str, Any]], str]] = {
+    "json_compact": render_json_compact,
+    "json_indented": render_json_indented,
+    "markdown": render_markdown,
+}
+
+
+def get_document_text_renderer(config: Mapping[str, Any]) -> Callable[[Mapping[str, Any]], str]:
+    text_format = config.get("document_text_format", DEFAULT_DOCUMENT_TEXT_FORMAT)
+    try:
+        return DOCUMENT_TEXT_RENDERERS[text_format]
+    except KeyError:
+        raise ValueError(
+            f"Unknown document_text_format {text_format!r}; "
+            f"expected one of {', '.join(DOCUMENT_TEXT_RENDERERS)}"
+        ) from None
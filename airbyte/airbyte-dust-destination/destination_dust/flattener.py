@@ -0,0 +1,102 @@
+import json
+from typing import Any, Mapping, Optional
+
+import orjson
+
+_BLOB_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def encode_blob(value: Any) -> str:
+    """Serialize a nested object or array to the JSON string stored in its column."""
+    try:
+        return orjson.dumps(value, default=str, option=_BLOB_OPTIONS).decode("utf-8")
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which orjson rejects
+        return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+def _schema_types(schema: Mapping[str, Any]) -> Optional[frozenset]:
+    """The types a schema allows, or None when it does not say (no type, $ref, anyOf...)."""
+    types = schema.get("type")
+    if isinstance(types, str):
+        return frozenset((types,))
+    if isinstance(types, list) and types:
+        return frozenset(types)
+    return None
+
+
+def _object_properties(schema: Any) -> Optional[Mapping[str, Any]]:
+    """The properties of an object schema, or None when it does not declare any."""
+    if not isinstance(schema, Mapping):
+        return None
+    properties = schema.get("properties")
+    if not isinstance(properties, Mapping):
+        return None
+    types = _schema_types(schema)
+    if types is not None and not types <= {"object", "null"}:
+        return None
+    return properties
+
+
+class RecordFlattener:
+    """
+    Flattener of a stream's records into table rows, compiled from the stream's
+    JSON schema.
+
+    Nested objects and arrays are serialized to JSON strings with orjson, whatever
+    the schema declares, since sources do not always match their schema. With
+    `max_depth`, objects whose properties the schema declares are instead
+    expanded into dotted columns (`address.city`), up to `max_depth` levels. An
+    object whose dotted columns would overwrite another field of the record
+    (e.g. a top-level `address.city` key) is kept as a JSON string instead;
+    `collisions` counts them.
+    """
+
+    def __init__(self, json_schema: Optional[Mapping[str, Any]] = None, max_depth: int = 0, prefix: str = ""):
+        properties = _object_properties(json_schema) or {}
+        self._prefix = prefix
+        self.collisions = 0
+        # field -> flattener, of the objects expanded into dotted columns
+        self._expanded: dict[str, "RecordFlattener"] = {}
+        if max_depth > 0:
+            for name, schema in properties.items():
+                if _object_properties(schema) is not None:
+                    self._expanded[name] = RecordFlattener(schema, max_depth - 1, f"{prefix}{name}.")
+
+    @property
+    def total_collisions(self) -> int:
+        """Collisions of this flattener and of those of its expanded objects."""
+        return self.collisions + sum(flattener.total_collisions for flattener in self._expanded.values())
+
+    def __call__(self, data: Mapping[str, Any]) -> dict[str, Any]:
+        if not self._expanded:
+            # Nothing to expand: a single pass
+            return {
+                key: encode_blob(value) if isinstance(value, (dict, list)) else value
+                for key, value in data.items()
+            }
+        flattened: dict[str, Any] = {}
+        self._flatten_into(data, flattened)
+        return flattened
+
+    def _flatten_into(self, data: Mapping[str, Any], flattened: dict[str, Any]) -> None:
+        prefix = self._prefix
+        deferred = []
+        for key, value in data.items():
+            if isinstance(value, (dict, list)):
+                flattener = self._expanded.get(key)
+                if flattener is not None and isinstance(value, dict):
+                    deferred.append((key, value, flattener))
+                    continue
+                value = encode_blob(value)
+            flattened[prefix + key] = value
+
+        # Expanded once every other column of this level is known, to detect collisions
+        for key, value, flattener in deferred:
+            expanded: dict[str, Any] = {}
+            flattener._flatten_into(value, expanded)
+            if expanded.keys().isdisjoint(flattened):
+                flattened.update(expanded)
+            else:
+                self.collisions += 1
+                flattened[prefix + key] = encode_blob(value)
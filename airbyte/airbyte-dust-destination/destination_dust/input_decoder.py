@@ -0,0 +1,86 @@
+from typing import Any, BinaryIO, Iterator, Optional
+
+from airbyte_cdk.models import Type
+
+# Size of the blocks read from stdin
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class RecordMessage:
+    """
+    Lightweight stand-in for a RECORD AirbyteMessage.
+
+    Exposes the attributes the destination reads (`type`, `record.stream`,
+    `record.data`, `record.emitted_at`, `record.namespace`) without building the
+    serpyco dataclasses; `record` is the message itself.
+    """
+
+    __slots__ = ("stream", "data", "emitted_at", "namespace")
+
+    type = Type.RECORD
+
+    def __init__(
+        self,
+        stream: str,
+        data: dict[str, Any],
+        emitted_at: int,
+        namespace: Optional[str] = None,
+    ):
+        self.stream = stream
+        self.data = data
+        self.emitted_at = emitted_at
+        self.namespace = namespace
+
+    @property
+    def record(self) -> "RecordMessage":
+        return self
+
+    def __repr__(self) -> str:
+        return f"RecordMessage(stream={self.stream!r}, emitted_at={self.emitted_at!r})"
+
+
+def iter_lines(stream: BinaryIO, block_size: int = READ_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Yield the lines of a binary stream, read in large blocks and never decoded to str.
+
+    The blocks of a line spanning several blocks are joined once, when its end is
+    read, so a line costs time linear in its size however many blocks it spans.
+    """
+    # Blocks (or tail of a block) of the line being read, not yet terminated
+    partial: list[bytes] = []
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        if b"\n" not in block:
+            partial.append(block)
+            continue
+        lines = block.split(b"\n")
+        if partial:
+            partial.append(lines[0])
+            lines[0] = b"".join(partial)
+        tail = lines.pop()
+        partial = [tail] if tail else []
+        yield from lines
+    if partial:
+        yield b"".join(partial)
+
+
+def decode_record(message: Any) -> Optional[RecordMessage]:
+    """
+    Return a RecordMessage for a parsed RECORD message, or None for any other message.
+
+    Records missing a required field also return None, so the caller falls back to
+    the full serializer and its validation errors.
+    """
+    if not isinstance(message, dict) or message.get("type") != "RECORD":
+        return None
+    record = message.get("record")
+    if not isinstance(record, dict):
+        return None
+    try:
+        return RecordMessage(
+            record["stream"], record["data"], record["emitted_at"], record.get("namespace")
+        )
+    except KeyError:
+        return None
@@ -0,0 +1,69 @@
+import threading
+from collections import deque
+from typing import Iterator
+
+from airbyte_cdk.models import AirbyteLogMessage, AirbyteMessage, Level, Type
+
+# Default number of log messages held between two drains
+DEFAULT_LOG_BUFFER_SIZE = 1000
+
+LOG_LEVELS = {
+    "DEBUG": Level.DEBUG,
+    "INFO": Level.INFO,
+    "WARN": Level.WARN,
+    "ERROR": Level.ERROR,
+}
+_LEVEL_ORDER = {name: order for order, name in enumerate(LOG_LEVELS)}
+
+
+class LogBuffer:
+    """
+    Bounded, level-filtered channel for the log messages DustClient emits during a sync.
+
+    Used as the client's `log_callback`. Messages below `min_level` are rejected by
+    `is_enabled` before the client formats them. Accepted messages are kept in a ring
+    buffer of `capacity` entries; when it is full the oldest message is dropped and
+    counted. The destination drains it as it processes input, so memory stays bounded
+    even if the source rarely emits STATE messages. Safe to call from worker threads.
+    """
+
+    def __init__(self, min_level: str = "INFO", capacity: int = DEFAULT_LOG_BUFFER_SIZE):
+        self.min_level = min_level
+        self.dropped = 0
+        self._dropped_since_drain = 0
+        self._min_order = _LEVEL_ORDER[min_level]
+        self._messages: deque[tuple[str, str]] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def is_enabled(self, level: str) -> bool:
+        return _LEVEL_ORDER.get(level, _LEVEL_ORDER["ERROR"]) >= self._min_order
+
+    def __call__(self, message: str, level: str) -> None:
+        if not self.is_enabled(level):
+            return
+        with self._lock:
+            if len(self._messages) == self._messages.maxlen:
+                self.dropped += 1
+                self._dropped_since_drain += 1
+            self._messages.append((level, message))
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def drain(self) -> Iterator[AirbyteMessage]:
+        """Yield and remove the buffered messages, preceded by a notice if any were dropped."""
+        with self._lock:
+            messages = list(self._messages)
+            self._messages.clear()
+            dropped, self._dropped_since_drain = self._dropped_since_drain, 0
+        if dropped:
+            yield _log_message(
+                Level.WARN,
+                f"Dropped {dropped} log message(s) because the log buffer was full",
+            )
+        for level, message in messages:
+            yield _log_message(LOG_LEVELS.get(level, Level.ERROR), message)
+
+
+def _log_message(level: Level, message: str) -> AirbyteMessage:
+    return AirbyteMessage(type=Type.LOG, log=AirbyteLogMessage(level=level, message=message))
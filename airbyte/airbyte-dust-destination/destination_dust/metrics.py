@@ -0,0 +1,364 @@
+import inspect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from destination_dust.tracing import SyncTracer
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every metric in the Prometheus textfile
+METRIC_PREFIX = "dust_destination"
+
+
+class LatencyHistogram:
+    """Latency histogram with a count per LATENCY_BUCKETS bucket, plus an overflow bucket."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts[:-1]):
+            seen += bucket_count
+            if seen >= rank:
+                return min(LATENCY_BUCKETS[index], self.max)
+        return self.max
+
+
+@dataclass
+class StreamMetrics:
+    """
+    Counters of a single stream.
+
+    Input and stage counters are only updated by the thread running that stage;
+    request counters are updated by upload workers under SyncMetrics' lock.
+    """
+
+    records_in: int = 0
+    records_collapsed: int = 0
+    rows_sent: int = 0
+    documents_sent: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+    bytes_sent: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    parse_seconds: float = 0.0
+    flatten_seconds: float = 0.0
+    encode_seconds: float = 0.0
+    http_seconds: float = 0.0
+    request_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    records_since_checkpoint: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals since the start of the sync, as reported in destinationStats."""
+        return {
+            "recordsIn": self.records_in,
+            "recordsCollapsed": self.records_collapsed,
+            "rowsSent": self.rows_sent,
+            "documentsSent": self.documents_sent,
+            "requests": self.requests,
+            "failedRequests": self.failed_requests,
+            "bytesSent": self.bytes_sent,
+            "retries": self.retries,
+            "rateLimited": self.rate_limited,
+            "parseSeconds": round(self.parse_seconds, 6),
+            "flattenSeconds": round(self.flatten_seconds, 6),
+            "encodeSeconds": round(self.encode_seconds, 6),
+            "httpSeconds": round(self.http_seconds, 6),
+            "requestSecondsP50": self.request_latency.quantile(0.5),
+            "requestSecondsP99": self.request_latency.quantile(0.99),
+            "requestSecondsMax": round(self.request_latency.max, 6),
+        }
+
+
+class RequestStats:
+    """
+    Counters of the Dust API calls made by one upsert; see SyncMetrics.instrument.
+
+    The clients find it with current_request() and report every response and
+    every completed call to it. With a tracer, each completed call is also
+    recorded as a span.
+    """
+
+    __slots__ = (
+        "stream_name",
+        "tracer",
+        "calls",
+        "attempts",
+        "rate_limited",
+        "bytes_sent",
+        "latencies",
+        "_call_attempts",
+        "_call_bytes",
+    )
+
+    def __init__(self, stream_name: str = "", tracer: Optional[SyncTracer] = None) -> None:
+        self.stream_name = stream_name
+        self.tracer = tracer
+        self.calls = 0
+        self.attempts = 0
+        self.rate_limited = 0
+        self.bytes_sent = 0
+        self.latencies: List[float] = []
+        self._call_attempts = 0
+        self._call_bytes = 0
+
+    def on_response(self, response: Any) -> None:
+        """Count an HTTP response, including attempts retried inside urllib3."""
+        retries = getattr(getattr(response, "raw", None), "retries", None)
+        history = getattr(retries, "history", None)
+        attempts = 1 + (len(history) if isinstance(history, tuple) else 0)
+        self.attempts += attempts
+        self._call_attempts += attempts
+        if response.status_code == 429:
+            self.rate_limited += 1
+        try:
+            content_length = response.request.headers.get("Content-Length")
+        except (AttributeError, RuntimeError):
+            content_length = None
+        if isinstance(content_length, str) and content_length.isdigit():
+            self.bytes_sent += int(content_length) * attempts
+            # The payload is the same on every attempt
+            self._call_bytes = int(content_length)
+
+    def on_call(
+        self,
+        seconds: float,
+        operation: str = "request",
+        attributes: Optional[Dict[str, Any]] = None,
+        status_code: Optional[int] = None,
+    ) -> None:
+        """Count a completed API call, and its latency including retries."""
+        self.calls += 1
+        self.latencies.append(seconds)
+        if self.tracer is not None:
+            end_ns = time.time_ns()
+            self.tracer.add_span(
+                operation,
+                end_ns - int(seconds * 1e9),
+                end_ns,
+                {
+                    "airbyte.stream": self.stream_name,
+                    **(attributes or {}),
+                    "http.request.body.size": self._call_bytes,
+                    "http.request.resend_count": max(self._call_attempts - 1, 0),
+                    "http.response.status_code": status_code,
+                },
+                error=status_code is None or status_code >= 400,
+            )
+        self._call_attempts = 0
+        self._call_bytes = 0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("dust_current_request", default=None)
+
+
+def current_request() -> Optional[RequestStats]:
+    """RequestStats of the upsert running in this thread or task, if it is instrumented."""
+    return _current_request.get()
+
+
+class SyncMetrics:
+    """
+    Per-stream counters and request latency histograms for one sync.
+
+    Checkpoints summarize them for the destinationStats of STATE messages, and,
+    with `textfile_path`, write a snapshot in the Prometheus textfile format
+    (as read by node_exporter's textfile collector). With a `tracer`, every API
+    call of an instrumented upsert is also recorded as a span.
+    """
+
+    def __init__(self, textfile_path: Optional[str] = None, tracer: Optional[SyncTracer] = None):
+        self.textfile_path = textfile_path
+        self.tracer = tracer
+        self._streams: Dict[str, StreamMetrics] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, stream_name: str) -> StreamMetrics:
+        metrics = self._streams.get(stream_name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._streams.setdefault(stream_name, StreamMetrics())
+        return metrics
+
+    def add_record(self, stream_name: str) -> StreamMetrics:
+        """Count an input record; return the stream's metrics for stage timings."""
+        metrics = self.stream(stream_name)
+        metrics.records_in += 1
+        metrics.records_since_checkpoint += 1
+        return metrics
+
+    def instrument(
+        self, stream_name: str, fn: Callable[..., Any], rows: int = 0, documents: int = 0
+    ) -> Callable[..., Any]:
+        """
+        Wrap an upsert function (or coroutine function) so the API calls it makes
+        are counted for the stream; `rows` and `documents` are counted as sent
+        when it returns.
+        """
+        if inspect.iscoroutinefunction(fn):
+
+            async def instrumented_async(*args: Any, **kwargs: Any) -> Any:
+                stats = RequestStats(stream_name, self.tracer)
+                token = _current_request.set(stats)
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    self._observe(stream_name, stats, 0, 0, failed=True)
+                    raise
+                finally:
+                    _current_request.reset(token)
+                self._observe(stream_name, stats, rows, documents, failed=False)
+                return result
+
+            return instrumented_async
+
+        def instrumented(*args: Any, **kwargs: Any) -> Any:
+            stats = RequestStats(stream_name, self.tracer)
+            token = _current_request.set(stats)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                self._observe(stream_name, stats, 0, 0, failed=True)
+                raise
+            finally:
+                _current_request.reset(token)
+            self._observe(stream_name, stats, rows, documents, failed=False)
+            return result
+
+        return instrumented
+
+    def checkpoint(self, stream_name: Optional[str] = None) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """
+        Close a checkpoint, for one stream or (None) for all of them.
+
+        Returns the number of records received since the previous checkpoint and
+        the per-stream summaries, and writes the Prometheus textfile if configured.
+        """
+        with self._lock:
+            if stream_name is not None:
+                selected = {stream_name: self._streams.setdefault(stream_name, StreamMetrics())}
+            else:
+                selected = dict(self._streams)
+            record_count = 0
+            for metrics in selected.values():
+                record_count += metrics.records_since_checkpoint
+                metrics.records_since_checkpoint = 0
+            summaries = {name: metrics.summary() for name, metrics in sorted(selected.items())}
+        self.write_textfile()
+        return record_count, summaries
+
+    def summary(self) -> List[str]:
+        """One line per stream for the end-of-sync logs."""
+        with self._lock:
+            lines = []
+            for stream_name, metrics in sorted(self._streams.items()):
+                lines.append(
+                    f"Stream {stream_name}: {metrics.records_in} record(s) in "
+                    f"({metrics.records_collapsed} collapsed into a later version), "
+                    f"{metrics.rows_sent} row(s) and {metrics.documents_sent} document(s) sent "
+                    f"in {metrics.requests} request(s) ({metrics.bytes_sent} bytes, "
+                    f"{metrics.retries} retries, {metrics.rate_limited} rate limited); "
+                    f"parse {metrics.parse_seconds:.2f}s, flatten {metrics.flatten_seconds:.2f}s, "
+                    f"encode {metrics.encode_seconds:.2f}s, http {metrics.http_seconds:.2f}s "
+                    f"(p50 {metrics.request_latency.quantile(0.5):g}s, "
+                    f"p99 {metrics.request_latency.quantile(0.99):g}s)"
+                )
+            return lines
+
+    def write_textfile(self) -> None:
+        """Atomically replace the Prometheus textfile with the current counters, if configured."""
+        if not self.textfile_path:
+            return
+        temporary_path = f"{self.textfile_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as textfile:
+            textfile.write(self.render_prometheus())
+        os.replace(temporary_path, self.textfile_path)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            streams = sorted(self._streams.items())
+            lines: List[str] = []
+            counters = [
+                ("records_total", "Records read from the input.", "records_in"),
+                (
+                    "records_collapsed_total",
+                    "Records replaced by a later version of the same row or document before being sent.",
+                    "records_collapsed",
+                ),
+                ("rows_sent_total", "Table rows acknowledged by Dust.", "rows_sent"),
+                ("documents_sent_total", "Documents acknowledged by Dust.", "documents_sent"),
+                ("requests_total", "Dust API calls, retries excluded.", "requests"),
+                ("failed_requests_total", "Upserts that raised an error.", "failed_requests"),
+                ("bytes_sent_total", "Request body bytes sent, retries included.", "bytes_sent"),
+                ("retries_total", "Retried HTTP attempts.", "retries"),
+                ("rate_limited_total", "Responses with status 429.", "rate_limited"),
+            ]
+            for name, help_text, attribute in counters:
+                lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+                for stream_name, metrics in streams:
+                    lines.append(f"{METRIC_PREFIX}_{name}{{stream=\"{_escape(stream_name)}\"}} {getattr(metrics, attribute)}")
+
+            name = f"{METRIC_PREFIX}_stage_seconds_total"
+            lines.append(f"# HELP {name} Time spent in each stage of the sync.")
+            lines.append(f"# TYPE {name} counter")
+            for stream_name, metrics in streams:
+                for stage in ("parse", "flatten", "encode", "http"):
+                    seconds = getattr(metrics, f"{stage}_seconds")
+                    lines.append(f"{name}{{stream=\"{_escape(stream_name)}\",stage=\"{stage}\"}} {seconds:.6f}")
+
+            name = f"{METRIC_PREFIX}_request_duration_seconds"
+            lines.append(f"# HELP {name} Dust API call latency, retries included.")
+            lines.append(f"# TYPE {name} histogram")
+            for stream_name, metrics in streams:
+                label = f"stream=\"{_escape(stream_name)}\""
+                histogram = metrics.request_latency
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{{{label},le=\"{bound:g}\"}} {cumulative}")
+                lines.append(f"{name}_bucket{{{label},le=\"+Inf\"}} {histogram.count}")
+                lines.append(f"{name}_sum{{{label}}} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _observe(self, stream_name: str, stats: RequestStats, rows: int, documents: int, failed: bool) -> None:
+        metrics = self.stream(stream_name)
+        with self._lock:
+            metrics.rows_sent += rows
+            metrics.documents_sent += documents
+            metrics.requests += stats.calls
+            metrics.failed_requests += int(failed)
+            metrics.bytes_sent += stats.bytes_sent
+            metrics.retries += max(stats.attempts - stats.calls, 0)
+            metrics.rate_limited += stats.rate_limited
+            for seconds in stats.latencies:
+                metrics.http_seconds += seconds
+                metrics.request_latency.observe(seconds)
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
@@ -0,0 +1,64 @@
+import time
+from typing import Any, BinaryIO, Callable, Optional, TextIO
+
+from airbyte_cdk.models import AirbyteMessage, Type
+
+# Bytes of serialized output held before they are written
+DEFAULT_OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# Seconds after which buffered output is written even if the buffer is not full
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class MessageWriter:
+    """
+    Buffered writer of serialized Airbyte messages, one JSON document per line.
+
+    Messages are serialized straight to bytes and appended to an in-memory buffer
+    that is written to `stream` (normally sys.stdout.buffer) in one call when it
+    reaches `buffer_size` bytes, when `flush_interval` seconds have passed, on every
+    STATE message, and on close. `text_stream`, the text layer over `stream`, is
+    flushed first so lines printed by loggers are not interleaved mid-line.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        serialize: Callable[[AirbyteMessage], bytes],
+        text_stream: Optional[TextIO] = None,
+        buffer_size: int = DEFAULT_OUTPUT_BUFFER_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._stream = stream
+        self._serialize = serialize
+        self._text_stream = text_stream
+        self._buffer = bytearray()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "MessageWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    def write(self, message: AirbyteMessage) -> None:
+        self._buffer += self._serialize(message)
+        self._buffer += b"\n"
+        if (
+            message.type == Type.STATE
+            or len(self._buffer) >= self.buffer_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._text_stream is not None:
+            self._text_stream.flush()
+        self._stream.write(self._buffer)
+        self._stream.flush()
+        self._buffer.clear()
@@ -0,0 +1,66 @@
+import hashlib
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+# Number of ids kept unsorted before they are sorted into a run
+ID_RUN_SIZE = 1 << 20
+
+
+def id_hash(value: str) -> int:
+    """Return a stable, unsigned 64-bit hash of a document or row id."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class WrittenIds:
+    """
+    Ids of the documents or rows written by an overwrite sync, to find the stale
+    ones left by previous syncs once it ends.
+
+    Ids are stored as 64-bit hashes (8 bytes per id, instead of a Python string in
+    a set), sorted in runs of up to ID_RUN_SIZE hashes that are searched by
+    bisection. A hash collision can only make a stale id look written, so it is
+    kept rather than deleted; a written id is never reported as stale.
+    """
+
+    def __init__(self) -> None:
+        self._runs: List[array] = []
+        self._tail = array("Q")
+        self._count = 0
+
+    def add(self, value: str) -> None:
+        self._tail.append(id_hash(value))
+        self._count += 1
+        if len(self._tail) >= ID_RUN_SIZE:
+            self._sort_tail()
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str):
+            return False
+        if self._tail:
+            self._sort_tail()
+        hashed = id_hash(value)
+        for run in self._runs:
+            index = bisect_left(run, hashed)
+            if index < len(run) and run[index] == hashed:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the stored hashes."""
+        return sum(run.itemsize * len(run) for run in self._runs) + self._tail.itemsize * len(self._tail)
+
+    def stale(self, ids: Iterable[str]) -> Iterator[str]:
+        """Yield the ids that were not written during the sync."""
+        for value in ids:
+            if value not in self:
+                yield value
+
+    def _sort_tail(self) -> None:
+        self._runs.append(array("Q", sorted(self._tail)))
+        self._tail = array("Q")
+
@@ -0,0 +1,58 @@
+import queue
+import threading
+from typing import Any, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Default number of parsed input messages held between the reader and the transformer
+DEFAULT_READ_AHEAD_SIZE = 1000
+
+# Sentinel put on the queue once the input is exhausted (or failed)
+_END = object()
+
+
+def read_ahead(messages: Iterable[T], max_pending: int = DEFAULT_READ_AHEAD_SIZE) -> Iterator[T]:
+    """
+    Iterate `messages` on a background reader thread, up to `max_pending` items ahead.
+
+    This is the first stage of the write pipeline: reading and parsing stdin overlaps
+    with transforming records and sending them to Dust. The queue is bounded, so when
+    the later stages fall behind the reader blocks and stops pulling from stdin.
+    Items are yielded in input order; an error raised while reading is re-raised here.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+    failure: list[BaseException] = []
+
+    def put(item: Any) -> bool:
+        # Wake up periodically so the reader exits once the consumer has stopped
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            for message in messages:
+                if not put(message):
+                    return
+        except BaseException as e:
+            failure.append(e)
+        put(_END)
+
+    reader = threading.Thread(target=read, name="dust-stdin-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is _END:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        # Not joined: the reader may be blocked on stdin, and exits on its next put
+        stopped.set()
@@ -0,0 +1,239 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from airbyte_cdk.models import AirbyteMessage, Type
+
+PROFILE_MODES = ("off", "sampling", "cprofile")
+
+# Default prefix of the profile output files
+DEFAULT_PROFILE_OUTPUT_PATH = "/tmp/dust-profile"
+
+# Default time between two stack samples, in seconds
+DEFAULT_SAMPLE_INTERVAL = 0.01
+
+# Number of hottest stacks or functions logged per phase when the sync ends
+SUMMARY_ENTRIES = 5
+
+# Before Python 3.12, a cProfile.Profile only sees the thread that enabled it, so
+# each thread gets its own. Since 3.12, cProfile runs on sys.monitoring: a single
+# profile sees every thread and enabling a second one raises ValueError.
+PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+
+# Phase label of the interpreter-wide cProfile profile, which mixes every thread
+ALL_PHASES = "all"
+
+# Thread name prefix -> phase of the sync the thread runs; the main thread transforms records
+_THREAD_PHASES = (
+    ("dust-stdin-reader", "input_parse"),
+    ("dust-upload", "http"),
+    ("dust-tables", "http"),
+)
+
+
+def thread_phase(thread_name: str) -> str:
+    """Phase label of the work done by a thread of the sync, by thread name."""
+    if thread_name == "MainThread":
+        return "transform"
+    for prefix, phase in _THREAD_PHASES:
+        if thread_name.startswith(prefix):
+            return phase
+    return "other"
+
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SyncProfiler:
+    """
+    On-demand profiler for a `write` run, labeled by phase: input_parse (stdin
+    reader thread), transform (main thread) and http (upload workers).
+
+    - "sampling" samples the stack of every thread each `interval` seconds
+      (wall-clock) and writes them in the folded format read by flamegraph.pl,
+      speedscope or inferno, each stack rooted at its phase: `<output_path>.folded`.
+    - "cprofile" runs a cProfile.Profile per thread and writes one pstats file
+      per phase: `<output_path>.<phase>.pstats` (e.g. for snakeviz or flameprof).
+      Since Python 3.12 (see PER_THREAD_CPROFILE), a single profile covers every
+      thread and is written to `<output_path>.all.pstats`: call counts are exact,
+      but the times of functions running concurrently in several threads are
+      mixed, so use "sampling" to compare phases.
+
+    Only records `start_record` to `start_record + record_count` (0: until the
+    end) are profiled; see `count_records`. With per-thread profiles, the window
+    only applies to the main thread, since worker threads are profiled from
+    their start.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        output_path: str = DEFAULT_PROFILE_OUTPUT_PATH,
+        start_record: int = 0,
+        record_count: int = 0,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ):
+        if mode not in PROFILE_MODES[1:]:
+            raise ValueError(f"Unknown profile mode '{mode}'; expected one of: {', '.join(PROFILE_MODES)}")
+        self.mode = mode
+        self.output_path = output_path
+        self.start_record = start_record
+        self.end_record = start_record + record_count if record_count else None
+        self.interval = interval
+        self.active = start_record == 0
+        self.samples: Counter = Counter()
+        self._records = 0
+        self._main_profile: Optional[cProfile.Profile] = None
+        self._thread_profiles: List[Tuple[threading.Thread, cProfile.Profile]] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> Optional["SyncProfiler"]:
+        """
+        Build the profiler configured by the DUST_PROFILE_* environment variables,
+        which take precedence, or the profile_* config options; None when off.
+        """
+        mode = os.environ.get("DUST_PROFILE_MODE") or config.get("profile_mode", "off")
+        if mode == "off":
+            return None
+        return cls(
+            mode,
+            output_path=os.environ.get("DUST_PROFILE_OUTPUT_PATH")
+            or config.get("profile_output_path", DEFAULT_PROFILE_OUTPUT_PATH),
+            start_record=int(os.environ.get("DUST_PROFILE_START_RECORD") or config.get("profile_start_record", 0)),
+            record_count=int(os.environ.get("DUST_PROFILE_RECORD_COUNT") or config.get("profile_record_count", 0)),
+            interval=float(os.environ.get("DUST_PROFILE_INTERVAL_MS") or DEFAULT_SAMPLE_INTERVAL * 1000) / 1000,
+        )
+
+    def start(self) -> None:
+        """Start profiling; call it before the sync starts its reader and upload threads."""
+        if self.mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, name="dust-profiler", daemon=True)
+            self._sampler.start()
+        else:
+            if PER_THREAD_CPROFILE:
+                threading.setprofile(self._start_thread_profile)
+            self._main_profile = cProfile.Profile()
+            if self.active:
+                self._main_profile.enable()
+
+    def count_records(self, messages: Iterable[AirbyteMessage]) -> Iterator[AirbyteMessage]:
+        """Pass messages through, opening and closing the profiled window of records."""
+        for message in messages:
+            if message.type == Type.RECORD:
+                self._records += 1
+                if self._records == self.start_record + 1 and not self.active:
+                    self._set_active(True)
+                elif self.end_record is not None and self._records == self.end_record + 1:
+                    self._set_active(False)
+            yield message
+
+    def stop(self) -> List[str]:
+        """Stop profiling, write the output files and return a summary for the sync logs."""
+        if self.mode == "sampling":
+            self._stopped.set()
+            if self._sampler is not None:
+                self._sampler.join()
+            return self._write_samples()
+        if PER_THREAD_CPROFILE:
+            threading.setprofile(None)
+        self._set_active(False)
+        return self._write_pstats()
+
+    def _set_active(self, active: bool) -> None:
+        self.active = active
+        if self._main_profile is not None:
+            if active:
+                self._main_profile.enable()
+            else:
+                self._main_profile.disable()
+
+    def _sample_loop(self) -> None:
+        sampler_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            if not self.active:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_phase(names.get(thread_id, "")))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _start_thread_profile(self, frame: Any, event: str, arg: Any) -> None:
+        # Installed by threading.setprofile: replace itself with a profile of this thread
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._thread_profiles.append((threading.current_thread(), profile))
+        profile.enable()
+
+    def _write_samples(self) -> List[str]:
+        path = f"{self.output_path}.folded"
+        with open(path, "w", encoding="utf-8") as folded:
+            for stack, count in sorted(self.samples.items()):
+                folded.write(f"{stack} {count}\n")
+        total = sum(self.samples.values())
+        by_phase: Counter = Counter()
+        for stack, count in self.samples.items():
+            by_phase[stack.split(";", 1)[0]] += count
+        lines = [
+            f"Profile: {total} stack samples written to {path} ("
+            + ", ".join(f"{phase} {count * 100 / total:.0f}%" for phase, count in by_phase.most_common())
+            + ")"
+            if total
+            else f"Profile: no stack samples taken, {path} is empty"
+        ]
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            phase, _, frames = stack.partition(";")
+            leaves[f"{phase}: {frames.rsplit(';', 1)[-1]}"] += count
+        for leaf, count in leaves.most_common(SUMMARY_ENTRIES):
+            lines.append(f"Profile hot spot: {leaf} ({count * 100 / total:.1f}% of samples)")
+        return lines
+
+    def _write_pstats(self) -> List[str]:
+        main_phase = thread_phase("MainThread") if PER_THREAD_CPROFILE else ALL_PHASES
+        profiles = [(main_phase, self._main_profile)] if self._main_profile is not None else []
+        with self._lock:
+            # A profile can only be read safely once its thread has exited
+            profiles.extend(
+                (thread_phase(thread.name), profile)
+                for thread, profile in self._thread_profiles
+                if not thread.is_alive()
+            )
+        stats_by_phase: dict[str, pstats.Stats] = {}
+        for phase, profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if phase in stats_by_phase:
+                stats_by_phase[phase].add(profile)
+            else:
+                stats_by_phase[phase] = pstats.Stats(profile)
+
+        lines = []
+        for phase, stats in sorted(stats_by_phase.items()):
+            path = f"{self.output_path}.{phase}.pstats"
+            stats.dump_stats(path)
+            lines.append(f"Profile of {phase}: {stats.total_tt:.2f}s written to {path}")
+            report = io.StringIO()
+            stats.stream = report
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_ENTRIES)
+            for row in report.getvalue().splitlines():
+                # Keep the table of hottest functions
+                if row.strip() and row.lstrip()[:1].isdigit():
+                    lines.append(f"Profile of {phase}: {row.strip()}")
+        return lines
@@ -0,0 +1,153 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Mapping, Optional
+
+# Lowest request rate the limiter backs off to, in requests per second
+MIN_RATE = 0.5
+
+# Factor applied to the request rate on a 429 response; concurrent 429s received
+# within RATE_DECREASE_INTERVAL seconds of each other count as one
+RATE_DECREASE_FACTOR = 0.5
+RATE_DECREASE_INTERVAL = 1.0
+
+# Attempts made for a rate-limited request before giving up
+RATE_LIMIT_RETRIES = 10
+
+# Base and cap, in seconds, of the jittered backoff between rate-limited attempts
+RATE_LIMIT_BACKOFF_BASE = 1.0
+RATE_LIMIT_BACKOFF_MAX = 60.0
+
+# Headers announcing how many requests are left in the current window and when it resets
+_REMAINING_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+_RESET_HEADERS = ("X-RateLimit-Reset", "RateLimit-Reset")
+
+
+def _header_seconds(headers: Mapping[str, str], names: tuple) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        # Some APIs send an absolute epoch timestamp rather than a delay
+        if seconds > 1e9:
+            seconds -= time.time()
+        return max(seconds, 0.0)
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every request a sync sends to Dust, sync or async.
+
+    The bucket starts unlimited (or at `max_rate` requests per second when set).
+    A 429 response halves the rate, starting from the rate actually observed
+    when the first one arrives, and pauses all requests until `Retry-After` (or the
+    rate-limit reset header) has elapsed; every successful response raises it again
+    by about one request per second per second, up to `max_rate`. Concurrent
+    uploads thus converge on the sustainable rate instead of tripping the quota.
+    Thread-safe; `acquire_async` waits without blocking the event loop.
+    """
+
+    def __init__(self, max_rate: Optional[float] = None):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.rate_limited = 0
+        self.server_errors = 0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._window_start = self._updated
+        self._window_count = 0
+        self._observed_rate: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token for one request; return how many seconds to wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            self._count_request(now)
+            delay = max(self._paused_until - now, 0.0)
+            if self.rate is None:
+                return delay
+            burst = max(self.rate, 1.0)
+            self._tokens = min(burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self.rate)
+            return delay
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_response(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adjust the rate from a response's status and rate-limit headers."""
+        with self._lock:
+            now = time.monotonic()
+            if status_code == 429:
+                self.rate_limited += 1
+                if now - self._last_decrease >= RATE_DECREASE_INTERVAL:
+                    self._last_decrease = now
+                    current = self.rate if self.rate is not None else self._sending_rate(now)
+                    self.rate = max(current * RATE_DECREASE_FACTOR, MIN_RATE)
+                    self._tokens = min(self._tokens, 0.0)
+                    self._updated = now
+                pause = _header_seconds(headers, ("Retry-After",) + _RESET_HEADERS)
+                if pause is not None:
+                    self._paused_until = max(self._paused_until, now + pause)
+                return
+
+            if status_code >= 500:
+                self.server_errors += 1
+
+            if status_code < 400 and self.rate is not None:
+                self.rate += 1.0 / self.rate
+                if self.max_rate is not None:
+                    self.rate = min(self.rate, self.max_rate)
+
+            # The quota is spent: hold requests until the window resets
+            remaining = _header_seconds(headers, _REMAINING_HEADERS)
+            if remaining == 0:
+                reset = _header_seconds(headers, _RESET_HEADERS)
+                if reset:
+                    self._paused_until = max(self._paused_until, now + reset)
+
+    @staticmethod
+    def backoff_delay(attempt: int, headers: Mapping[str, str]) -> float:
+        """
+        Seconds to wait before retrying a rate-limited request: full jitter over an
+        exponential window, but never less than the server's Retry-After.
+        """
+        window = min(RATE_LIMIT_BACKOFF_BASE * (2 ** attempt), RATE_LIMIT_BACKOFF_MAX)
+        delay = random.uniform(0, window)
+        retry_after = _header_seconds(headers, ("Retry-After",))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _count_request(self, now: float) -> None:
+        self._window_count += 1
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._observed_rate = self._window_count / elapsed
+            self._window_start = now
+            self._window_count = 0
+
+    def _sending_rate(self, now: float) -> float:
+        """Requests per second sent recently, over the current or last one-second window."""
+        if self._observed_rate is not None:
+            return self._observed_rate
+        return self._window_count / max(now - self._window_start, 0.1)
@@ -0,0 +1,150 @@
+from array import array
+from typing import List, Optional, Tuple
+
+# Unreferenced bytes a stream's arena may hold, beyond its live rows, before it is compacted
+COMPACT_MIN_BYTES = 1 << 16
+
+
+class _StreamArena:
+    """
+    Encoded rows of one stream, in order, packed into a single bytearray.
+
+    Row i is `data[starts[i]:starts[i] + lengths[i]]`; rows before `head` were
+    already popped. A replaced row is appended to the arena and its slot pointed
+    at the new bytes, so it keeps its place in the order. Popped and replaced
+    bytes stay in the arena until they outweigh the live rows, then the arena is
+    compacted, which keeps appends and drains amortized O(1) per byte.
+    """
+
+    __slots__ = ("data", "starts", "lengths", "slots", "head", "live_bytes")
+
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self.data = bytearray()
+        self.starts = array("Q")
+        self.lengths = array("Q")
+        # row key -> slot index; entries below `head` are stale
+        self.slots: dict[str, int] = {}
+        self.head = 0
+        self.live_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.starts) - self.head
+
+    def add(self, key: str, row: bytes) -> Optional[int]:
+        """Append a row; return the size of the pending row it replaced, if any."""
+        start = len(self.data)
+        self.data += row
+        self.live_bytes += len(row)
+        slot = self.slots.get(key)
+        if slot is not None and slot >= self.head:
+            previous = self.lengths[slot]
+            self.starts[slot] = start
+            self.lengths[slot] = len(row)
+            self.live_bytes -= previous
+            self._compact_if_sparse()
+            return previous
+        self.slots[key] = len(self.starts)
+        self.starts.append(start)
+        self.lengths.append(len(row))
+        return None
+
+    def pop(self, max_rows: Optional[int]) -> Tuple[List[bytes], List[int]]:
+        end = len(self.starts) if max_rows is None else min(self.head + max_rows, len(self.starts))
+        sizes = self.lengths[self.head:end].tolist()
+        with memoryview(self.data) as view:
+            rows = [
+                bytes(view[start:start + length])
+                for start, length in zip(self.starts[self.head:end], sizes)
+            ]
+        self.head = end
+        self.live_bytes -= sum(sizes)
+        if self.head == len(self.starts):
+            self._clear()
+        else:
+            self._compact_if_sparse()
+        return rows, sizes
+
+    def _compact_if_sparse(self) -> None:
+        if len(self.data) - self.live_bytes <= max(self.live_bytes, COMPACT_MIN_BYTES):
+            return
+        data = bytearray()
+        starts = array("Q")
+        lengths = self.lengths[self.head:]
+        with memoryview(self.data) as view:
+            for start, length in zip(self.starts[self.head:], lengths):
+                starts.append(len(data))
+                data += view[start:start + length]
+        self.slots = {key: slot - self.head for key, slot in self.slots.items() if slot >= self.head}
+        self.data, self.starts, self.lengths, self.head = data, starts, lengths, 0
+
+
+class TableRowBuffer:
+    """
+    Rows waiting to be upserted, per stream, under a global memory budget.
+
+    Rows are the encoded fragments of the upsert payload (see client.encode_row),
+    packed per stream into a bytearray with offset arrays rather than kept as
+    Python objects, so a pending row costs its encoded size plus a few bytes.
+    Popping a batch only advances the stream's head: the remaining rows are not
+    copied. The buffer knows how many bytes every stream holds; callers flush
+    streams (largest first) once `over_budget()` is true, which caps memory
+    across all streams instead of per stream.
+
+    Rows are keyed by their row_id: a row added while another row with the same
+    key is pending replaces it (last writer wins), since upserting both would leave
+    the table with the later one anyway. `collapsed` counts the replaced rows.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.peak_bytes = 0
+        self.collapsed = 0
+        self._arenas: dict[str, _StreamArena] = {}
+
+    def add(self, stream_name: str, key: str, row: bytes) -> bool:
+        """Buffer an encoded row; return True if it replaced a pending row with the same key."""
+        arena = self._arenas.get(stream_name)
+        if arena is None:
+            arena = self._arenas[stream_name] = _StreamArena()
+        previous = arena.add(key, row)
+        self.total_bytes += len(row)
+        if previous is not None:
+            self.collapsed += 1
+            self.total_bytes -= previous
+        if self.total_bytes > self.peak_bytes:
+            self.peak_bytes = self.total_bytes
+        return previous is not None
+
+    def pending_rows(self, stream_name: str) -> int:
+        arena = self._arenas.get(stream_name)
+        return len(arena) if arena is not None else 0
+
+    def stream_bytes(self, stream_name: str) -> int:
+        arena = self._arenas.get(stream_name)
+        return arena.live_bytes if arena is not None else 0
+
+    def over_budget(self) -> bool:
+        return self.total_bytes > self.max_bytes
+
+    def streams_by_size(self) -> List[str]:
+        """Streams with pending rows, largest buffered byte size first."""
+        return sorted(
+            (name for name, arena in self._arenas.items() if len(arena)),
+            key=lambda name: self._arenas[name].live_bytes,
+            reverse=True,
+        )
+
+    def pop(
+        self, stream_name: str, max_rows: Optional[int] = None
+    ) -> Tuple[List[bytes], List[int]]:
+        """Remove and return up to `max_rows` of a stream's oldest rows (all by default) and their sizes."""
+        arena = self._arenas.get(stream_name)
+        if arena is None:
+            return [], []
+        rows, sizes = arena.pop(max_rows)
+        self.total_bytes -= sum(sizes)
+        return rows, sizes
@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# Span kinds of the OTLP protocol
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+# Span status codes of the OTLP protocol
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+SERVICE_NAME = "destination-dust"
+
+
+def _new_id(num_bytes: int) -> str:
+    return os.urandom(num_bytes).hex()
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class SyncTracer:
+    """
+    Writes spans of a sync to a JSONL trace file, in the OTLP/JSON shape
+    (one ExportTraceServiceRequest per line, as written by the OpenTelemetry
+    Collector's file exporter and read by its otlpjsonfile receiver).
+
+    A sync is one trace: a `sync` root span, a `checkpoint` span per STATE
+    message, and, under each checkpoint, a span per Dust API call made while
+    it was open. Spans are buffered and written when their checkpoint closes,
+    at which point they are tagged with the STATE message's `id`. Thread-safe.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.trace_id = _new_id(16)
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._sync_span_id = _new_id(8)
+        self._sync_start = time.time_ns()
+        self._checkpoints = 0
+        self._spans: List[Dict[str, Any]] = []
+        self._start_checkpoint(self._sync_start)
+
+    def add_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        attributes: Dict[str, Any],
+        error: bool = False,
+    ) -> None:
+        """Record a finished client span under the current checkpoint."""
+        with self._lock:
+            self._spans.append(
+                self._span(
+                    name,
+                    _new_id(8),
+                    self._checkpoint_span_id,
+                    SPAN_KIND_CLIENT,
+                    start_ns,
+                    end_ns,
+                    attributes,
+                    error,
+                )
+            )
+
+    def checkpoint(self, state_id: Optional[int], attributes: Dict[str, Any]) -> None:
+        """Close the current checkpoint for a STATE message and write its spans."""
+        with self._lock:
+            self._close_checkpoint(state_id, attributes)
+            self._start_checkpoint(time.time_ns())
+
+    def close(self, error: bool = False) -> None:
+        """Write the spans of the unfinished checkpoint, if any, and the root span."""
+        with self._lock:
+            if self._spans:
+                self._close_checkpoint(None, {"airbyte.checkpoint.completed": False})
+            end_ns = time.time_ns()
+            self._write(
+                [
+                    self._span(
+                        "sync",
+                        self._sync_span_id,
+                        None,
+                        SPAN_KIND_INTERNAL,
+                        self._sync_start,
+                        end_ns,
+                        {"airbyte.checkpoints": self._checkpoints},
+                        error,
+                    )
+                ]
+            )
+            self._file.close()
+
+    def _start_checkpoint(self, start_ns: int) -> None:
+        self._checkpoint_span_id = _new_id(8)
+        self._checkpoint_start = start_ns
+
+    def _close_checkpoint(self, state_id: Optional[int], attributes: Dict[str, Any]) -> None:
+        self._checkpoints += 1
+        checkpoint_attributes = {"airbyte.checkpoint.index": self._checkpoints, **attributes}
+        if state_id is not None:
+            checkpoint_attributes["airbyte.state.id"] = state_id
+            state_attribute = _attribute("airbyte.state.id", state_id)
+            for span in self._spans:
+                span["attributes"].append(state_attribute)
+        self._spans.append(
+            self._span(
+                "checkpoint",
+                self._checkpoint_span_id,
+                self._sync_span_id,
+                SPAN_KIND_INTERNAL,
+                self._checkpoint_start,
+                time.time_ns(),
+                checkpoint_attributes,
+                False,
+            )
+        )
+        self._write(self._spans)
+        self._spans = []
+
+    def _span(
+        self,
+        name: str,
+        span_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        start_ns: int,
+        end_ns: int,
+        attributes: Dict[str, Any],
+        error: bool,
+    ) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [_attribute(key, value) for key, value in attributes.items() if value is not None],
+            "status": {"code": STATUS_ERROR if error else STATUS_OK},
+        }
+        if parent_span_id is not None:
+            span["parentSpanId"] = parent_span_id
+        return span
+
+    def _write(self, spans: List[Dict[str, Any]]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                    "scopeSpans": [{"scope": {"name": "destination_dust"}, "spans": spans}],
+                }
+            ]
+        }
+        self._file.write(orjson.dumps(request) + b"\n")
+        self._file.flush()
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Coroutine, Optional, Tuple, TypeVar
+
+from destination_dust.concurrency import ConcurrencyController
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A submitted call; submit_latest can replace its function and arguments until it starts."""
+
+    __slots__ = ("fn", "args", "kwargs", "started")
+
+    def __init__(self, fn: Callable[..., Any], args: tuple, kwargs: dict[str, Any]):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.started = False
+
+
+class OrderedUploader:
+    """
+    Bounded worker pool for Dust upsert calls.
+
+    Calls are run concurrently on up to `max_concurrency` threads, but calls
+    submitted with the same key (e.g. a document_id) run in submission order.
+    `submit` blocks once `max_concurrency` calls are in flight, and `drain`
+    waits for every submitted call so callers can checkpoint safely.
+
+    With a ConcurrencyController, the number of calls in flight is capped by its
+    current limit instead, and each call's duration is reported to it.
+    """
+
+    def __init__(
+        self, max_concurrency: int, controller: Optional[ConcurrencyController] = None
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.controller = controller
+        self._executor = self._create_executor()
+        self._in_flight = 0
+        self._slot_released = threading.Condition()
+        self._lock = threading.Lock()
+        self._pending: set[Future] = set()
+        # key -> future and call of the last call submitted with the key
+        self._tail_by_key: dict[str, Tuple[Future, _Call]] = {}
+        self._error: Optional[BaseException] = None
+
+    def __enter__(self) -> "OrderedUploader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Schedule fn(*args, **kwargs), after any earlier call submitted with the same key.
+
+        Raises the first failure of a previously submitted call, if any.
+        """
+        self._raise_if_failed()
+        self._acquire_slot()
+        call = _Call(fn, args, kwargs)
+        with self._lock:
+            tail = self._tail_by_key.get(key)
+            future = self._schedule(tail[0] if tail is not None else None, call)
+            self._tail_by_key[key] = (future, call)
+            self._pending.add(future)
+        future.add_done_callback(lambda done: self._on_done(key, done))
+
+    def submit_latest(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """
+        Like submit, but if the last call submitted with the same key has not
+        started yet (e.g. it waits for an earlier one), replace its function and
+        arguments instead of queueing another call: last writer wins.
+
+        Returns True if a pending call was replaced.
+        """
+        self._raise_if_failed()
+        with self._lock:
+            tail = self._tail_by_key.get(key)
+            if tail is not None and not tail[1].started:
+                call = tail[1]
+                call.fn, call.args, call.kwargs = fn, args, kwargs
+                return True
+        self.submit(key, fn, *args, **kwargs)
+        return False
+
+    def drain(self) -> None:
+        """Block until every submitted call has completed; re-raise the first failure."""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            wait(pending)
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _create_executor(self) -> Optional[ThreadPoolExecutor]:
+        return ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="dust-upload"
+        )
+
+    def _acquire_slot(self) -> None:
+        with self._slot_released:
+            while self._in_flight >= self._limit():
+                self._slot_released.wait()
+            self._in_flight += 1
+
+    def _release_slot(self) -> None:
+        with self._slot_released:
+            self._in_flight -= 1
+            # Wake every waiter: the limit may have been raised by more than one
+            self._slot_released.notify_all()
+
+    def _limit(self) -> int:
+        if self.controller is None:
+            return self.max_concurrency
+        return min(self.controller.limit, self.max_concurrency)
+
+    def _schedule(self, previous: Optional[Future], call: _Call) -> Future:
+        return self._executor.submit(self._run, previous, call)
+
+    def _start(self, call: _Call) -> Tuple[Callable[..., Any], tuple, dict[str, Any]]:
+        """Mark a call as started, after which its arguments are final."""
+        with self._lock:
+            call.started = True
+            return call.fn, call.args, call.kwargs
+
+    def _run(self, previous: Optional[Future], call: _Call) -> Any:
+        # Workers pick up calls in submission order, so `previous` is already running or done
+        if previous is not None:
+            previous.result()
+        fn, args, kwargs = self._start(call)
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self._observe(start, failed=True)
+            raise
+        self._observe(start, failed=False)
+        return result
+
+    def _observe(self, start: float, failed: bool) -> None:
+        if self.controller is not None:
+            self.controller.on_sample(time.monotonic() - start, failed=failed)
+
+    def _on_done(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+            tail = self._tail_by_key.get(key)
+            if tail is not None and tail[0] is future:
+                del self._tail_by_key[key]
+            if self._error is None and not future.cancelled() and future.exception():
+                self._error = future.exception()
+        self._release_slot()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+
+class AsyncOrderedUploader(OrderedUploader):
+    """
+    OrderedUploader whose calls are coroutine functions (e.g. AsyncDustClient methods).
+
+    All calls run on a single event loop in a background thread, so
+    `max_concurrency` can be in the hundreds without a thread per request.
+    """
+
+    def __init__(
+        self, max_concurrency: int, controller: Optional[ConcurrencyController] = None
+    ):
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="dust-upload-loop", daemon=True
+        )
+        self._loop_thread.start()
+        super().__init__(max_concurrency, controller)
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the uploader's event loop and return its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self) -> None:
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+
+    def _create_executor(self) -> Optional[ThreadPoolExecutor]:
+        return None
+
+    def _schedule(self, previous: Optional[Future], call: _Call) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._run_async(previous, call), self._loop)
+
+    async def _run_async(self, previous: Optional[Future], call: _Call) -> Any:
+        if previous is not None:
+            await asyncio.wrap_future(previous)
+        fn: Callable[..., Awaitable[Any]]
+        fn, args, kwargs = self._start(call)
+        start = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            self._observe(start, failed=True)
+            raise
+        self._observe(start, failed=False)
+        return result
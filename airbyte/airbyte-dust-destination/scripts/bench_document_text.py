@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark document text rendering: bytes sent and encode time per record.
+
+Usage:
+    python scripts/bench_document_text.py [--records N] [--fields N] [--repeat N]
+
+Compares every document_text_format with the previous renderer,
+json.dumps(data, indent=2, default=str), on generated records with strings,
+numbers, booleans, nulls and nested objects.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Mapping
+
+# Add parent directory to path to import destination_dust
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from destination_dust.document_text import DOCUMENT_TEXT_RENDERERS
+
+
+def generate_records(records: int, fields: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Customer {i}",
+            "active": i % 2 == 0,
+            "score": i * 1.5,
+            "deleted_at": None,
+            "address": {"street": f"{i} Main St", "city": "Paris", "zip": "75001"},
+            **{f"field_{j}": f"value {i} {j}" for j in range(fields)},
+        }
+        for i in range(records)
+    ]
+
+
+def measure(render: Callable[[Mapping[str, Any]], str], records: List[dict], repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [render(record) for record in records]
+        best = min(best, time.perf_counter() - start)
+    total_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    return best, total_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark document text rendering")
+    parser.add_argument("--records", type=int, default=20_000, help="Number of records (default: 20000)")
+    parser.add_argument("--fields", type=int, default=10, help="Extra string fields per record (default: 10)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per renderer; the best is kept (default: 3)")
+    args = parser.parse_args()
+
+    records = generate_records(args.records, args.fields)
+    renderers = {
+        "json.dumps (previous)": lambda data: json.dumps(data, indent=2, default=str),
+        **DOCUMENT_TEXT_RENDERERS,
+    }
+    results = {name: measure(render, records, args.repeat) for name, render in renderers.items()}
+    baseline_seconds, baseline_bytes = results["json.dumps (previous)"]
+
+    print(f"{args.records} records")
+    print(f"{'renderer':<24}{'bytes/record':>14}{'vs previous':>13}{'us/record':>11}{'speedup':>9}")
+    for name, (seconds, total_bytes) in results.items():
+        print(
+            f"{name:<24}{total_bytes / args.records:>14.0f}"
+            f"{(total_bytes / baseline_bytes - 1) * 100:>+12.1f}%"
+            f"{seconds / args.records * 1e6:>11.2f}"
+            f"{baseline_seconds / seconds:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of the per-record hot paths, with JSON results for regression tracking.
+
+Usage:
+    python scripts/bench_hot_paths.py [--records N] [--repeat N] [--filter TEXT]
+        [--output RESULTS.json] [--baseline BASELINE.json] [--threshold PCT]
+
+Times, in nanoseconds per record (best of --repeat runs):
+
+    DestinationDust._flatten_record (without a schema)
+    RecordFlattener (compiled from the fixture's schema, and expanding 2 levels)
+    DestinationDust._build_document_id (primary key and hash fallback)
+    DestinationDust._table_row_id (primary key and hash fallback)
+    DestinationDust._build_title
+    DestinationDust._table_payload_bytes
+    DestinationDust._chunk_rows_by_payload_size
+    DustClientBase._encode_rows (the row encoding done once per record in tables mode)
+    csv_to_dust.infer_column_type and csv_to_dust.read_csv_rows
+
+on three fixtures: narrow (6 flat fields), wide (200 flat fields) and nested
+(objects and arrays 5 levels deep). --output saves the results as JSON;
+--baseline compares against a previously saved file and exits with status 1
+when any benchmark got slower by more than --threshold percent.
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path to import destination_dust and csv_to_dust
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from csv_to_dust import infer_column_type, read_csv_rows
+from destination_dust.client import DustClientBase
+from destination_dust.destination import MAX_TABLE_PAYLOAD_BYTES, DestinationDust
+from destination_dust.flattener import RecordFlattener
+
+RESULTS_VERSION = 1
+
+WITH_PRIMARY_KEY = SimpleNamespace(primary_key=[["id"]])
+WITHOUT_PRIMARY_KEY = SimpleNamespace(primary_key=[])
+
+
+def narrow_record(i: int) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"Customer {i}",
+        "email": f"customer{i}@example.com",
+        "active": i % 2 == 0,
+        "score": i * 1.5,
+        "deleted_at": None,
+    }
+
+
+def wide_record(i: int) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"id": i, "title": f"Order {i}"}
+    for j in range(198):
+        kind = j % 4
+        if kind == 0:
+            record[f"field_{j}"] = f"value {i} {j}"
+        elif kind == 1:
+            record[f"field_{j}"] = i * j
+        elif kind == 2:
+            record[f"field_{j}"] = (i + j) * 0.5
+        else:
+            record[f"field_{j}"] = None if j % 8 == 3 else j % 2 == 0
+    return record
+
+
+def nested_record(i: int, depth: int = 5) -> Dict[str, Any]:
+    node: Dict[str, Any] = {"leaf": f"value {i}", "tags": ["a", "b", i]}
+    for level in range(depth):
+        node = {
+            "level": level,
+            "child": node,
+            "siblings": [{"position": k, "label": f"item {k}"} for k in range(3)],
+        }
+    return {
+        "id": i,
+        "subject": f"Ticket {i}",
+        "status": "open",
+        "payload": node,
+        "history": [{"at": 1_700_000_000 + k, "event": "updated", "by": {"id": k}} for k in range(4)],
+    }
+
+
+def infer_schema(value: Any) -> Dict[str, Any]:
+    """JSON schema of a fixture record, as a source would declare it in its catalog."""
+    if isinstance(value, dict):
+        return {
+            "type": ["null", "object"],
+            "properties": {key: infer_schema(child) for key, child in value.items()},
+        }
+    if isinstance(value, list):
+        return {"type": ["null", "array"]}
+    if isinstance(value, bool):
+        return {"type": ["null", "boolean"]}
+    if isinstance(value, int):
+        return {"type": ["null", "integer"]}
+    if isinstance(value, float):
+        return {"type": ["null", "number"]}
+    return {"type": ["null", "string"]}
+
+
+FIXTURES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "narrow": narrow_record,
+    "wide": wide_record,
+    "nested": nested_record,
+}
+
+
+def time_per_record(run: Callable[[], Any], records: int, repeat: int) -> float:
+    """Best time of `repeat` calls of `run` after a warm-up call, in nanoseconds per record."""
+    run()
+    best = float("inf")
+    # Like timeit, keep garbage collection pauses out of the measurement
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            run()
+            best = min(best, time.perf_counter_ns() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best / records
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: "" if value is None else value for key, value in row.items()})
+
+
+def fixture_benchmarks(name: str, records: List[Dict[str, Any]], workdir: str) -> Dict[str, Callable[[], Any]]:
+    """Benchmarks over one fixture; each call processes every record once."""
+    flattened = [DestinationDust._flatten_record(record) for record in records]
+    flatten_with_schema = RecordFlattener(infer_schema(records[0]))
+    flatten_expanded = RecordFlattener(infer_schema(records[0]), max_depth=2)
+    row_sizes = [DestinationDust._table_row_bytes(row) for row in flattened]
+    csv_path = os.path.join(workdir, f"{name}.csv")
+    write_csv(csv_path, flattened)
+    csv_values = [str(value) for row in flattened for value in row.values() if value is not None]
+
+    def infer_types() -> None:
+        for value in csv_values:
+            infer_column_type(value)
+
+    benchmarks = {
+        "flatten_record": lambda: [DestinationDust._flatten_record(record) for record in records],
+        "flatten_record[schema]": lambda: [flatten_with_schema(record) for record in records],
+        "flatten_record[expanded]": lambda: [flatten_expanded(record) for record in records],
+        "build_document_id[pk]": lambda: [
+            DestinationDust._build_document_id("customers", record, WITH_PRIMARY_KEY) for record in records
+        ],
+        "build_document_id[hash]": lambda: [
+            DestinationDust._build_document_id("customers", record, WITHOUT_PRIMARY_KEY) for record in records
+        ],
+        "table_row_id[pk]": lambda: [DestinationDust._table_row_id(record, WITH_PRIMARY_KEY) for record in records],
+        "table_row_id[hash]": lambda: [
+            DestinationDust._table_row_id(record, WITHOUT_PRIMARY_KEY) for record in records
+        ],
+        "build_title": lambda: [DestinationDust._build_title("customers", record) for record in records],
+        "table_payload_bytes": lambda: DestinationDust._table_payload_bytes(flattened),
+        "chunk_rows_by_payload_size": lambda: DestinationDust._chunk_rows_by_payload_size(
+            flattened, MAX_TABLE_PAYLOAD_BYTES
+        ),
+        "chunk_rows_by_payload_size[sizes]": lambda: DestinationDust._chunk_rows_by_payload_size(
+            flattened, MAX_TABLE_PAYLOAD_BYTES, row_sizes
+        ),
+        "encode_rows": lambda: DustClientBase._encode_rows(flattened),
+        "read_csv_rows": lambda: read_csv_rows(csv_path),
+        # Every value of every record, as read_csv_rows would infer them
+        "infer_column_type": infer_types,
+    }
+    return {f"{benchmark}[{name}]": run for benchmark, run in benchmarks.items()}
+
+
+def run_benchmarks(records: int, repeat: int, name_filter: Optional[str]) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="dust-bench-") as workdir:
+        for fixture, make_record in FIXTURES.items():
+            fixture_records = [make_record(i) for i in range(records)]
+            benchmarks = fixture_benchmarks(fixture, fixture_records, workdir)
+            for name, run in benchmarks.items():
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = time_per_record(run, records, repeat)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print results against the baseline; return the names that regressed beyond the threshold."""
+    regressions = []
+    print(f"{'benchmark':<48}{'ns/record':>12}{'baseline':>12}{'change':>9}")
+    for name, ns in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<48}{ns:>12,.0f}{'-':>12}{'new':>9}")
+            continue
+        change = (ns / previous - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<48}{ns:>12,.0f}{previous:>12,.0f}{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the per-record hot paths")
+    parser.add_argument("--records", type=int, default=2_000, help="Records per fixture (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the best is kept (default: 5)")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results saved by a previous --output")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Slowdown, in percent, reported as a regression (default: 10)"
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.records, args.repeat, args.filter)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("records") != args.records:
+            print(f"Warning: baseline was run with {baseline.get('records')} records per fixture")
+        regressions = compare(results, baseline["results"], args.threshold)
+    else:
+        regressions = []
+        print(f"{'benchmark':<48}{'ns/record':>12}")
+        for name, ns in results.items():
+            print(f"{name:<48}{ns:>12,.0f}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "records": args.records,
+                    "repeat": args.repeat,
+                    "unit": "ns/record",
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+            )
+        print(f"Saved results to {args.output}")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:g}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark stdin decoding: records/s of the fast path vs. the full serializer.
+
+Usage:
+    python scripts/bench_input_decoding.py [--records N] [--fields N] [--repeat N]
+
+Generates RECORD lines (with a STATE message every 1000 records) in memory and
+parses them with DestinationDust._parse_input_stream, and with the previous
+implementation (text line iteration + PatchedAirbyteMessageSerializer on every line).
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import orjson
+
+# Add parent directory to path to import destination_dust
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from destination_dust.destination import DestinationDust, PatchedAirbyteMessageSerializer
+
+
+def generate_input(records: int, fields: int) -> bytes:
+    lines = []
+    for i in range(records):
+        data = {"id": i, **{f"field_{j}": f"value {i} {j}" for j in range(fields)}}
+        lines.append(
+            orjson.dumps(
+                {
+                    "type": "RECORD",
+                    "record": {"stream": "people", "data": data, "emitted_at": 1700000000000 + i},
+                }
+            )
+        )
+        if i % 1000 == 999:
+            lines.append(
+                orjson.dumps(
+                    {
+                        "type": "STATE",
+                        "state": {
+                            "type": "GLOBAL",
+                            "id": i,
+                            "global": {"shared_state": {}, "stream_states": []},
+                        },
+                    }
+                )
+            )
+    return b"\n".join(lines) + b"\n"
+
+
+def parse_with_serializer(input_stream: io.TextIOWrapper) -> Iterable:
+    """The previous implementation of _parse_input_stream."""
+    for line in input_stream:
+        yield PatchedAirbyteMessageSerializer.load(orjson.loads(line))
+
+
+def measure(parse: Callable[[io.TextIOWrapper], Iterable], data: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        input_stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        start = time.perf_counter()
+        for message in parse(input_stream):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stdin decoding")
+    parser.add_argument("--records", type=int, default=100_000, help="Number of records (default: 100000)")
+    parser.add_argument("--fields", type=int, default=10, help="Fields per record (default: 10)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation; the best is kept (default: 3)")
+    args = parser.parse_args()
+
+    data = generate_input(args.records, args.fields)
+    baseline = measure(parse_with_serializer, data, args.repeat)
+    fast_path = measure(DestinationDust()._parse_input_stream, data, args.repeat)
+
+    print(f"{args.records} records, {args.fields} fields each, {len(data) / 1e6:.1f} MB")
+    print(f"serializer: {args.records / baseline:>12,.0f} records/s")
+    print(f"fast path:  {args.records / fast_path:>12,.0f} records/s ({baseline / fast_path:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ The script reads configuration from a .env file in the project root.
 """
 
 import argparse
+import asyncio
 import csv
 import json
 import logging
@@ -17,15 +18,10 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
-try:
-    from dotenv import load_dotenv
-except ImportError:
-    print("Error: python-dotenv is required. Install it with: pip install python-dotenv")
-    sys.exit(1)
-
 # Add parent directory to path to import destination_dust
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from destination_dust.async_client import AsyncDustClient
 from destination_dust.client import DustClient
 
 logging.basicConfig(
@@ -178,6 +174,37 @@ def ensure_title_column(rows: List[Dict[str, Any]], table_name: str) -> None:
             row["title"] = title
 
 
+async def upload_batches_async(
+    config: Dict[str, Any],
+    table_id: str,
+    rows: List[Dict[str, Any]],
+    batch_size: int,
+    concurrency: int,
+) -> None:
+    """
+    Upload rows in batches with up to `concurrency` requests in flight.
+
+    All requests share one AsyncDustClient connection pool on a single event loop.
+    """
+    total_batches = (len(rows) + batch_size - 1) // batch_size
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncDustClient(config, pool_size=concurrency) as client:
+
+        async def upload_batch(batch_num: int, batch: List[Dict[str, Any]]) -> None:
+            async with semaphore:
+                logger.info(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} rows)...")
+                await client.upsert_rows(table_id, batch)
+                logger.info(f"Batch {batch_num} uploaded successfully")
+
+        await asyncio.gather(
+            *(
+                upload_batch((i // batch_size) + 1, rows[i:i + batch_size])
+                for i in range(0, len(rows), batch_size)
+            )
+        )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Import a CSV file into a Dust table",
@@ -213,9 +240,22 @@ Optional variables: DUST_BASE_URL (default: https://dust.tt)
         default=500,
         help="Number of rows to batch per API request (default: 500)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of batches to upload concurrently (default: 1)"
+    )
 
     args = parser.parse_args()
 
+    # Imported here so the CSV helpers can be imported (e.g. by benchmarks) without it
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        print("Error: python-dotenv is required. Install it with: pip install python-dotenv")
+        sys.exit(1)
+
     # Load environment variables from .env file
     env_path = Path(__file__).parent.parent / ".env"
     if not env_path.exists():
@@ -341,18 +381,27 @@ Optional variables: DUST_BASE_URL (default: https://dust.tt)
 
     logger.info(f"Uploading {len(rows)} rows in {total_batches} batch(es)...")
 
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i + batch_size]
-        batch_num = (i // batch_size) + 1
-
-        logger.info(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} rows)...")
-
+    if args.concurrency > 1:
         try:
-            client.upsert_rows(table_id, batch)
-            logger.info(f"Batch {batch_num} uploaded successfully")
+            asyncio.run(
+                upload_batches_async(config, table_id, rows, batch_size, args.concurrency)
+            )
         except Exception as e:
-            logger.error(f"Failed to upload batch {batch_num}: {e}")
+            logger.error(f"Failed to upload rows: {e}")
             sys.exit(1)
+    else:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            batch_num = (i // batch_size) + 1
+
+            logger.info(f"Uploading batch {batch_num}/{total_batches} ({len(batch)} rows)...")
+
+            try:
+                client.upsert_rows(table_id, batch)
+                logger.info(f"Batch {batch_num} uploaded successfully")
+            except Exception as e:
+                logger.error(f"Failed to upload batch {batch_num}: {e}")
+                sys.exit(1)
 
     logger.info(f"Successfully imported {len(rows)} rows into table '{table_id}'")
 
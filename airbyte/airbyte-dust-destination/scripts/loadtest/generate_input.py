@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Airbyte input for load tests.
+
+Usage:
+    python scripts/loadtest/generate_input.py OUTPUT [--records N] [--streams N]
+        [--fields N] [--state-every N] [--catalog PATH] [--sync-mode MODE]
+
+Writes N RECORD lines spread round-robin over --streams streams, with a STATE
+message every --state-every records and at the end, to OUTPUT (one JSON message
+per line, as the destination reads them on stdin). --records accepts suffixes,
+e.g. 2m or 500k. With --catalog, also writes the matching configured catalog,
+whose streams use --sync-mode: append_dedup (default) or overwrite.
+"""
+
+import argparse
+import json
+from typing import Any, Iterator
+
+import orjson
+
+BASE_EMITTED_AT = 1_700_000_000_000
+
+# Destination sync modes of the generated catalog
+SYNC_MODES = ("append_dedup", "overwrite")
+
+
+def parse_count(value: str) -> int:
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = value[-1].lower()
+    if suffix in multipliers:
+        return int(float(value[:-1]) * multipliers[suffix])
+    return int(value)
+
+
+def stream_names(streams: int) -> list:
+    return [f"stream_{i}" for i in range(streams)]
+
+
+def generate_lines(records: int, streams: int, fields: int, state_every: int) -> Iterator[bytes]:
+    names = stream_names(streams)
+    for i in range(records):
+        data: dict[str, Any] = {
+            "id": i,
+            "name": f"Record {i}",
+            "active": i % 2 == 0,
+            "amount": i * 0.25,
+            "address": {"city": "Paris", "zip": f"{75000 + i % 20:05d}"},
+        }
+        for j in range(fields):
+            data[f"field_{j}"] = f"value {i}-{j}"
+        yield orjson.dumps(
+            {
+                "type": "RECORD",
+                "record": {"stream": names[i % streams], "data": data, "emitted_at": BASE_EMITTED_AT + i},
+            }
+        )
+        if (i + 1) % state_every == 0 or i + 1 == records:
+            yield orjson.dumps(
+                {
+                    "type": "STATE",
+                    "state": {
+                        "type": "GLOBAL",
+                        "global": {"shared_state": {"cursor": i}, "stream_states": []},
+                    },
+                }
+            )
+
+
+def configured_catalog(streams: int, destination_sync_mode: str = "append_dedup") -> dict[str, Any]:
+    # Overwrite streams come from full refreshes
+    sync_mode = "full_refresh" if destination_sync_mode == "overwrite" else "incremental"
+    return {
+        "streams": [
+            {
+                "stream": {
+                    "name": name,
+                    "json_schema": {"type": "object"},
+                    "supported_sync_modes": ["full_refresh", "incremental"],
+                },
+                "sync_mode": sync_mode,
+                "destination_sync_mode": destination_sync_mode,
+                "primary_key": [["id"]],
+            }
+            for name in stream_names(streams)
+        ]
+    }
+
+
+def write_input(path: str, records: int, streams: int, fields: int, state_every: int) -> int:
+    """Write the input file; return its size in bytes."""
+    size = 0
+    with open(path, "wb", buffering=1024 * 1024) as output:
+        for line in generate_lines(records, streams, fields, state_every):
+            output.write(line)
+            output.write(b"\n")
+            size += len(line) + 1
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic Airbyte input")
+    parser.add_argument("output", help="Path of the JSONL input file to write")
+    parser.add_argument("--records", type=parse_count, default=1_000_000, help="Number of records, e.g. 2m (default: 1m)")
+    parser.add_argument("--streams", type=int, default=4, help="Number of streams (default: 4)")
+    parser.add_argument("--fields", type=int, default=10, help="Extra string fields per record (default: 10)")
+    parser.add_argument("--state-every", type=int, default=10_000, help="Records between STATE messages (default: 10000)")
+    parser.add_argument("--catalog", help="Also write the configured catalog to this path")
+    parser.add_argument("--sync-mode", choices=SYNC_MODES, default="append_dedup", help="Destination sync mode of the catalog's streams (default: append_dedup)")
+    args = parser.parse_args()
+
+    size = write_input(args.output, args.records, args.streams, args.fields, args.state_every)
+    print(f"Wrote {args.records} records ({size / 1e6:.1f} MB) to {args.output}")
+    if args.catalog:
+        with open(args.catalog, "w") as catalog_file:
+            json.dump(configured_catalog(args.streams, args.sync_mode), catalog_file, indent=2)
+        print(f"Wrote configured catalog to {args.catalog}")
+
+
+if __name__ == "__main__":
+    main()
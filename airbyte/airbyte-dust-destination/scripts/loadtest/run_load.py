@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Drive `main.py write` end to end against the local Dust stand-in and report throughput.
+
+Usage:
+    python scripts/loadtest/run_load.py [--records N] [--formats documents,tables]
+        [--latency-ms MS] [--rate-limit-every N] [--max-payload-bytes BYTES]
+        [--sync-mode MODE] [--config '{"max_concurrency": 32}']
+
+Starts stub_server.py in-process, generates the input with generate_input.py, then
+runs the connector as a subprocess for each data format, feeding the input on
+stdin. For each run it reports records/s, requests/s, bytes sent, 429/413
+responses and the peak RSS of the connector process, and checks that every
+record reached the stub and every STATE message was emitted.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+from generate_input import SYNC_MODES, configured_catalog, parse_count, write_input
+from stub_server import create_server
+
+MAIN_PY = Path(__file__).resolve().parent.parent.parent / "main.py"
+
+
+def fetch_stats(base_url: str) -> dict[str, int]:
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def run_write(config_path: str, catalog_path: str, input_path: str) -> tuple:
+    """Run `main.py write`; return (seconds, peak RSS in bytes, STATE messages emitted, exit code)."""
+    states = 0
+    start = time.perf_counter()
+    with open(input_path, "rb") as stdin:
+        process = subprocess.Popen(
+            [sys.executable, str(MAIN_PY), "write", "--config", config_path, "--catalog", catalog_path],
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+        )
+        for line in process.stdout:
+            if line.startswith(b'{"type":"STATE"'):
+                states += 1
+        _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return seconds, peak_rss, states, os.waitstatus_to_exitcode(status)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load test against a local Dust stand-in")
+    parser.add_argument("--records", type=parse_count, default=100_000, help="Number of records, e.g. 1m (default: 100k)")
+    parser.add_argument("--streams", type=int, default=4, help="Number of streams (default: 4)")
+    parser.add_argument("--fields", type=int, default=10, help="Extra string fields per record (default: 10)")
+    parser.add_argument("--state-every", type=int, default=10_000, help="Records between STATE messages (default: 10000)")
+    parser.add_argument("--formats", default="documents,tables", help="Data formats to run (default: documents,tables)")
+    parser.add_argument("--latency-ms", type=float, default=5, help="Stub latency per request (default: 5)")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Stub answers 429 to every Nth request (default: never)")
+    parser.add_argument("--max-payload-bytes", type=int, default=0, help="Stub answers 413 above this body size (default: no limit)")
+    parser.add_argument("--sync-mode", choices=SYNC_MODES, default="append_dedup", help="Destination sync mode of the streams (default: append_dedup)")
+    parser.add_argument("--config", default="{}", help="JSON object merged into the connector config")
+    args = parser.parse_args()
+
+    server = create_server(0, args.latency_ms / 1000, args.rate_limit_every, args.max_payload_bytes)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory(prefix="dust-load-") as workdir:
+        input_path = os.path.join(workdir, "input.jsonl")
+        catalog_path = os.path.join(workdir, "catalog.json")
+        input_bytes = write_input(input_path, args.records, args.streams, args.fields, args.state_every)
+        expected_states = -(-args.records // args.state_every)
+        with open(catalog_path, "w") as catalog_file:
+            json.dump(configured_catalog(args.streams, args.sync_mode), catalog_file)
+        print(
+            f"{args.records} records ({input_bytes / 1e6:.1f} MB) over {args.streams} stream(s), "
+            f"stub latency {args.latency_ms:g} ms"
+        )
+
+        results: list[dict[str, Any]] = []
+        for data_format in args.formats.split(","):
+            config = {
+                "api_key": "sk-load-test",
+                "workspace_id": "w-load",
+                "space_id": "s-load",
+                "data_source_id": "ds-load",
+                "base_url": base_url,
+                "data_format": data_format,
+                **json.loads(args.config),
+            }
+            config_path = os.path.join(workdir, f"config-{data_format}.json")
+            with open(config_path, "w") as config_file:
+                json.dump(config, config_file)
+
+            before = fetch_stats(base_url)
+            seconds, peak_rss, states, exit_code = run_write(config_path, catalog_path, input_path)
+            after = fetch_stats(base_url)
+            delta = {key: after[key] - before[key] for key in after if key != "max_in_flight"}
+            delivered = delta["documents"] if data_format == "documents" else delta["rows"]
+            results.append(
+                {
+                    "format": data_format,
+                    "records/s": args.records / seconds,
+                    "requests/s": delta["requests"] / seconds,
+                    "MB sent": delta["bytes_received"] / 1e6,
+                    "peak RSS MB": peak_rss / 1e6,
+                    "429s": delta["rate_limited"],
+                    "413s": delta["payload_too_large"],
+                    "seconds": seconds,
+                    "ok": exit_code == 0 and delivered == args.records and states == expected_states,
+                }
+            )
+
+    server.shutdown()
+    columns = ["format", "records/s", "requests/s", "MB sent", "peak RSS MB", "429s", "413s", "seconds", "ok"]
+    print("".join(f"{column:>13}" for column in columns))
+    for result in results:
+        print(
+            "".join(
+                f"{result[column]:>13,.1f}" if isinstance(result[column], float) else f"{str(result[column]):>13}"
+                for column in columns
+            )
+        )
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
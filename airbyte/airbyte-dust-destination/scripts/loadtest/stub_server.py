@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Dust API endpoints used by the destination.
+
+Usage:
+    python scripts/loadtest/stub_server.py [--port PORT] [--latency-ms MS]
+        [--rate-limit-every N] [--max-payload-bytes BYTES]
+
+Implements, for any workspace, space and data source:
+    GET    .../documents?limit=N&offset=M            (connection check, list documents)
+    POST   .../documents/{document_id}               (document upsert)
+    DELETE .../documents/{document_id}               (document delete)
+    GET    .../tables?limit=N&offset=M               (list tables, paginated)
+    POST   .../tables                                (table upsert)
+    GET    .../tables/{table_id}/rows?limit=N&offset=M  (list rows, paginated)
+    POST   .../tables/{table_id}/rows                (row upsert)
+    DELETE .../tables/{table_id}/rows/{row_id}       (row delete)
+    GET    /__stats                                  (request, byte and error counters)
+
+Upserted document ids (with their tags) and row ids are kept, so that overwrite
+syncs can list them and delete the stale ones.
+
+Every request waits --latency-ms first. Every Nth request answers 429 with
+Retry-After: 1 when --rate-limit-every is set, and request bodies larger than
+--max-payload-bytes answer 413. Set --port 0 to pick a free port; the listening
+URL is printed on stdout.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Any, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+_DATA_SOURCE_PATH = r"^/api/v1/w/[^/]+/spaces/[^/]+/data_sources/[^/]+"
+_DOCUMENTS = re.compile(_DATA_SOURCE_PATH + r"/documents(?:/(?P<document_id>[^/]+))?$")
+_TABLES = re.compile(_DATA_SOURCE_PATH + r"/tables$")
+_ROWS = re.compile(_DATA_SOURCE_PATH + r"/tables/(?P<table_id>[^/]+)/rows(?:/(?P<row_id>[^/]+))?$")
+
+
+def _page(ids: dict[str, Any], query: dict) -> list:
+    """The ids of a `limit`/`offset` page of an insertion-ordered dict."""
+    limit = int(query.get("limit", ["100"])[0])
+    offset = int(query.get("offset", ["0"])[0])
+    return list(islice(ids, offset, offset + limit))
+
+
+class StubState:
+    """Tables, documents, rows and counters shared by every request handler thread."""
+
+    def __init__(self, latency: float, rate_limit_every: int, max_payload_bytes: int):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.max_payload_bytes = max_payload_bytes
+        self.tables: dict[str, dict[str, Any]] = {}
+        # document_id -> tags
+        self.documents: dict[str, list] = {}
+        # table_id -> row ids (values unused: an insertion-ordered set)
+        self.rows: dict[str, dict[str, None]] = {}
+        self.stats = {
+            "requests": 0,
+            "bytes_received": 0,
+            "documents": 0,
+            "rows": 0,
+            "deleted": 0,
+            "rate_limited": 0,
+            "payload_too_large": 0,
+            "max_in_flight": 0,
+        }
+        self._in_flight = 0
+        self.lock = threading.Lock()
+
+    def begin(self, body_bytes: int) -> Optional[int]:
+        """Count a request; return an error status to answer with, if any."""
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_received"] += body_bytes
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+            if self.rate_limit_every and self.stats["requests"] % self.rate_limit_every == 0:
+                self.stats["rate_limited"] += 1
+                return 429
+            if self.max_payload_bytes and body_bytes > self.max_payload_bytes:
+                self.stats["payload_too_large"] += 1
+                return 413
+        return None
+
+    def end(self) -> None:
+        with self.lock:
+            self._in_flight -= 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle / delayed-ACK stalls
+    disable_nagle_algorithm = True
+    state: StubState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    def _handle(self, method: str) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            with self.state.lock:
+                self._reply(200, dict(self.state.stats))
+            return
+
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        error = self.state.begin(len(body))
+        try:
+            if error == 429:
+                self._reply(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            elif error == 413:
+                self._reply(413, {"error": "payload too large"})
+            else:
+                self._route(method, url.path, parse_qs(url.query), body)
+        finally:
+            self.state.end()
+
+    def _route(self, method: str, path: str, query: dict, body: bytes) -> None:
+        match = _DOCUMENTS.match(path)
+        if match and method == "GET" and not match["document_id"]:
+            with self.state.lock:
+                documents = [
+                    {"document_id": document_id, "tags": self.state.documents[document_id]}
+                    for document_id in _page(self.state.documents, query)
+                ]
+            self._reply(200, {"documents": documents})
+            return
+        if match and method == "POST" and match["document_id"]:
+            tags = json.loads(body).get("tags") or []
+            with self.state.lock:
+                self.state.stats["documents"] += 1
+                self.state.documents[match["document_id"]] = tags
+            self._reply(200, {"document": {"document_id": match["document_id"]}})
+            return
+        if match and method == "DELETE" and match["document_id"]:
+            with self.state.lock:
+                deleted = self.state.documents.pop(match["document_id"], None) is not None
+                if deleted:
+                    self.state.stats["deleted"] += 1
+            self._reply(200 if deleted else 404, {"deleted": deleted})
+            return
+
+        if _TABLES.match(path) and method == "GET":
+            limit = int(query.get("limit", ["100"])[0])
+            offset = int(query.get("offset", ["0"])[0])
+            with self.state.lock:
+                tables = list(self.state.tables.values())[offset:offset + limit]
+            self._reply(200, {"tables": tables})
+            return
+        if _TABLES.match(path) and method == "POST":
+            payload = json.loads(body)
+            table_id = payload.get("table_id") or uuid.uuid4().hex
+            table = {"table_id": table_id, "name": payload.get("name"), "title": payload.get("title")}
+            with self.state.lock:
+                self.state.tables[table_id] = table
+            self._reply(200, {"table": table})
+            return
+
+        match = _ROWS.match(path)
+        if match:
+            with self.state.lock:
+                known = match["table_id"] in self.state.tables
+            if not known:
+                self._reply(404, {"error": "table not found"})
+                return
+        if match and method == "POST" and not match["row_id"]:
+            rows = json.loads(body)["rows"]
+            with self.state.lock:
+                self.state.stats["rows"] += len(rows)
+                table_rows = self.state.rows.setdefault(match["table_id"], {})
+                for row in rows:
+                    table_rows[str(row["row_id"])] = None
+            self._reply(200, {"table": {"table_id": match["table_id"]}, "rows": len(rows)})
+            return
+        if match and method == "GET" and not match["row_id"]:
+            with self.state.lock:
+                row_ids = _page(self.state.rows.get(match["table_id"], {}), query)
+            self._reply(200, {"rows": [{"row_id": row_id} for row_id in row_ids]})
+            return
+        if match and method == "DELETE" and match["row_id"]:
+            with self.state.lock:
+                table_rows = self.state.rows.get(match["table_id"], {})
+                row_id = unquote(match["row_id"])
+                deleted = row_id in table_rows
+                if deleted:
+                    del table_rows[row_id]
+                    self.state.stats["deleted"] += 1
+            self._reply(200 if deleted else 404, {"deleted": deleted})
+            return
+
+        self._reply(404, {"error": f"unknown endpoint {method} {path}"})
+
+    def _reply(self, status: int, body: Any, headers: Optional[dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(
+    port: int = 0,
+    latency: float = 0.0,
+    rate_limit_every: int = 0,
+    max_payload_bytes: int = 0,
+) -> ThreadingHTTPServer:
+    """Create (without starting) a stub server on 127.0.0.1; see `server.stub_state` for counters."""
+    state = StubState(latency, rate_limit_every, max_payload_bytes)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stub_state = state
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Dust API")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on, 0 for any (default: 8765)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every request (default: 0)")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer 429 to every Nth request (default: never)")
+    parser.add_argument("--max-payload-bytes", type=int, default=0, help="Answer 413 to larger request bodies (default: no limit)")
+    args = parser.parse_args()
+
+    server = create_server(args.port, args.latency_ms / 1000, args.rate_limit_every, args.max_payload_bytes)
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from unittest import mock
+
+import httpx
+import pytest
+
+from destination_dust.async_client import AsyncDustClient
+
+
+config = {
+    "api_key": "sk-test",
+    "workspace_id": "w1",
+    "space_id": "s1",
+    "data_source_id": "ds1",
+    "base_url": "https://dust.tt",
+}
+
+TABLES_URL = "https://dust.tt/api/v1/w/w1/spaces/s1/data_sources/ds1/tables"
+DOCUMENTS_URL = "https://dust.tt/api/v1/w/w1/spaces/s1/data_sources/ds1/documents"
+
+
+def _client(handler) -> AsyncDustClient:
+    """Build an AsyncDustClient whose requests are answered by `handler`."""
+    client = AsyncDustClient(config)
+    client._client = httpx.AsyncClient(
+        headers=client._headers, transport=httpx.MockTransport(handler)
+    )
+    return client
+
+
+async def _no_sleep(delay):
+    return None
+
+
+def test_upsert_document_posts_payload():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"document": {"document_id": "doc-1"}})
+
+    async def run():
+        async with _client(handler) as client:
+            return await client.upsert_document(
+                document_id="doc-1", title="Doc", text="{}", tags=["t"], timestamp=1
+            )
+
+    result = asyncio.run(run())
+    assert result == {"document": {"document_id": "doc-1"}}
+    assert len(requests) == 1
+    assert str(requests[0].url) == f"{DOCUMENTS_URL}/doc-1"
+    assert requests[0].headers["Authorization"] == "Bearer sk-test"
+    body = json.loads(requests[0].content)
+    assert body["title"] == "Doc"
+    assert body["tags"] == ["t"]
+    assert body["timestamp"] == 1
+
+
+def test_upsert_rows_formats_rows():
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    async def run():
+        async with _client(handler) as client:
+            await client.upsert_rows("t1", [{"id": 1, "name": "Alice"}])
+
+    asyncio.run(run())
+    assert bodies == [{"rows": [{"row_id": "1", "value": {"id": 1, "name": "Alice"}}]}]
+
+
+@mock.patch("destination_dust.async_client.asyncio.sleep", _no_sleep)
+def test_retries_retryable_statuses():
+    statuses = iter([503, 429, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(next(statuses), json={"tables": [{"title": "people", "id": "t1"}]})
+
+    async def run():
+        async with _client(handler) as client:
+            return await client.find_table_by_title("people")
+
+    assert asyncio.run(run()) == "t1"
+
+
+@mock.patch("destination_dust.async_client.asyncio.sleep", _no_sleep)
+def test_raises_once_retries_are_exhausted():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429)
+
+    async def run():
+        async with _client(handler) as client:
+            await client.list_tables()
+
+    with pytest.raises(RuntimeError, match="Rate limited"):
+        asyncio.run(run())
+
+
+def test_check_connection_authentication_failure():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert str(request.url) == TABLES_URL
+        return httpx.Response(401)
+
+    async def run():
+        async with _client(handler) as client:
+            await client.check_connection(data_format="tables")
+
+    with pytest.raises(ConnectionError, match="Authentication failed"):
+        asyncio.run(run())
+
+
+def test_many_requests_in_flight_on_one_loop():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={})
+
+    async def run():
+        async with _client(handler) as client:
+            await asyncio.gather(
+                *(
+                    client.upsert_document(document_id=f"doc-{i}", title="t", text="{}")
+                    for i in range(200)
+                )
+            )
+
+    asyncio.run(run())
+    assert peak == 200
@@ -0,0 +1,50 @@
+from destination_dust.batch_sizer import MIN_BATCH_BYTES, AdaptiveBatchSizer
+
+MAX_BYTES = 1024 * 1024
+
+
+def test_batches_grow_while_requests_are_fast():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=100_000, target_seconds=2.0)
+    for _ in range(50):
+        sizer.observe("people", sizer.batch_bytes("people"), rows=100, seconds=0.1)
+    assert sizer.batch_bytes("people") == MAX_BYTES
+
+
+def test_batches_shrink_in_proportion_to_slow_requests():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=400_000, target_seconds=2.0)
+    sizer.observe("people", 400_000, rows=100, seconds=8.0)
+    assert sizer.batch_bytes("people") == 100_000
+
+
+def test_partial_batches_do_not_grow_the_batch_size():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=100_000)
+    sizer.observe("people", 1_000, rows=1, seconds=0.01)
+    assert sizer.batch_bytes("people") == 100_000
+
+
+def test_too_large_halves_and_caps_growth_below_failed_size():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=400_000, target_seconds=2.0)
+    sizer.shrink("people", 400_000)
+    assert sizer.batch_bytes("people") == 200_000
+    for _ in range(50):
+        sizer.observe("people", sizer.batch_bytes("people"), rows=100, seconds=0.1)
+    assert sizer.batch_bytes("people") == 399_999
+    # Other streams are unaffected
+    assert sizer.batch_bytes("companies") == 400_000
+
+
+def test_batch_size_never_drops_below_minimum():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=MIN_BATCH_BYTES)
+    sizer.shrink("people", MIN_BATCH_BYTES)
+    sizer.observe("people", MIN_BATCH_BYTES, rows=1, seconds=100.0)
+    assert sizer.batch_bytes("people") == MIN_BATCH_BYTES
+
+
+def test_summary_reports_converged_size_per_stream():
+    sizer = AdaptiveBatchSizer(MAX_BYTES, initial_bytes=100_000, target_seconds=2.0)
+    sizer.observe("people", 100_000, rows=1_000, seconds=1.5)
+    sizer.batch_bytes("unused")
+    assert sizer.summary() == [
+        "Adaptive batching for people: 100000 bytes per request (~1000 rows) after 1 request(s), "
+        "1.50s average, 0 too large or timed out"
+    ]
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from destination_dust.cache import LocalCache
+
+
+def test_staged_fingerprints_are_spilled_in_bounded_chunks(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LocalCache(path, "w/s/ds")
+    with mock.patch("destination_dust.cache.STAGE_CHUNK_SIZE", 3):
+        for i in range(10):
+            assert not cache.unchanged(f"doc-{i}", i)
+            assert len(cache._staged) < 3
+        # Spilled and in-memory fingerprints are both seen before they are committed
+        assert cache.unchanged("doc-0", 0) and cache.unchanged("doc-9", 9)
+        assert not cache.unchanged("doc-1", 100)
+        cache.commit()
+    cache.close()
+
+    reopened = LocalCache(path, "w/s/ds")
+    assert reopened.unchanged("doc-1", 100)
+    assert all(reopened.unchanged(f"doc-{i}", i) for i in range(2, 10))
+    assert reopened.sent == 0
+
+
+def test_uncommitted_fingerprints_are_not_persisted(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LocalCache(path, "w/s/ds")
+    with mock.patch("destination_dust.cache.STAGE_CHUNK_SIZE", 2):
+        for i in range(5):
+            cache.unchanged(f"doc-{i}", i)
+    # e.g. table ids saved mid-sync commit the connection's transaction
+    cache.save_table_ids({"people": "t1"})
+    cache.close()
+
+    reopened = LocalCache(path, "w/s/ds")
+    assert not any(reopened.unchanged(f"doc-{i}", i) for i in range(5))
+    assert reopened.load_table_ids() == {"people": "t1"}
@@ -0,0 +1,211 @@
+import http.server
+import json
+import threading
+from unittest import mock
+
+import pytest
+
+from airbyte_cdk.models import Level
+
+from destination_dust.client import (
+    LIST_ROWS_PAGE_SIZE,
+    LIST_TABLES_PAGE_SIZE,
+    DustClient,
+    PayloadTooLargeError,
+    encode_row,
+    rows_payload,
+)
+from destination_dust.log_buffer import LogBuffer
+from destination_dust.metrics import SyncMetrics
+from destination_dust.rate_limiter import RATE_LIMIT_RETRIES
+
+
+config = {
+    "api_key": "sk-test",
+    "workspace_id": "w1",
+    "space_id": "s1",
+    "data_source_id": "ds1",
+    "base_url": "https://dust.tt",
+}
+
+
+def _response(status_code: int, body) -> mock.Mock:
+    response = mock.Mock(status_code=status_code, text=str(body), headers={})
+    response.json.return_value = body
+    return response
+
+
+def _tables(start: int, count: int) -> list:
+    return [{"table_id": f"t{i}", "title": f"table {i}"} for i in range(start, start + count)]
+
+
+def test_list_tables_follows_pagination():
+    client = DustClient(config)
+    pages = [
+        _response(200, {"tables": _tables(0, LIST_TABLES_PAGE_SIZE)}),
+        _response(200, {"tables": _tables(LIST_TABLES_PAGE_SIZE, 5)}),
+    ]
+    with mock.patch.object(client._session, "get", side_effect=pages) as get:
+        tables = client.list_tables()
+    assert len(tables) == LIST_TABLES_PAGE_SIZE + 5
+    assert get.call_args_list[1][0][0].endswith(f"offset={LIST_TABLES_PAGE_SIZE}")
+
+
+def test_list_tables_stops_when_offset_is_ignored():
+    client = DustClient(config)
+    page = _response(200, {"tables": _tables(0, LIST_TABLES_PAGE_SIZE)})
+    with mock.patch.object(client._session, "get", return_value=page) as get:
+        tables = client.list_tables()
+    assert len(tables) == LIST_TABLES_PAGE_SIZE
+    assert get.call_count == 2
+
+
+def test_iter_row_ids_follows_pagination():
+    client = DustClient(config)
+    rows = [{"row_id": f"r{i}", "value": {}} for i in range(LIST_ROWS_PAGE_SIZE + 2)]
+    pages = [
+        _response(200, {"rows": rows[:LIST_ROWS_PAGE_SIZE]}),
+        _response(200, {"rows": rows[LIST_ROWS_PAGE_SIZE:]}),
+    ]
+    with mock.patch.object(client._session, "get", side_effect=pages) as get:
+        row_ids = list(client.iter_row_ids("t1"))
+    assert row_ids == [row["row_id"] for row in rows]
+    assert get.call_args_list[1][0][0].endswith(f"/tables/t1/rows?limit={LIST_ROWS_PAGE_SIZE}&offset={LIST_ROWS_PAGE_SIZE}")
+
+
+def test_delete_row_quotes_row_id_and_ignores_missing_rows():
+    client = DustClient(config)
+    with mock.patch.object(client._session, "delete", return_value=_response(404, {})) as delete:
+        client.delete_row("t1", "Alice Smith/1")
+    assert delete.call_args[0][0].endswith("/tables/t1/rows/Alice%20Smith%2F1")
+
+    with mock.patch.object(client._session, "delete", return_value=_response(500, {})):
+        with pytest.raises(RuntimeError, match="Failed to delete row"):
+            client.delete_row("t1", "r1")
+
+
+def test_build_table_index_maps_titles_to_ids():
+    client = DustClient(config)
+    page = _response(
+        200,
+        [
+            {"id": "t1", "title": "people"},
+            {"table_id": "t2", "name": "companies"},
+            {"id": "t3", "title": "people"},
+        ],
+    )
+    with mock.patch.object(client._session, "get", return_value=page):
+        assert client.build_table_index() == {"people": "t1", "companies": "t2"}
+
+
+def test_debug_previews_are_skipped_when_debug_is_disabled():
+    log_buffer = LogBuffer(min_level="INFO")
+    client = DustClient(config, log_callback=log_buffer)
+    with mock.patch.object(client._session, "post", return_value=_response(200, {})), \
+            mock.patch("destination_dust.client.json.dumps") as dumps:
+        client.upsert_rows("t1", [{"id": 1, "name": "Alice"}])
+    dumps.assert_not_called()
+    assert [m.log.level for m in log_buffer.drain()] == [Level.INFO, Level.INFO]
+
+
+def test_log_buffer_drops_oldest_messages_when_full():
+    log_buffer = LogBuffer(min_level="DEBUG", capacity=2)
+    for i in range(5):
+        log_buffer(f"message {i}", "DEBUG")
+    messages = [m.log.message for m in log_buffer.drain()]
+    assert messages == [
+        "Dropped 3 log message(s) because the log buffer was full",
+        "message 3",
+        "message 4",
+    ]
+    assert log_buffer.dropped == 3
+    assert len(log_buffer) == 0
+
+
+def test_rate_limited_requests_are_retried_with_backoff():
+    client = DustClient(config)
+    responses = [
+        mock.Mock(status_code=429, text="", headers={"Retry-After": "2"}),
+        _response(200, {"document": {"document_id": "doc-1"}}),
+    ]
+    with mock.patch.object(client._session, "post", side_effect=responses) as post, \
+            mock.patch("time.sleep") as sleep:
+        result = client.upsert_document(document_id="doc-1", title="Doc", text="{}")
+    assert result == {"document": {"document_id": "doc-1"}}
+    assert post.call_count == 2
+    # The jittered backoff never undercuts Retry-After
+    assert max(c[0][0] for c in sleep.call_args_list) >= 2
+    assert client.rate_limiter.rate_limited == 1
+
+
+def test_rate_limit_error_once_attempts_are_exhausted():
+    client = DustClient(config)
+    with mock.patch.object(client._session, "post", return_value=mock.Mock(status_code=429, text="", headers={})), \
+            mock.patch("time.sleep"):
+        with pytest.raises(RuntimeError, match="Rate limited"):
+            client.upsert_rows("t1", [{"id": 1}])
+
+
+def test_upsert_encoded_rows_sends_the_joined_rows_as_is():
+    client = DustClient(config)
+    encoded_rows = [encode_row("1", {"id": 1, "name": "Alice"}), encode_row("2", {"id": 2, "big": 1 << 70})]
+    with mock.patch.object(client._session, "post", return_value=_response(200, {})) as post:
+        client.upsert_encoded_rows("t1", encoded_rows)
+    body = post.call_args.kwargs["data"]
+    assert body == rows_payload(encoded_rows)
+    assert len(body) == len(b'{"rows":[]}') + sum(map(len, encoded_rows)) + 1
+    assert json.loads(body)["rows"][1] == {"row_id": "2", "value": {"id": 2, "big": 1 << 70}}
+
+
+def test_upsert_rows_raises_payload_too_large_on_413():
+    client = DustClient(config)
+    with mock.patch.object(client._session, "post", return_value=_response(413, "too large")):
+        with pytest.raises(PayloadTooLargeError):
+            client.upsert_rows("t1", [{"id": 1}])
+
+
+def test_responses_are_counted_in_instrumented_upserts():
+    client = DustClient(config)
+    metrics = SyncMetrics()
+    responses = [
+        mock.Mock(status_code=429, text="", headers={"Retry-After": "0"}),
+        _response(200, {"rows": 1}),
+    ]
+    with mock.patch.object(client._session, "post", side_effect=responses), mock.patch("time.sleep"):
+        metrics.instrument("people", client.upsert_rows, rows=1)("t1", [{"id": 1}])
+    stream = metrics.stream("people")
+    assert (stream.requests, stream.retries, stream.rate_limited, stream.rows_sent) == (1, 1, 1, 1)
+    assert stream.request_latency.count == 1
+
+
+class _RateLimitedHandler(http.server.BaseHTTPRequestHandler):
+    requests_received = 0
+
+    def do_POST(self):
+        type(self).requests_received += 1
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_every_429_goes_through_the_rate_limiter():
+    # A real server, so that urllib3's own retry logic runs
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RateLimitedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = DustClient({**config, "base_url": f"http://127.0.0.1:{server.server_port}"})
+        with mock.patch.object(
+            client.rate_limiter, "on_response", wraps=client.rate_limiter.on_response
+        ) as on_response, mock.patch("time.sleep"):
+            with pytest.raises(RuntimeError, match="Rate limited"):
+                client.upsert_rows("t1", [{"id": 1}])
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert _RateLimitedHandler.requests_received == RATE_LIMIT_RETRIES
+    assert on_response.call_count == RATE_LIMIT_RETRIES
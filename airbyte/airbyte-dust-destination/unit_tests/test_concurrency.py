@@ -0,0 +1,68 @@
+import threading
+import time
+
+from destination_dust.concurrency import MIN_WINDOW_SAMPLES, ConcurrencyController
+from destination_dust.rate_limiter import AdaptiveRateLimiter
+from destination_dust.uploader import OrderedUploader
+
+
+def _window(controller: ConcurrencyController, seconds: float, failed: bool = False) -> None:
+    for _ in range(max(controller.limit, MIN_WINDOW_SAMPLES)):
+        controller.on_sample(seconds, failed=failed)
+
+
+def test_limit_grows_while_latency_is_flat():
+    messages = []
+    controller = ConcurrencyController(8, initial_limit=2, log_callback=lambda m, level: messages.append(m))
+    for _ in range(10):
+        _window(controller, 0.1)
+    assert controller.limit == 8
+    assert messages[0].startswith("Upload concurrency 2 -> 3 (flat latency")
+
+
+def test_limit_backs_off_when_latency_rises():
+    controller = ConcurrencyController(64, initial_limit=20)
+    _window(controller, 0.1)
+    assert controller.limit == 21
+    _window(controller, 0.6)
+    # Scaled by baseline * tolerance / average
+    assert controller.limit < 21
+    assert controller.limit >= 1
+
+
+def test_limit_halves_on_failures_and_rate_limiting():
+    rate_limiter = AdaptiveRateLimiter()
+    controller = ConcurrencyController(64, initial_limit=16, rate_limiter=rate_limiter)
+    _window(controller, 0.1, failed=True)
+    assert controller.limit == 8
+    rate_limiter.on_response(429, {})
+    _window(controller, 0.1)
+    assert controller.limit == 4
+    rate_limiter.on_response(503, {})
+    _window(controller, 0.1)
+    assert controller.limit == 2
+    assert "3 change(s)" in controller.summary()
+
+
+def test_uploader_caps_in_flight_calls_at_controller_limit():
+    controller = ConcurrencyController(16, initial_limit=2)
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.005)
+        with lock:
+            in_flight -= 1
+
+    with OrderedUploader(16, controller) as uploader:
+        for i in range(MIN_WINDOW_SAMPLES - 1):
+            uploader.submit(str(i), call)
+        uploader.drain()
+    # The first window is not complete, so the limit has not changed yet
+    assert peak <= 2
+    assert controller.limit == 2
@@ -2,15 +2,33 @@
 # Copyright (c) 2023 Airbyte, Inc., all rights reserved.
 #
 
+import asyncio
+import http.server
 import json
+import random
+import threading
+import time
 from typing import Any, Dict
 from unittest import mock
 from unittest.mock import Mock
 
+import pytest
+
+from destination_dust.batch_sizer import AdaptiveBatchSizer
+from destination_dust.client import (
+    DustClient,
+    PayloadTooLargeError,
+    TableNotFoundError,
+    content_row_id,
+    encode_row,
+)
 from destination_dust.destination import (
     DestinationDust,
     MAX_TABLE_PAYLOAD_BYTES,
+    PatchedAirbyteMessageSerializer,
+    _serialize_message,
 )
+from destination_dust.metrics import current_request
 
 from airbyte_cdk.models import AirbyteConnectionStatus, AirbyteMessage, Status, Type
 from airbyte_cdk.models.airbyte_protocol import (
@@ -40,6 +58,11 @@ def _init_mocks(client_init):
     return mock_client
 
 
+def _sent_rows(call) -> list:
+    """Rows of an upsert_encoded_rows call, decoded: (table_id, encoded rows)."""
+    return [json.loads(row)["value"] for row in call[0][1]]
+
+
 def _state() -> AirbyteMessage:
     return AirbyteMessage(type=Type.STATE, state=AirbyteStateMessage(data={}))
 
@@ -175,6 +198,177 @@ def test_write_processes_message_from_unknown_stream(client_init):
     assert call_kwargs["tags"] == ["airbyte:stream:shapes"]
 
 
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_concurrently_keeps_per_document_order(client_init):
+    """Updates to the same document are applied in order even with concurrent workers."""
+    mock_client = _init_mocks(client_init)
+    applied: Dict[str, list] = {}
+    lock = threading.Lock()
+
+    def upsert_document(document_id, text, **kwargs):
+        time.sleep(random.random() / 1000)
+        with lock:
+            applied.setdefault(document_id, []).append(json.loads(text)["version"])
+
+    mock_client.upsert_document.side_effect = upsert_document
+    input_messages = [
+        _record(stream="people", data={"id": i % 5, "version": i}) for i in range(100)
+    ]
+    input_messages.append(_state())
+    destination = DestinationDust()
+    output = list(
+        destination.write(
+            config={**config, "max_concurrency": 8},
+            configured_catalog=_configured_catalog(),
+            input_messages=input_messages,
+        )
+    )
+    for document_id, versions in applied.items():
+        assert versions == sorted(versions)
+        # Versions superseded while waiting may be skipped, never the last one
+        assert versions[-1] == 95 + int(document_id.rsplit("-", 1)[1])
+    # Every record is either upserted or collapsed into a later version
+    (state,) = [m.state for m in output if m.type == Type.STATE]
+    collapsed = state.destinationStats.streams["people"]["recordsCollapsed"]
+    assert mock_client.upsert_document.call_count + collapsed == 100
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_state_waits_for_earlier_records(client_init):
+    """A STATE message is only yielded after every earlier record is acknowledged."""
+    mock_client = _init_mocks(client_init)
+    acknowledged = []
+
+    def upsert_document(document_id, **kwargs):
+        time.sleep(0.01)
+        acknowledged.append(document_id)
+
+    mock_client.upsert_document.side_effect = upsert_document
+    input_messages = [_record(stream="people", data={"id": i}) for i in range(10)]
+    input_messages.append(_state())
+    input_messages.extend(_record(stream="people", data={"id": i}) for i in range(10, 15))
+    input_messages.append(_state())
+    destination = DestinationDust()
+    acknowledged_at_state = []
+    for message in destination.write(
+        config={**config, "max_concurrency": 4},
+        configured_catalog=_configured_catalog(),
+        input_messages=input_messages,
+    ):
+        if message.type == Type.STATE:
+            acknowledged_at_state.append(len(acknowledged))
+    assert acknowledged_at_state == [10, 15]
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_surfaces_upsert_failures(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.upsert_document.side_effect = RuntimeError("Failed to upsert document")
+    input_messages = [_record(stream="people", data={"id": 1}), _state()]
+    destination = DestinationDust()
+    with pytest.raises(RuntimeError, match="Failed to upsert document"):
+        for message in destination.write(
+            config=config,
+            configured_catalog=_configured_catalog(),
+            input_messages=input_messages,
+        ):
+            assert message.type != Type.STATE
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_with_auto_concurrency_logs_limit(client_init):
+    mock_client = _init_mocks(client_init)
+    input_messages = [_record(stream="people", data={"id": i}) for i in range(50)]
+    input_messages.append(_state())
+    output = list(
+        DestinationDust().write(
+            config={**config, "auto_concurrency": True, "max_concurrency": 32},
+            configured_catalog=_configured_catalog(),
+            input_messages=input_messages,
+        )
+    )
+    assert mock_client.upsert_document.call_count == 50
+    logs = [m.log.message for m in output if m.type == Type.LOG]
+    assert any(message.startswith("Upload concurrency 4 -> ") for message in logs)
+    assert any(message.startswith("Upload concurrency settled at") for message in logs)
+
+
+@mock.patch("destination_dust.destination.AsyncDustClient")
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_with_async_http(client_init, async_client_init):
+    _init_mocks(client_init)
+    async_client = mock.AsyncMock()
+    async_client_init.return_value = async_client
+    applied = []
+
+    async def upsert_document(document_id, text, **kwargs):
+        await asyncio.sleep(random.random() / 1000)
+        applied.append(json.loads(text)["version"])
+
+    async_client.upsert_document.side_effect = upsert_document
+    input_messages = [_record(stream="people", data={"id": 1, "version": i}) for i in range(20)]
+    input_messages.append(_state())
+    destination = DestinationDust()
+    acknowledged_at_state = []
+    for message in destination.write(
+        config={**config, "async_http": True, "max_concurrency": 200},
+        configured_catalog=_configured_catalog(),
+        input_messages=input_messages,
+    ):
+        if message.type == Type.STATE:
+            acknowledged_at_state.append(len(applied))
+    assert acknowledged_at_state == [len(applied)]
+    # Upserts of the same document run in order; superseded waiting versions are skipped
+    assert applied == sorted(applied)
+    assert applied[-1] == 19
+    assert async_client_init.call_args.kwargs["pool_size"] == 200
+    # The async client throttles through the DustClient's rate limiter
+    assert async_client_init.call_args.kwargs["rate_limiter"] is client_init.return_value.rate_limiter
+    async_client.aclose.assert_awaited_once()
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_documents_collapses_versions_not_started_yet(client_init):
+    mock_client = _init_mocks(client_init)
+    applied = []
+    first_started = threading.Event()
+
+    def upsert_document(document_id, text, **kwargs):
+        version = json.loads(text)["version"]
+        if version == 0:
+            first_started.set()
+            # In flight while versions 1 and 2 are submitted
+            time.sleep(0.2)
+        applied.append(version)
+
+    def input_messages():
+        yield _record("people", {"id": 1, "version": 0})
+        assert first_started.wait(5)
+        yield _record("people", {"id": 1, "version": 1})
+        yield _record("people", {"id": 1, "version": 2})
+        yield _state()
+
+    mock_client.upsert_document.side_effect = upsert_document
+    output = list(
+        DestinationDust().write(config=config, configured_catalog=_configured_catalog(), input_messages=input_messages())
+    )
+    # Version 1 waits for version 0, then is replaced by version 2 before it starts
+    assert applied == [0, 2]
+    logs = [m.log.message for m in output if m.type == Type.LOG]
+    assert "Collapsed 1 document version(s) superseded before they were sent" in logs
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_logs_the_profile_summary_once(client_init, tmp_path):
+    _init_mocks(client_init)
+    profile_config = {**config, "profile_mode": "sampling", "profile_output_path": str(tmp_path / "profile")}
+    with mock.patch("destination_dust.destination.logger") as logger:
+        output = _write(profile_config, [_record("people", {"id": 1}), _state()])
+    summaries = [m.log.message for m in output if m.type == Type.LOG and m.log.message.startswith("Profile")]
+    assert len(summaries) == 1
+    logger.info.assert_not_called()
+
+
 # --- Write (tables mode) ---
 
 
@@ -183,8 +377,8 @@ def test_write_succeeds_tables_mode(client_init):
     stream = "people"
     data = {"id": 1, "name": "John Doe", "email": "john.doe@example.com"}
     mock_client = _init_mocks(client_init)
-    # No existing table -> will call upsert_table; must return table_id for upsert_rows
-    mock_client.find_table_by_title.return_value = None
+    # No existing table -> will call upsert_table; must return table_id for the rows
+    mock_client.build_table_index.return_value = {}
     mock_client.upsert_table.return_value = {"table_id": "test-table-id"}
     tables_config = {**config, "data_format": "tables", "table_id_prefix": "airbyte_"}
     input_messages = [_record(stream=stream, data=data), _state()]
@@ -197,15 +391,494 @@ def test_write_succeeds_tables_mode(client_init):
         )
     )
     mock_client.upsert_table.assert_called_once()
-    mock_client.upsert_rows.assert_called_once()
+    mock_client.upsert_encoded_rows.assert_called_once()
     table_call = mock_client.upsert_table.call_args.kwargs
     assert table_call["name"] == stream
     assert table_call["title"] == stream
-    rows = mock_client.upsert_rows.call_args[0][1]  # positional: (table_id, rows)
+    rows = _sent_rows(mock_client.upsert_encoded_rows.call_args)
     assert len(rows) == 1
     assert rows[0]["name"] == "John Doe"
 
 
+# --- Fingerprint cache ---
+
+
+def _write(config_, input_messages):
+    return list(
+        DestinationDust().write(
+            config=config_,
+            configured_catalog=_configured_catalog(),
+            input_messages=input_messages,
+        )
+    )
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_fingerprint_cache_skips_unchanged_documents(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    cache_config = {**config, "local_cache_path": str(tmp_path / "cache.db")}
+    records = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+
+    _write(cache_config, [*(_record("people", r) for r in records), _state()])
+    assert mock_client.upsert_document.call_count == 2
+
+    mock_client.reset_mock()
+    records[1]["name"] = "B2"
+    messages = _write(cache_config, [*(_record("people", r) for r in records), _state()])
+    assert mock_client.upsert_document.call_count == 1
+    assert mock_client.upsert_document.call_args.kwargs["document_id"] == "people-2"
+    logs = [m.log.message for m in messages if m.type == Type.LOG]
+    assert any("skipped 1 unchanged record(s), sent 1" in log for log in logs)
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_fingerprint_cache_skips_unchanged_rows(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    cache_config = {
+        **config,
+        "data_format": "tables",
+        "local_cache_path": str(tmp_path / "cache.db"),
+    }
+    records = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+
+    _write(cache_config, [*(_record("people", r) for r in records), _state()])
+    assert sum(len(c[0][1]) for c in mock_client.upsert_encoded_rows.call_args_list) == 2
+
+    mock_client.reset_mock()
+    records[0]["name"] = "A2"
+    _write(cache_config, [*(_record("people", r) for r in records), _state()])
+    assert mock_client.upsert_encoded_rows.call_count == 1
+    assert _sent_rows(mock_client.upsert_encoded_rows.call_args) == [{"id": 1, "name": "A2"}]
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_fingerprint_cache_resends_rows_to_a_recreated_table(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    cache_config = {**config, "data_format": "tables", "local_cache_path": str(tmp_path / "cache.db")}
+    records = [{"id": 1}, {"id": 2}]
+    _write(cache_config, [*(_record("people", r) for r in records), _state()])
+
+    # The saved table was deleted: the sync fails and the saved table ids are cleared
+    mock_client.upsert_encoded_rows.side_effect = TableNotFoundError("gone")
+    with pytest.raises(TableNotFoundError):
+        _write(cache_config, [_record("people", {"id": 3}), _state()])
+
+    # The next sync creates a new table, which gets every row
+    mock_client.reset_mock()
+    mock_client.upsert_encoded_rows.side_effect = None
+    mock_client.build_table_index.return_value = {}
+    mock_client.upsert_table.return_value = {"table_id": "t2"}
+    _write(cache_config, [*(_record("people", r) for r in [*records, {"id": 3}]), _state()])
+    assert {c[0][0] for c in mock_client.upsert_encoded_rows.call_args_list} == {"t2"}
+    assert [row for c in mock_client.upsert_encoded_rows.call_args_list for row in _sent_rows(c)] == [
+        {"id": 1},
+        {"id": 2},
+        {"id": 3},
+    ]
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_fingerprint_cache_not_committed_when_upload_fails(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    cache_config = {**config, "local_cache_path": str(tmp_path / "cache.db")}
+    mock_client.upsert_document.side_effect = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        _write(cache_config, [_record("people", {"id": 1}), _state()])
+
+    mock_client.upsert_document.side_effect = None
+    mock_client.reset_mock()
+    _write(cache_config, [_record("people", {"id": 1}), _state()])
+    mock_client.upsert_document.assert_called_once()
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_sends_last_version_of_each_pending_row(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    versions = [{"id": 1, "v": 1}, {"id": 2, "v": 1}, {"id": 1, "v": 2}, {"id": 1, "v": 3}]
+    output = list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables"},
+            configured_catalog=_configured_catalog(),
+            input_messages=[
+                *(_record("people", r) for r in versions),
+                _state(),
+                _record("people", {"id": 1, "v": 4}),
+                _state(),
+            ],
+        )
+    )
+    # Only pending rows collapse: the version sent before the first STATE stays sent
+    assert [_sent_rows(c) for c in mock_client.upsert_encoded_rows.call_args_list] == [
+        [{"id": 1, "v": 3}, {"id": 2, "v": 1}],
+        [{"id": 1, "v": 4}],
+    ]
+    states = [m.state for m in output if m.type == Type.STATE]
+    assert [state.destinationStats.streams["people"]["recordsCollapsed"] for state in states] == [2, 2]
+    logs = [m.log.message for m in output if m.type == Type.LOG]
+    assert "Collapsed 2 row version(s) superseded before they were sent" in logs
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_resolves_catalog_tables_once(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+    mock_client.upsert_table.return_value = {"table": {"table_id": "t-new"}}
+    catalog = _configured_catalog("people")
+    catalog.streams.append(_configured_catalog("companies").streams[0])
+    input_messages = [
+        _record("people", {"id": 1}),
+        _record("companies", {"id": 2}),
+        _record("unknown", {"id": 3}),
+        _state(),
+    ]
+    list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables"},
+            configured_catalog=catalog,
+            input_messages=input_messages,
+        )
+    )
+    mock_client.build_table_index.assert_called_once()
+    mock_client.find_table_by_title.assert_not_called()
+    # "companies" is created at startup, "unknown" when its first rows are flushed
+    assert [c.kwargs["name"] for c in mock_client.upsert_table.call_args_list] == [
+        "companies",
+        "unknown",
+    ]
+    assert {c[0][0] for c in mock_client.upsert_encoded_rows.call_args_list} == {"t-people", "t-new"}
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_state_waits_for_earlier_batches(client_init):
+    """Batches are sent in the background, but STATE waits until they are acknowledged."""
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+    acknowledged = []
+
+    def upsert_encoded_rows(table_id, encoded_rows):
+        time.sleep(0.01)
+        acknowledged.extend(json.loads(row)["value"]["id"] for row in encoded_rows)
+
+    mock_client.upsert_encoded_rows.side_effect = upsert_encoded_rows
+    input_messages = [_record("people", {"id": i}) for i in range(10)]
+    input_messages.append(_state())
+    input_messages.extend(_record("people", {"id": i}) for i in range(10, 15))
+    input_messages.append(_state())
+    acknowledged_at_state = []
+    for message in DestinationDust().write(
+        config={**config, "data_format": "tables", "table_batch_size": 2},
+        configured_catalog=_configured_catalog("people"),
+        input_messages=input_messages,
+    ):
+        if message.type == Type.STATE:
+            acknowledged_at_state.append(len(acknowledged))
+    assert acknowledged_at_state == [10, 15]
+    # Batches of the same table are upserted in order
+    assert acknowledged == list(range(15))
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_reports_metrics_in_destination_stats(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+    input_messages = [_record("people", {"id": i}) for i in range(3)]
+    input_messages.append(_state())
+    input_messages.append(_record("people", {"id": 3}))
+    input_messages.append(_state())
+    textfile = tmp_path / "dust.prom"
+    states = [
+        message
+        for message in DestinationDust().write(
+            config={**config, "data_format": "tables", "metrics_textfile_path": str(textfile)},
+            configured_catalog=_configured_catalog("people"),
+            input_messages=input_messages,
+        )
+        if message.type == Type.STATE
+    ]
+    assert [state.state.destinationStats.recordCount for state in states] == [3, 1]
+    people = states[-1].state.destinationStats.streams["people"]
+    assert (people["recordsIn"], people["rowsSent"]) == (4, 4)
+    serialized = json.loads(_serialize_message(states[-1]))
+    assert serialized["state"]["destinationStats"]["streams"]["people"]["recordsIn"] == 4
+    assert 'dust_destination_rows_sent_total{stream="people"} 4' in textfile.read_text()
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_traces_requests_under_their_state_checkpoint(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+
+    def upsert_encoded_rows(table_id, encoded_rows):
+        current_request().on_call(0.01, "upsert_rows", {"dust.table_id": table_id}, 200)
+
+    mock_client.upsert_encoded_rows.side_effect = upsert_encoded_rows
+    state = PatchedAirbyteMessageSerializer.load(
+        {"type": "STATE", "state": {"type": "LEGACY", "data": {}, "id": 7}}
+    )
+    trace_file = tmp_path / "trace.jsonl"
+    list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables", "trace_file_path": str(trace_file)},
+            configured_catalog=_configured_catalog("people"),
+            input_messages=[_record("people", {"id": 1}), state],
+        )
+    )
+    spans = [
+        span
+        for line in trace_file.read_text().splitlines()
+        for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    ]
+    request, checkpoint, sync = spans
+    assert request["parentSpanId"] == checkpoint["spanId"]
+    assert checkpoint["parentSpanId"] == sync["spanId"]
+    request_attributes = {a["key"]: a["value"] for a in request["attributes"]}
+    assert request_attributes["airbyte.stream"] == {"stringValue": "people"}
+    assert request_attributes["airbyte.state.id"] == {"intValue": "7"}
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_flushes_largest_stream_when_over_memory_budget(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"big": "t-big", "small": "t-small"}
+    catalog = _configured_catalog("big")
+    catalog.streams.append(_configured_catalog("small").streams[0])
+    big_bytes = DestinationDust._table_row_bytes(DestinationDust._flatten_record({"id": 0, "v": "x" * 100}))
+    small_bytes = DestinationDust._table_row_bytes(DestinationDust._flatten_record({"id": 0, "v": "x"}))
+    input_messages = [
+        _record("small", {"id": 0, "v": "x"}),
+        *[_record("big", {"id": i, "v": "x" * 100}) for i in range(3)],
+    ]
+    output = list(
+        DestinationDust().write(
+            config={
+                **config,
+                "data_format": "tables",
+                "buffer_max_bytes": 2 * big_bytes + small_bytes,
+                "max_concurrency": 1,
+            },
+            configured_catalog=catalog,
+            input_messages=input_messages,
+        )
+    )
+    calls = [(c[0][0], len(c[0][1])) for c in mock_client.upsert_encoded_rows.call_args_list]
+    # The budget is exceeded by the third "big" row: only that stream is flushed then
+    assert calls == [("t-big", 3), ("t-small", 1)]
+    assert any("Peak buffered rows" in m.log.message for m in output if m.type == Type.LOG)
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_adaptive_batching_splits_payloads_too_large(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+    sent = []
+
+    def upsert_encoded_rows(table_id, encoded_rows, retry_timeouts=True):
+        # Pretend Dust rejects requests of more than 4 rows
+        if len(encoded_rows) > 4:
+            raise PayloadTooLargeError("too large")
+        sent.append([json.loads(row)["value"]["id"] for row in encoded_rows])
+
+    mock_client.upsert_encoded_rows.side_effect = upsert_encoded_rows
+    input_messages = [_record("people", {"id": i}) for i in range(10)]
+    input_messages.append(_state())
+    output = list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables", "adaptive_batching": True},
+            configured_catalog=_configured_catalog("people"),
+            input_messages=input_messages,
+        )
+    )
+    # Every row is sent once, in order
+    assert [row for chunk in sent for row in chunk] == list(range(10))
+    assert all(len(chunk) <= 4 for chunk in sent)
+    summary = [m.log.message for m in output if m.type == Type.LOG and "Adaptive batching" in m.log.message]
+    assert len(summary) == 1 and "too large or timed out" in summary[0]
+
+
+class _SlowForLargeBatchesHandler(http.server.BaseHTTPRequestHandler):
+    # Rows per request received; requests of more than 2 rows are answered too late
+    received: list = []
+
+    def do_POST(self):
+        rows = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["rows"]
+        type(self).received.append(len(rows))
+        if len(rows) > 2:
+            time.sleep(0.5)
+        body = b"{}"
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            # The client timed out and closed the connection
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_adaptive_batching_splits_batches_timing_out_through_dust_client():
+    # A real server, so that urllib3's own retry logic runs
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _SlowForLargeBatchesHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = DustClient({**config, "base_url": f"http://127.0.0.1:{server.server_port}"})
+        rows = [encode_row(str(i), {"id": i}) for i in range(4)]
+        batch_sizer = AdaptiveBatchSizer(MAX_TABLE_PAYLOAD_BYTES)
+        with mock.patch("destination_dust.client.UPSERT_ROWS_TIMEOUT", 0.2):
+            DestinationDust()._upsert_table_rows_adaptively(
+                client, "t1", "people", rows, [len(row) for row in rows], batch_sizer
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+    # The batch timing out is sent once, then split in two
+    assert _SlowForLargeBatchesHandler.received == [4, 2, 2]
+    assert batch_sizer.batch_bytes("people") < batch_sizer.initial_bytes
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_adaptive_batching_raises_when_a_single_row_is_too_large(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people"}
+    mock_client.upsert_encoded_rows.side_effect = PayloadTooLargeError("too large")
+    with pytest.raises(PayloadTooLargeError):
+        list(
+            DestinationDust().write(
+                config={**config, "data_format": "tables", "adaptive_batching": True},
+                configured_catalog=_configured_catalog("people"),
+                input_messages=[_record("people", {"id": 1}), _state()],
+            )
+        )
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_reuses_cached_table_ids(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    tables_config = {
+        **config,
+        "data_format": "tables",
+        "local_cache_path": str(tmp_path / "cache.db"),
+    }
+    _write(tables_config, [_record("people", {"id": 1}), _state()])
+    mock_client.build_table_index.assert_called_once()
+
+    mock_client.reset_mock()
+    _write(tables_config, [_record("people", {"id": 2}), _state()])
+    mock_client.build_table_index.assert_not_called()
+    mock_client.find_table_by_title.assert_not_called()
+    mock_client.upsert_table.assert_not_called()
+    assert mock_client.upsert_encoded_rows.call_args[0][0] == "t1"
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_forgets_cached_table_ids_when_table_is_gone(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    tables_config = {
+        **config,
+        "data_format": "tables",
+        "local_cache_path": str(tmp_path / "cache.db"),
+    }
+    _write(tables_config, [_record("people", {"id": 1}), _state()])
+
+    mock_client.upsert_encoded_rows.side_effect = TableNotFoundError("gone")
+    with pytest.raises(TableNotFoundError):
+        _write(tables_config, [_record("people", {"id": 2}), _state()])
+
+    mock_client.reset_mock()
+    mock_client.upsert_encoded_rows.side_effect = None
+    _write(tables_config, [_record("people", {"id": 2}), _state()])
+    mock_client.build_table_index.assert_called_once()
+
+
+# --- Overwrite ---
+
+
+def _overwrite_catalog(*stream_names: str) -> ConfiguredAirbyteCatalog:
+    catalog = _configured_catalog("people")
+    catalog.streams = [_configured_catalog(name).streams[0] for name in stream_names]
+    catalog.streams[0].destination_sync_mode = DestinationSyncMode.overwrite
+    return catalog
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_overwrite_deletes_rows_not_written_during_the_sync(client_init, tmp_path):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t-people", "companies": "t-companies"}
+    mock_client.iter_row_ids.side_effect = lambda table_id: iter(["1", "2", "3", "stale"])
+    cache_config = {**config, "data_format": "tables", "local_cache_path": str(tmp_path / "cache.db")}
+    catalog = _overwrite_catalog("people", "companies")
+    def write(records):
+        return list(
+            DestinationDust().write(
+                config=cache_config,
+                configured_catalog=catalog,
+                input_messages=[*(_record("people", r) for r in records), _record("companies", {"id": 9}), _state()],
+            )
+        )
+
+    write([{"id": 1}, {"id": 2}, {"id": 3}])
+    mock_client.iter_row_ids.assert_called_once_with("t-people")
+    assert [c[0] for c in mock_client.delete_row.call_args_list] == [("t-people", "stale")]
+
+    # Row 1 is skipped by the cache but still written; rows 2 and 3 are gone from the source
+    mock_client.reset_mock()
+    messages = write([{"id": 1}])
+    mock_client.upsert_encoded_rows.assert_not_called()
+    assert sorted(c[0][1] for c in mock_client.delete_row.call_args_list) == ["2", "3", "stale"]
+    logs = [m.log.message for m in messages if m.type == Type.LOG]
+    assert any("deleted 3 stale row(s) of table 't-people'" in log for log in logs)
+
+    # Deleted rows are forgotten by the cache, so they are sent again when they come back
+    mock_client.reset_mock()
+    write([{"id": 1}, {"id": 2}])
+    assert _sent_rows(mock_client.upsert_encoded_rows.call_args) == [{"id": 2}]
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_overwrite_deletes_stale_documents_of_overwrite_streams_only(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.iter_documents.return_value = iter(
+        [
+            {"document_id": "people-1", "tags": ["airbyte:stream:people"]},
+            {"document_id": "people-2", "tags": ["airbyte:stream:people"]},
+            {"document_id": "companies-1", "tags": ["airbyte:stream:companies"]},
+            {"document_id": "manual", "tags": []},
+        ]
+    )
+    list(
+        DestinationDust().write(
+            config=config,
+            configured_catalog=_overwrite_catalog("people", "companies"),
+            input_messages=[_record("people", {"id": 1}), _state()],
+        )
+    )
+    mock_client.delete_document.assert_called_once_with("people-2")
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_overwrite_deletes_nothing_when_the_sync_fails(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.upsert_document.side_effect = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        list(
+            DestinationDust().write(
+                config=config,
+                configured_catalog=_overwrite_catalog("people"),
+                input_messages=[_record("people", {"id": 1}), _state()],
+            )
+        )
+    mock_client.iter_documents.assert_not_called()
+    mock_client.delete_document.assert_not_called()
+
+
 # --- Helpers: _build_document_id ---
 
 
@@ -251,6 +924,66 @@ def test_build_document_id_sanitizes_special_characters():
     assert result == "s-hello_world_foo_bar"
 
 
+# --- Helpers: _table_row_id ---
+
+
+def test_table_row_id_uses_composite_and_nested_primary_keys():
+    stream = Mock()
+    stream.primary_key = [["org", "id"], ["email"]]
+    data = {"id": 7, "org": {"id": 3}, "email": "a@b.c", "status": "active"}
+    assert DestinationDust._table_row_id(data, stream) == "3-a@b.c"
+
+
+def test_table_row_id_without_primary_key_uses_id_or_stable_hash():
+    stream = Mock()
+    stream.primary_key = []
+    assert DestinationDust._table_row_id({"id": 7, "status": "active"}, stream) == "7"
+    # Same value in every process, regardless of key order (Python's hash() is salted)
+    assert DestinationDust._table_row_id({"b": 2, "a": 1}, stream) == "3d0089be7edf6746"
+    assert DestinationDust._table_row_id({"a": 1, "b": 2}, None) == "3d0089be7edf6746"
+    # A null id is missing: rows with a null id do not all share the row_id "None"
+    assert DestinationDust._table_row_id({"id": None, "n": 1}, stream) != DestinationDust._table_row_id(
+        {"id": None, "n": 2}, stream
+    )
+    # orjson rejects integers beyond 64 bits; they are hashed all the same
+    assert len(DestinationDust._table_row_id({"a": 2**70}, stream)) == 16
+    assert DestinationDust._table_row_id({"id": 0}, stream) == "0"
+    # Records sharing a first value no longer share a row_id
+    assert DestinationDust._table_row_id({"status": "active", "n": 1}, stream) != DestinationDust._table_row_id(
+        {"status": "active", "n": 2}, stream
+    )
+
+
+def test_table_row_id_with_null_primary_key_uses_stable_hash():
+    stream = Mock()
+    stream.primary_key = [["email"]]
+    first = DestinationDust._table_row_id({"email": None, "n": 1}, stream)
+    second = DestinationDust._table_row_id({"email": None, "n": 2}, stream)
+    # Rows with a null primary key do not all share the row_id "None"
+    assert first == content_row_id({"email": None, "n": 1})
+    assert len({first, second, "None"}) == 3
+    # A null part of a composite key counts as missing, like an absent field
+    stream.primary_key = [["org", "id"], ["email"]]
+    assert DestinationDust._table_row_id({"org": {"id": 3}, "email": None}, stream) == "3-"
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_sends_primary_key_row_ids(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    records = [{"id": 1, "email": "a@x.io"}, {"id": 2, "email": "b@x.io"}]
+    list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables"},
+            configured_catalog=_configured_catalog("people", primary_key=[["email"]]),
+            input_messages=[*(_record("people", r) for r in records), _state()],
+        )
+    )
+    sent = [json.loads(row) for row in mock_client.upsert_encoded_rows.call_args[0][1]]
+    assert [row["value"] for row in sent] == records
+    assert [row["row_id"] for row in sent] == ["a@x.io", "b@x.io"]
+
+
 # --- Helpers: _build_title ---
 
 
@@ -279,16 +1012,52 @@ def test_flatten_record_flattens_nested_objects():
     data = {"id": 1, "meta": {"key": "value"}}
     result = DestinationDust._flatten_record(data)
     assert result["id"] == 1
-    assert result["meta"] == '{"key": "value"}'
+    assert result["meta"] == '{"key":"value"}'
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_write_tables_flattens_records_with_the_stream_schema(client_init):
+    mock_client = _init_mocks(client_init)
+    mock_client.build_table_index.return_value = {"people": "t1"}
+    mock_client.upsert_table.return_value = {"table_id": "t-unknown"}
+    catalog = _configured_catalog("people")
+    catalog.streams[0].stream.json_schema = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            "address": {"type": ["null", "object"], "properties": {"city": {"type": "string"}}},
+        },
+    }
+    record = {"id": 1, "address": {"city": "Paris", "geo": [1, 2]}, "tags": ["a"]}
+    colliding = {"id": 2, "address": {"city": "Paris"}, "address.city": "Lyon"}
+    output = list(
+        DestinationDust().write(
+            config={**config, "data_format": "tables", "table_flatten_depth": 1},
+            configured_catalog=catalog,
+            input_messages=[
+                _record("people", record),
+                _record("people", colliding),
+                _record("unknown", record),
+                _state(),
+            ],
+        )
+    )
+    rows = {c[0][0]: _sent_rows(c) for c in mock_client.upsert_encoded_rows.call_args_list}
+    assert rows["t1"] == [
+        {"id": 1, "tags": '["a"]', "address.city": "Paris", "address.geo": "[1,2]"},
+        {"id": 2, "address.city": "Lyon", "address": '{"city":"Paris"}'},
+    ]
+    logs = [m.log.message for m in output if m.type == Type.LOG]
+    assert any("Stored 1 nested object(s) of stream 'people' as JSON strings" in log for log in logs)
+    # Streams missing from the catalog have no schema: nested values are JSON strings
+    assert rows["t-unknown"] == [{"id": 1, "address": '{"city":"Paris","geo":[1,2]}', "tags": '["a"]'}]
 
 
 # --- Payload size cap (tables): _table_payload_bytes, _chunk_rows_by_payload_size ---
 
 
 def test_table_payload_bytes_empty():
-    assert DestinationDust._table_payload_bytes([]) == len(
-        json.dumps({"rows": []}).encode("utf-8")
-    )
+    assert DestinationDust._table_payload_bytes([]) == len(b'{"rows":[]}')
 
 
 def test_table_payload_bytes_single_row():
@@ -297,7 +1066,7 @@ def test_table_payload_bytes_single_row():
     expected_payload = {
         "rows": [{"row_id": "1", "value": {"id": 1, "name": "Alice"}}]
     }
-    assert size == len(json.dumps(expected_payload).encode("utf-8"))
+    assert size == len(json.dumps(expected_payload, separators=(",", ":")).encode("utf-8"))
 
 
 def test_chunk_rows_by_payload_size_empty():
@@ -335,17 +1104,17 @@ def test_chunk_rows_by_payload_size_single_row_over_cap():
 
 @mock.patch("destination_dust.destination.DustClient")
 def test_write_tables_mode_small_batch_single_upsert(client_init):
-    """Normal small batch still results in one upsert_rows call per batch."""
+    """Normal small batch still results in one upsert request per batch."""
     stream = "people"
     mock_client = _init_mocks(client_init)
-    mock_client.find_table_by_title.return_value = None
+    mock_client.build_table_index.return_value = {}
     mock_client.upsert_table.return_value = {"table_id": "t1"}
     tables_config = {
         **config,
         "data_format": "tables",
         "table_batch_size": 2,
     }
-    # 2 records -> one batch of 2, under 1MB -> one upsert_rows call
+    # 2 records -> one batch of 2, under 1MB -> one upsert request
     input_messages = [
         _record(stream=stream, data={"id": 1, "name": "A"}),
         _record(stream=stream, data={"id": 2, "name": "B"}),
@@ -359,17 +1128,17 @@ def test_write_tables_mode_small_batch_single_upsert(client_init):
             input_messages=input_messages,
         )
     )
-    assert mock_client.upsert_rows.call_count == 1
-    call_rows = mock_client.upsert_rows.call_args[0][1]
+    assert mock_client.upsert_encoded_rows.call_count == 1
+    call_rows = mock_client.upsert_encoded_rows.call_args[0][1]
     assert len(call_rows) == 2
 
 
 @mock.patch("destination_dust.destination.DustClient")
 def test_write_tables_mode_large_payload_split_into_chunks(client_init):
-    """When a batch would exceed 1MB, upsert_rows is called multiple times with smaller chunks."""
+    """When a batch would exceed 1MB, rows are upserted in several smaller requests."""
     stream = "people"
     mock_client = _init_mocks(client_init)
-    mock_client.find_table_by_title.return_value = None
+    mock_client.build_table_index.return_value = {}
     mock_client.upsert_table.return_value = {"table_id": "t1"}
     # Small batch_size so we flush one batch of 3 rows; each row is huge so payload > 1MB
     tables_config = {
@@ -390,9 +1159,51 @@ def test_write_tables_mode_large_payload_split_into_chunks(client_init):
             input_messages=input_messages,
         )
     )
-    # Should be split into multiple upsert_rows calls (each chunk < 1MB)
-    assert mock_client.upsert_rows.call_count >= 2
+    # Should be split into multiple upsert requests (each chunk < 1MB)
+    assert mock_client.upsert_encoded_rows.call_count >= 2
     total_rows_sent = sum(
-        len(call[0][1]) for call in mock_client.upsert_rows.call_args_list
+        len(call[0][1]) for call in mock_client.upsert_encoded_rows.call_args_list
     )
     assert total_rows_sent == 3
+
+
+def _reference_chunk_rows_by_payload_size(rows, max_bytes):
+    """Quadratic reference chunker: re-measures the whole candidate chunk for every row."""
+    chunks, current = [], []
+    for row in rows:
+        candidate = current + [row]
+        if current and DestinationDust._table_payload_bytes(candidate) > max_bytes:
+            chunks.append(current)
+            current = [row]
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def test_chunk_rows_by_payload_size_matches_reference_on_random_rows():
+    rng = random.Random(1234)
+    alphabet = "abcdefghijklmnopqrstuvwxyz éü\"\\\n"
+    for _ in range(50):
+        rows = []
+        for i in range(rng.randint(0, 40)):
+            row = {
+                "name": "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))),
+                "count": rng.randint(-1000, 1000),
+                "meta": json.dumps({"k": rng.random()}) if rng.random() < 0.5 else None,
+            }
+            if rng.random() < 0.7:
+                row["id"] = i
+            rows.append(row)
+        max_bytes = rng.randint(20, 2000)
+        assert DestinationDust._chunk_rows_by_payload_size(
+            rows, max_bytes
+        ) == _reference_chunk_rows_by_payload_size(rows, max_bytes)
+
+
+def test_chunk_rows_by_payload_size_uses_given_row_sizes():
+    rows = [{"id": i} for i in range(4)]
+    # Pretend every row is large: each one gets its own chunk
+    chunks = DestinationDust._chunk_rows_by_payload_size(rows, 100, row_sizes=[60] * 4)
+    assert chunks == [[row] for row in rows]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from destination_dust.document_text import (
+    get_document_text_renderer,
+    render_json_compact,
+    render_json_indented,
+    render_markdown,
+)
+
+record = {"id": 1, "name": "Alice", "tags": ["a", "b"], "address": {"city": "Paris"}, "note": None}
+
+
+def test_render_json_indented_matches_json_dumps():
+    assert render_json_indented(record) == json.dumps(record, indent=2)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [1e-7, 1.5e-5, 0.0001234, 1e16, -2.5e-300, "Zoë", "日本", "1e-7", "0.00001", 2**70],
+)
+def test_render_json_indented_keeps_the_json_dumps_text(value):
+    data = {"id": 1, "value": value, "nested": {"values": [value, 0.5]}}
+    assert render_json_indented(data) == json.dumps(data, indent=2, default=str)
+
+
+def test_render_json_compact():
+    assert render_json_compact(record) == json.dumps(record, separators=(",", ":"))
+
+
+def test_render_json_falls_back_for_values_orjson_rejects():
+    huge = {"id": 2**70, "when": object}
+    assert render_json_compact(huge) == json.dumps(huge, separators=(",", ":"), default=str)
+    assert render_json_indented(huge) == json.dumps(huge, indent=2, default=str)
+
+
+def test_render_markdown():
+    assert render_markdown(record) == "\n".join(
+        [
+            "- **id**: 1",
+            "- **name**: Alice",
+            '- **tags**: ["a","b"]',
+            '- **address**: {"city":"Paris"}',
+            "- **note**: ",
+        ]
+    )
+
+
+def test_get_document_text_renderer():
+    assert get_document_text_renderer({}) is render_json_indented
+    assert get_document_text_renderer({"document_text_format": "markdown"}) is render_markdown
+    with pytest.raises(ValueError, match="Unknown document_text_format"):
+        get_document_text_renderer({"document_text_format": "yaml"})
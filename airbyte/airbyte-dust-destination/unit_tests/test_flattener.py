@@ -0,0 +1,98 @@
+from destination_dust.flattener import RecordFlattener, encode_blob
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": ["null", "string"]},
+        "meta": {},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "address": {
+            "type": ["null", "object"],
+            "properties": {
+                "city": {"type": "string"},
+                "geo": {"type": "object", "properties": {"lat": {"type": "number"}}},
+            },
+        },
+    },
+}
+
+
+def test_without_schema_serializes_nested_values():
+    flatten = RecordFlattener()
+    assert flatten({"id": 1, "meta": {"k": "é"}, "tags": [1, {"a": None}]}) == {
+        "id": 1,
+        "meta": '{"k":"é"}',
+        "tags": '[1,{"a":null}]',
+    }
+
+
+def test_schema_without_expansion_serializes_nested_and_undeclared_values():
+    flatten = RecordFlattener(SCHEMA)
+    record = {
+        "id": 1,
+        "name": None,
+        "meta": {"k": 1},
+        "tags": ["a"],
+        "address": {"city": "Paris"},
+        "extra": {"x": 1},
+        "note": "n",
+    }
+    assert flatten(record) == {
+        "id": 1,
+        "name": None,
+        "meta": '{"k":1}',
+        "tags": '["a"]',
+        "address": '{"city":"Paris"}',
+        "extra": '{"x":1}',
+        "note": "n",
+    }
+
+
+def test_expands_declared_objects_up_to_max_depth():
+    record = {"id": 1, "address": {"city": "Paris", "geo": {"lat": 48.8}, "zip": {"code": 75}}}
+    assert RecordFlattener(SCHEMA, max_depth=1)(record) == {
+        "id": 1,
+        "address.city": "Paris",
+        "address.geo": '{"lat":48.8}',
+        "address.zip": '{"code":75}',
+    }
+    assert RecordFlattener(SCHEMA, max_depth=2)(record) == {
+        "id": 1,
+        "address.city": "Paris",
+        "address.geo.lat": 48.8,
+        "address.zip": '{"code":75}',
+    }
+
+
+def test_expanded_object_that_is_null_or_not_an_object_keeps_its_column():
+    flatten = RecordFlattener(SCHEMA, max_depth=2)
+    assert flatten({"address": None}) == {"address": None}
+    assert flatten({"address": [{"city": "Paris"}]}) == {"address": '[{"city":"Paris"}]'}
+
+
+def test_nested_values_of_fields_declared_as_scalars_are_serialized():
+    record = {"id": {"v": 1}, "name": {"first": "a"}, "address": {"city": ["Paris"]}}
+    expected = {"id": '{"v":1}', "name": '{"first":"a"}'}
+    assert RecordFlattener(SCHEMA)(record) == {**expected, "address": '{"city":["Paris"]}'}
+    assert RecordFlattener(SCHEMA, max_depth=1)(record) == {**expected, "address.city": '["Paris"]'}
+
+
+def test_expansion_does_not_overwrite_fields_with_the_same_dotted_name():
+    flatten = RecordFlattener(SCHEMA, max_depth=2)
+    for record in (
+        {"address": {"city": "Paris"}, "address.city": "Lyon"},
+        {"address.city": "Lyon", "address": {"city": "Paris"}},
+    ):
+        assert flatten(record) == {"address.city": "Lyon", "address": '{"city":"Paris"}'}
+    # Collisions one level down only keep the inner object as a JSON string
+    assert flatten({"address": {"geo": {"lat": 1}, "geo.lat": 2}}) == {
+        "address.geo.lat": 2,
+        "address.geo": '{"lat":1}',
+    }
+    assert flatten.total_collisions == 3
+
+
+def test_encode_blob_falls_back_for_values_orjson_rejects():
+    assert encode_blob({"big": 1 << 70, 1: "x"}) == '{"big":1180591620717411303424,"1":"x"}'
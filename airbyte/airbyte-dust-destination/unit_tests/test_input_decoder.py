@@ -0,0 +1,83 @@
+import io
+from unittest import mock
+
+import orjson
+
+from airbyte_cdk.models import Type
+
+from destination_dust.destination import DestinationDust, PatchedAirbyteStateMessage
+from destination_dust.input_decoder import RecordMessage, decode_record, iter_lines
+from destination_dust.metrics import SyncMetrics
+
+
+def _record_line(i: int) -> bytes:
+    return orjson.dumps(
+        {"type": "RECORD", "record": {"stream": "people", "data": {"id": i}, "emitted_at": 1000 + i}}
+    )
+
+
+def test_iter_lines_splits_across_blocks():
+    data = b"first\nsecond line\n\nlast"
+    assert list(iter_lines(io.BytesIO(data), block_size=4)) == [b"first", b"second line", b"", b"last"]
+
+
+def test_iter_lines_joins_lines_spanning_many_blocks():
+    long_line = bytes(range(10)) * 10_000
+    data = b"short\n" + long_line + b"\nx\n" + long_line
+    assert list(iter_lines(io.BytesIO(data), block_size=7)) == [b"short", long_line, b"x", long_line]
+
+
+def test_decode_record_builds_record_message():
+    message = decode_record(orjson.loads(_record_line(1)))
+    assert isinstance(message, RecordMessage)
+    assert message.type == Type.RECORD
+    assert (message.record.stream, message.record.data, message.record.emitted_at) == ("people", {"id": 1}, 1001)
+
+
+def test_decode_record_ignores_other_and_incomplete_messages():
+    assert decode_record({"type": "STATE", "state": {}}) is None
+    assert decode_record({"type": "RECORD", "record": {"stream": "people"}}) is None
+
+
+def test_parse_input_stream_reads_binary_buffer():
+    state = {"type": "STATE", "state": {"type": "STREAM", "id": 7, "stream": {"stream_descriptor": {"name": "people"}}}}
+    data = b"\n".join([_record_line(1), b"not json", orjson.dumps(state), _record_line(2)]) + b"\n"
+    messages = list(DestinationDust()._parse_input_stream(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")))
+    assert [m.type for m in messages] == [Type.RECORD, Type.STATE, Type.RECORD]
+    assert isinstance(messages[0], RecordMessage)
+    # Control messages still go through the patched serializer, which keeps state.id
+    assert isinstance(messages[1].state, PatchedAirbyteStateMessage)
+    assert messages[1].state.id == 7
+    assert messages[2].record.data == {"id": 2}
+
+
+def test_parse_input_stream_counts_parse_time_in_the_given_metrics():
+    metrics = SyncMetrics()
+    data = b"\n".join([_record_line(1), _record_line(2)]) + b"\n"
+    list(DestinationDust()._parse_input_stream(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"), metrics))
+    assert metrics.stream("people").parse_seconds > 0
+
+
+@mock.patch("destination_dust.destination.DustClient")
+def test_run_write_shares_its_metrics_with_input_parsing(client_init, tmp_path):
+    catalog = {
+        "streams": [
+            {
+                "stream": {"name": "people", "json_schema": {}, "supported_sync_modes": ["incremental"]},
+                "sync_mode": "incremental",
+                "destination_sync_mode": "append",
+            }
+        ]
+    }
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_bytes(orjson.dumps(catalog))
+    state = {"type": "STATE", "state": {"type": "LEGACY", "data": {}}}
+    data = b"\n".join([_record_line(1), orjson.dumps(state)]) + b"\n"
+    config = {"api_key": "sk-test", "workspace_id": "w1", "space_id": "s1", "data_source_id": "ds1"}
+    output = list(
+        DestinationDust()._run_write(
+            config, str(catalog_path), io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        )
+    )
+    (state_message,) = [m for m in output if m.type == Type.STATE]
+    assert state_message.state.destinationStats.streams["people"]["parseSeconds"] > 0
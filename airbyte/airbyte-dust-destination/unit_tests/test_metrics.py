@@ -0,0 +1,94 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from destination_dust.metrics import LatencyHistogram, SyncMetrics, current_request
+
+
+def _response(status_code: int, content_length: int) -> mock.Mock:
+    response = mock.Mock(status_code=status_code, raw=None)
+    response.request.headers = {"Content-Length": str(content_length)}
+    return response
+
+
+def _fake_upsert(responses: list) -> None:
+    """Report responses and one completed call the way the clients do."""
+    stats = current_request()
+    for response in responses:
+        stats.on_response(response)
+    stats.on_call(0.2)
+
+
+def test_histogram_quantiles_use_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    for seconds in [0.003] * 90 + [0.4] * 9 + [75.0]:
+        histogram.observe(seconds)
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.95) == 0.5
+    assert histogram.quantile(1.0) == 75.0
+
+
+def test_instrument_counts_requests_retries_and_bytes():
+    metrics = SyncMetrics()
+    upsert = metrics.instrument("people", _fake_upsert, rows=3)
+    upsert([_response(429, 100), _response(200, 100)])
+    stream = metrics.stream("people")
+    assert (stream.rows_sent, stream.requests, stream.retries, stream.rate_limited) == (3, 1, 1, 1)
+    assert stream.bytes_sent == 200
+    assert stream.http_seconds == pytest.approx(0.2)
+    assert current_request() is None
+
+
+def test_instrument_counts_failed_upserts_without_rows():
+    metrics = SyncMetrics()
+
+    def failing_upsert() -> None:
+        current_request().on_response(_response(500, 10))
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        metrics.instrument("people", failing_upsert, rows=3)()
+    stream = metrics.stream("people")
+    assert (stream.rows_sent, stream.failed_requests, stream.retries) == (0, 1, 1)
+
+
+def test_instrument_wraps_coroutine_functions():
+    metrics = SyncMetrics()
+
+    async def upsert_document() -> str:
+        _fake_upsert([_response(200, 50)])
+        return "ok"
+
+    assert asyncio.run(metrics.instrument("docs", upsert_document, documents=1)()) == "ok"
+    assert metrics.stream("docs").documents_sent == 1
+    assert metrics.stream("docs").bytes_sent == 50
+
+
+def test_checkpoint_counts_records_since_previous_checkpoint():
+    metrics = SyncMetrics()
+    for stream_name in ["people", "people", "companies"]:
+        metrics.add_record(stream_name)
+    record_count, summaries = metrics.checkpoint("people")
+    assert record_count == 2
+    assert list(summaries) == ["people"]
+    assert summaries["people"]["recordsIn"] == 2
+
+    metrics.add_record("people")
+    record_count, summaries = metrics.checkpoint()
+    assert record_count == 2
+    assert sorted(summaries) == ["companies", "people"]
+
+
+def test_prometheus_textfile_snapshot(tmp_path):
+    path = tmp_path / "dust.prom"
+    metrics = SyncMetrics(str(path))
+    metrics.add_record('we"ird')
+    metrics.instrument('we"ird', _fake_upsert, rows=1)([_response(200, 10)])
+    metrics.checkpoint()
+    text = path.read_text()
+    assert 'dust_destination_records_total{stream="we\\"ird"} 1' in text
+    assert 'dust_destination_request_duration_seconds_bucket{stream="we\\"ird",le="0.25"} 1' in text
+    assert 'dust_destination_request_duration_seconds_count{stream="we\\"ird"} 1' in text
+    assert "# TYPE dust_destination_stage_seconds_total counter" in text
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,70 @@
+import io
+from unittest import mock
+
+import orjson
+
+from airbyte_cdk.models import AirbyteMessage, AirbyteStateMessage, Level, Type
+from airbyte_cdk.models.airbyte_protocol import AirbyteStateType
+
+from destination_dust import destination
+from destination_dust.destination import (
+    PatchedAirbyteMessage,
+    PatchedAirbyteMessageSerializer,
+    PatchedAirbyteStateMessage,
+    _create_log_message,
+    _serialize_message,
+    _to_patched_message,
+)
+from destination_dust.output_writer import MessageWriter
+
+
+def _previous_serialization(message: AirbyteMessage) -> bytes:
+    return orjson.dumps(PatchedAirbyteMessageSerializer.dump(_to_patched_message(message)))
+
+
+def _state_message(state_id=None) -> AirbyteMessage:
+    return PatchedAirbyteMessage(
+        type=Type.STATE,
+        state=PatchedAirbyteStateMessage(type=AirbyteStateType.LEGACY, data={"cursor": 1}, id=state_id),
+    )
+
+
+def test_serialize_message_matches_previous_output():
+    messages = [
+        _create_log_message(Level.INFO, 'Processed "people"'),
+        _state_message(state_id=42),
+        AirbyteMessage(type=Type.STATE, state=AirbyteStateMessage(type=AirbyteStateType.LEGACY, data={"a": 1})),
+    ]
+    for message in messages:
+        assert _serialize_message(message) == _previous_serialization(message)
+    assert orjson.loads(_serialize_message(messages[1]))["state"]["id"] == 42
+
+
+def test_serialize_message_only_copies_when_state_id_must_be_preserved():
+    with mock.patch.object(destination, "_to_patched_message", wraps=_to_patched_message) as to_patched:
+        _serialize_message(_create_log_message(Level.INFO, "hello"))
+        _serialize_message(_state_message(state_id=1))
+        to_patched.assert_not_called()
+        _serialize_message(AirbyteMessage(type=Type.STATE, state=_state_message(state_id=1).state))
+        to_patched.assert_called_once()
+
+
+def test_message_writer_buffers_until_state():
+    stream = io.BytesIO()
+    writer = MessageWriter(stream, _serialize_message, flush_interval=60)
+    writer.write(_create_log_message(Level.INFO, "one"))
+    writer.write(_create_log_message(Level.INFO, "two"))
+    assert stream.getvalue() == b""
+    writer.write(_state_message(state_id=3))
+    lines = stream.getvalue().splitlines()
+    assert [orjson.loads(line)["type"] for line in lines] == ["LOG", "LOG", "STATE"]
+
+
+def test_message_writer_flushes_when_buffer_is_full_and_on_exit():
+    stream = io.BytesIO()
+    with MessageWriter(stream, _serialize_message, buffer_size=100, flush_interval=60) as writer:
+        writer.write(_create_log_message(Level.INFO, "x" * 200))
+        assert stream.getvalue().count(b"\n") == 1
+        writer.write(_create_log_message(Level.INFO, "short"))
+        assert stream.getvalue().count(b"\n") == 1
+    assert stream.getvalue().count(b"\n") == 2
@@ -0,0 +1,31 @@
+from unittest import mock
+
+from destination_dust.overwrite import WrittenIds, id_hash
+
+
+def test_id_hash_is_stable_and_unsigned():
+    assert id_hash("people-1") == id_hash("people-1")
+    assert id_hash("people-1") != id_hash("people-2")
+    assert 0 <= id_hash("people-1") < 2**64
+
+
+def test_written_ids_are_found_across_sorted_runs():
+    written = WrittenIds()
+    with mock.patch("destination_dust.overwrite.ID_RUN_SIZE", 3):
+        for i in range(10):
+            written.add(f"row-{i}")
+        assert "row-0" in written
+        # Added after a lookup sorted the tail into a run
+        written.add("row-10")
+        assert all(f"row-{i}" in written for i in range(11))
+    assert "row-11" not in written
+    assert 1 not in written
+    assert len(written) == 11
+    assert written.nbytes == 11 * 8
+
+
+def test_stale_yields_ids_not_written():
+    written = WrittenIds()
+    written.add("a")
+    written.add("c")
+    assert list(written.stale(["a", "b", "c", "d"])) == ["b", "d"]
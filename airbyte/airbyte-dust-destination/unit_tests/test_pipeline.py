@@ -0,0 +1,49 @@
+import threading
+import time
+
+import pytest
+
+from destination_dust.pipeline import read_ahead
+
+
+def test_read_ahead_yields_messages_in_order():
+    assert list(read_ahead(iter(range(100)), max_pending=3)) == list(range(100))
+
+
+def test_read_ahead_stops_reading_when_consumer_falls_behind():
+    read = []
+
+    def messages():
+        for i in range(100):
+            read.append(i)
+            yield i
+
+    pipeline = read_ahead(messages(), max_pending=5)
+    assert next(pipeline) == 0
+    time.sleep(0.2)
+    # One consumed, five queued, and one waiting to be queued
+    assert len(read) <= 7
+    assert list(pipeline) == list(range(1, 100))
+
+
+def test_read_ahead_reraises_reader_errors():
+    def messages():
+        yield 1
+        raise ValueError("bad input")
+
+    pipeline = read_ahead(messages())
+    assert next(pipeline) == 1
+    with pytest.raises(ValueError, match="bad input"):
+        next(pipeline)
+
+
+def test_read_ahead_releases_reader_when_consumer_stops():
+    def messages():
+        while True:
+            yield 1
+
+    pipeline = read_ahead(messages(), max_pending=2)
+    next(pipeline)
+    pipeline.close()
+    time.sleep(0.3)
+    assert not any(t.name == "dust-stdin-reader" for t in threading.enumerate())
@@ -0,0 +1,92 @@
+import pstats
+import threading
+import time
+from unittest import mock
+
+from airbyte_cdk.models import AirbyteMessage, AirbyteRecordMessage, Type
+
+from destination_dust.profiling import PER_THREAD_CPROFILE, SyncProfiler, thread_phase
+
+
+def _records(count: int) -> list:
+    return [
+        AirbyteMessage(type=Type.RECORD, record=AirbyteRecordMessage(stream="people", data={"id": i}, emitted_at=0))
+        for i in range(count)
+    ]
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_thread_phase_labels_sync_threads():
+    assert thread_phase("MainThread") == "transform"
+    assert thread_phase("dust-stdin-reader") == "input_parse"
+    assert thread_phase("dust-upload_0") == "http"
+    assert thread_phase("dust-tables_1") == "http"
+    assert thread_phase("Thread-3") == "other"
+
+
+def test_from_config_environment_takes_precedence():
+    config = {"profile_mode": "cprofile", "profile_output_path": "/tmp/from-config", "profile_start_record": 5}
+    with mock.patch.dict("os.environ", {"DUST_PROFILE_MODE": "sampling", "DUST_PROFILE_RECORD_COUNT": "10"}):
+        profiler = SyncProfiler.from_config(config)
+    assert (profiler.mode, profiler.output_path, profiler.start_record, profiler.end_record) == (
+        "sampling",
+        "/tmp/from-config",
+        5,
+        15,
+    )
+    with mock.patch.dict("os.environ", {"DUST_PROFILE_MODE": "off"}):
+        assert SyncProfiler.from_config(config) is None
+    with mock.patch.dict("os.environ", clear=True):
+        assert SyncProfiler.from_config({}) is None
+
+
+def test_count_records_opens_and_closes_the_window():
+    profiler = SyncProfiler("sampling", start_record=2, record_count=3)
+    states = [profiler.active for _ in profiler.count_records(_records(7))]
+    assert states == [False, False, True, True, True, False, False]
+
+
+def test_sampling_writes_folded_stacks_rooted_at_phase(tmp_path):
+    profiler = SyncProfiler("sampling", output_path=str(tmp_path / "profile"), interval=0.001)
+    profiler.start()
+    worker = threading.Thread(target=_busy, args=(0.2,), name="dust-upload_0")
+    worker.start()
+    _busy(0.2)
+    worker.join()
+    lines = profiler.stop()
+
+    folded = (tmp_path / "profile.folded").read_text().splitlines()
+    phases = {line.split(";", 1)[0] for line in folded}
+    assert {"transform", "http"} <= phases
+    assert any("_busy (test_profiling.py" in line for line in folded)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert lines[0].startswith("Profile: ")
+
+
+def test_cprofile_writes_pstats_per_phase(tmp_path):
+    profiler = SyncProfiler("cprofile", output_path=str(tmp_path / "profile"))
+    profiler.start()
+    try:
+        worker = threading.Thread(target=_busy, args=(0.05,), name="dust-upload_0")
+        worker.start()
+        worker.join()
+        _busy(0.05)
+    finally:
+        lines = profiler.stop()
+
+    if PER_THREAD_CPROFILE:
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["profile.http.pstats", "profile.transform.pstats"]
+        stats = pstats.Stats(str(tmp_path / "profile.http.pstats"))
+        assert any(line.startswith("Profile of transform: ") for line in lines)
+    else:
+        assert [path.name for path in tmp_path.iterdir()] == ["profile.all.pstats"]
+        stats = pstats.Stats(str(tmp_path / "profile.all.pstats"))
+        assert any(line.startswith("Profile of all: ") for line in lines)
+    # The worker's call, and with a single profile the main thread's
+    busy_calls = next(stat[1] for key, stat in stats.stats.items() if key[2] == "_busy")
+    assert busy_calls == (1 if PER_THREAD_CPROFILE else 2)
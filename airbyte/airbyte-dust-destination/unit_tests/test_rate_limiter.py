@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+
+from destination_dust.rate_limiter import MIN_RATE, AdaptiveRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _limiter(max_rate=None):
+    clock = Clock()
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        limiter = AdaptiveRateLimiter(max_rate)
+    return limiter, clock
+
+
+def test_unlimited_until_rate_limited():
+    limiter, clock = _limiter()
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        assert all(limiter.reserve() == 0 for _ in range(100))
+        clock.now += 0.5
+        # 100 requests in half a second, then a 429: back off to half that rate
+        limiter.on_response(429, {})
+        assert limiter.rate == 100
+        limiter.reserve()
+        assert limiter.reserve() > 0
+
+
+def test_token_bucket_spaces_requests_at_the_rate():
+    limiter, clock = _limiter(max_rate=10)
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        delays = [limiter.reserve() for _ in range(5)]
+    # One token is available at start; the others are spaced 0.1s apart
+    assert delays == pytest.approx([0, 0.1, 0.2, 0.3, 0.4])
+
+
+def test_retry_after_pauses_every_request():
+    limiter, clock = _limiter(max_rate=10)
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        limiter.on_response(429, {"Retry-After": "5"})
+        assert limiter.rate == 5
+        assert limiter.reserve() >= 5
+
+
+def test_concurrent_429s_lower_the_rate_once():
+    limiter, clock = _limiter(max_rate=8)
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        for _ in range(8):
+            limiter.on_response(429, {})
+        assert limiter.rate == 4
+        clock.now += 1
+        limiter.on_response(429, {})
+        assert limiter.rate == 2
+
+
+def test_rate_recovers_on_success_up_to_max_rate():
+    limiter, clock = _limiter(max_rate=4)
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        for _ in range(5):
+            limiter.on_response(429, {})
+            clock.now += 1
+        assert limiter.rate == MIN_RATE
+        for _ in range(100):
+            limiter.on_response(200, {})
+        assert limiter.rate == 4
+
+
+def test_exhausted_quota_header_pauses_until_reset():
+    limiter, clock = _limiter()
+    with mock.patch("destination_dust.rate_limiter.time.monotonic", clock):
+        limiter.on_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "3"})
+        assert limiter.reserve() == 3
+
+
+def test_backoff_delay_is_jittered_and_honors_retry_after():
+    delays = {AdaptiveRateLimiter.backoff_delay(3, {}) for _ in range(20)}
+    assert len(delays) > 1 and all(0 <= d <= 8 for d in delays)
+    assert AdaptiveRateLimiter.backoff_delay(0, {"Retry-After": "7"}) >= 7
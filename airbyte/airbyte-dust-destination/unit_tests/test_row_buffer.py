@@ -0,0 +1,51 @@
+from destination_dust.row_buffer import COMPACT_MIN_BYTES, TableRowBuffer
+
+
+def test_replaces_pending_rows_with_the_same_key_in_place():
+    buffer = TableRowBuffer(max_bytes=100)
+    assert not buffer.add("people", "1", b"v1" * 5)
+    assert not buffer.add("people", "2", b"v1" * 10)
+    assert buffer.add("people", "1", b"v2" + b"." * 13)
+    assert (buffer.pending_rows("people"), buffer.stream_bytes("people"), buffer.total_bytes) == (2, 35, 35)
+    assert buffer.collapsed == 1
+    assert buffer.pop("people", 1) == ([b"v2" + b"." * 13], [15])
+    assert buffer.pop("people") == ([b"v1" * 10], [20])
+    assert buffer.total_bytes == 0
+    assert buffer.pop("unknown") == ([], [])
+
+
+def test_key_popped_earlier_starts_a_new_row():
+    buffer = TableRowBuffer(max_bytes=100)
+    buffer.add("people", "1", b"a")
+    buffer.add("people", "2", b"b")
+    assert buffer.pop("people", 1) == ([b"a"], [1])
+    assert not buffer.add("people", "1", b"c")
+    assert buffer.pop("people") == ([b"b", b"c"], [1, 1])
+
+
+def test_batch_drains_keep_order_across_compactions():
+    buffer = TableRowBuffer(max_bytes=1 << 30)
+    row_size = 1000
+    rows = [str(i).encode().ljust(row_size, b".") for i in range(4 * COMPACT_MIN_BYTES // row_size)]
+    popped = []
+    for i, row in enumerate(rows):
+        buffer.add("people", str(i), row)
+        # Rewrite every row once, so the arena holds replaced bytes too
+        buffer.add("people", str(i), row)
+        if buffer.pending_rows("people") >= 10:
+            popped.extend(buffer.pop("people", 7)[0])
+    popped.extend(buffer.pop("people")[0])
+    assert popped == rows
+    assert buffer.collapsed == len(rows)
+    assert buffer.peak_bytes < 11 * row_size
+
+
+def test_arena_stays_bounded_by_its_live_rows():
+    buffer = TableRowBuffer(max_bytes=1 << 30)
+    for i in range(1000):
+        buffer.add("people", "same", bytes(1000))
+        buffer.add("people", str(i), bytes(10))
+        buffer.pop("people", 1)
+    arena = buffer._arenas["people"]
+    assert len(arena.data) <= 2 * max(arena.live_bytes, COMPACT_MIN_BYTES) + 1000
+    assert len(arena.starts) - arena.head == buffer.pending_rows("people")
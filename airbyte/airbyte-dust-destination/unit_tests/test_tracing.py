@@ -0,0 +1,58 @@
+import json
+
+from destination_dust.metrics import SyncMetrics, current_request
+from destination_dust.tracing import STATUS_ERROR, STATUS_OK, SyncTracer
+
+
+def _read_spans(path) -> list:
+    spans = []
+    for line in path.read_text().splitlines():
+        request = json.loads(line)
+        for resource_spans in request["resourceSpans"]:
+            for scope_spans in resource_spans["scopeSpans"]:
+                spans.extend(scope_spans["spans"])
+    return spans
+
+
+def _attributes(span: dict) -> dict:
+    return {attribute["key"]: next(iter(attribute["value"].values())) for attribute in span["attributes"]}
+
+
+def _fake_upsert_rows(table_id: str, rows: list, status_code: int = 200) -> None:
+    current_request().on_call(0.05, "upsert_rows", {"dust.table_id": table_id, "dust.row_count": len(rows)}, status_code)
+
+
+def test_request_spans_are_children_of_their_checkpoint(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = SyncTracer(str(path))
+    metrics = SyncMetrics(tracer=tracer)
+    metrics.instrument("people", _fake_upsert_rows)("t-people", [{"id": 1}, {"id": 2}])
+    tracer.checkpoint(42, {"airbyte.record_count": 2})
+    metrics.instrument("people", _fake_upsert_rows)("t-people", [{"id": 3}], status_code=500)
+    tracer.close(error=True)
+
+    spans = _read_spans(path)
+    assert [span["name"] for span in spans] == ["upsert_rows", "checkpoint", "upsert_rows", "checkpoint", "sync"]
+    first_request, first_checkpoint, second_request, second_checkpoint, sync = spans
+    assert len({span["traceId"] for span in spans}) == 1
+    assert first_request["parentSpanId"] == first_checkpoint["spanId"]
+    assert first_checkpoint["parentSpanId"] == sync["spanId"]
+    assert second_request["parentSpanId"] == second_checkpoint["spanId"]
+    assert "parentSpanId" not in sync
+
+    assert _attributes(first_request) == {
+        "airbyte.stream": "people",
+        "dust.table_id": "t-people",
+        "dust.row_count": "2",
+        "http.request.body.size": "0",
+        "http.request.resend_count": "0",
+        "http.response.status_code": "200",
+        "airbyte.state.id": "42",
+    }
+    assert _attributes(first_checkpoint)["airbyte.state.id"] == "42"
+    assert first_request["status"]["code"] == STATUS_OK
+    # The unfinished checkpoint is written on close, without a state id
+    assert "airbyte.state.id" not in _attributes(second_request)
+    assert second_request["status"]["code"] == STATUS_ERROR
+    assert sync["status"]["code"] == STATUS_ERROR
+    assert int(first_request["endTimeUnixNano"]) - int(first_request["startTimeUnixNano"]) == 50_000_000